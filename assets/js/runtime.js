@@ -0,0 +1,122 @@
+/*
+ * Shared page runtime, loaded with defer by the header component on every
+ * page. One passive scroll listener serves every scroll handler of the page
+ * once per animation frame, one resize listener every resize handler, and
+ * entrance animations are driven by IntersectionObserver instead of scroll
+ * events.
+ *
+ * Markup opts in without any page script:
+ *   #header              gets the "scrolled" class past SCROLLED_AT pixels
+ *   .fade-in             gets the "visible" class when it scrolls into view
+ *   [data-starfield=N]   is filled with N twinkling .star elements when near
+ *                        the viewport
+ * Page scripts use Runtime.onScroll(), onResize() and whenVisible() from a
+ * DOMContentLoaded listener, which runs after this deferred script.
+ */
+const Runtime = (() => {
+    const SCROLLED_AT = 50;
+
+    // Returns a function that registers handlers for a window event behind
+    // one passive listener. Handlers run at most once per frame however many
+    // events arrive, and once for the current state when added; each call
+    // returns a function that removes its handler
+    function frameListener(type) {
+        const handlers = new Set();
+        let frameRequested = false;
+
+        function run() {
+            frameRequested = false;
+            const scrollY = window.scrollY;
+            handlers.forEach(handler => handler(scrollY));
+        }
+
+        function requestFrame() {
+            if (!frameRequested) {
+                frameRequested = true;
+                requestAnimationFrame(run);
+            }
+        }
+
+        return handler => {
+            if (!handlers.size) {
+                window.addEventListener(type, requestFrame, { passive: true });
+            }
+            handlers.add(handler);
+            requestFrame();
+            return () => {
+                handlers.delete(handler);
+                if (!handlers.size) {
+                    window.removeEventListener(type, requestFrame);
+                }
+            };
+        };
+    }
+
+    // handler(scrollY) runs after the page scrolls or the window is resized
+    const onScroll = frameListener('scroll');
+    const onResize = frameListener('resize');
+
+    // Calls callback(element) the first time each element scrolls into view
+    function whenVisible(elements, callback, options = {}) {
+        const observer = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    callback(entry.target);
+                }
+            });
+        }, options);
+        elements.forEach(element => observer.observe(element));
+        return observer;
+    }
+
+    function reveal(elements) {
+        return whenVisible(elements, element => element.classList.add('visible'), {
+            threshold: 0.1,
+            rootMargin: '0px 0px -50px 0px'
+        });
+    }
+
+    // Toggles the header's "scrolled" class, touching it only when the state changes
+    function header(element) {
+        let scrolled = null;
+        return onScroll(scrollY => {
+            if ((scrollY > SCROLLED_AT) !== scrolled) {
+                scrolled = scrollY > SCROLLED_AT;
+                element.classList.toggle('scrolled', scrolled);
+            }
+        });
+    }
+
+    // Builds every star in a fragment, so the container is laid out once
+    function starfield(container, count) {
+        const stars = document.createDocumentFragment();
+        for (let i = 0; i < count; i++) {
+            const star = document.createElement('div');
+            star.className = 'star';
+            star.style.cssText = `left:${Math.random() * 100}%;top:${Math.random() * 100}%;` +
+                `animation-delay:${Math.random() * 3}s;opacity:${Math.random() * 0.7 + 0.3}`;
+            stars.appendChild(star);
+        }
+        container.replaceChildren(stars);
+    }
+
+    function init() {
+        const headerElement = document.getElementById('header');
+        if (headerElement) {
+            header(headerElement);
+        }
+        reveal(document.querySelectorAll('.fade-in'));
+        whenVisible(document.querySelectorAll('[data-starfield]'), container => {
+            starfield(container, Number(container.dataset.starfield));
+        }, { rootMargin: '200px' });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+
+    return { onScroll, onResize, whenVisible, reveal, header, starfield };
+})();
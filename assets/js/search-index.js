@@ -0,0 +1,79 @@
+/*
+ * Client for the static search indexes in assets/search/, built from data/
+ * and content/articles/ by scripts/search_index.py. index.json is fetched once; after that every
+ * lookup downloads at most one small shard, whatever the number of records.
+ */
+const SearchIndex = (() => {
+    const root = new URL('../search/', document.currentScript.src);
+    const files = {};
+    let index = null;
+
+    function fetchJSON(name, options) {
+        if (!files[name]) {
+            files[name] = fetch(new URL(name, root), options).then(response => {
+                if (!response.ok) {
+                    throw new Error(`${name}: HTTP ${response.status}`);
+                }
+                return response.json();
+            }).catch(error => {
+                delete files[name];
+                throw error;
+            });
+        }
+        return files[name];
+    }
+
+    // The shard list changes whenever the data does, so always revalidate it
+    function loadIndex() {
+        if (!index) {
+            index = fetchJSON('index.json', { cache: 'no-cache' }).catch(error => {
+                index = null;
+                throw error;
+            });
+        }
+        return index;
+    }
+
+    // 32-bit FNV-1a, matching fnv1a() in scripts/search_index.py
+    function hashKey(key) {
+        let hash = 0x811c9dc5;
+        for (let i = 0; i < key.length; i++) {
+            hash ^= key.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193) >>> 0;
+        }
+        return hash;
+    }
+
+    async function lookupIn(shards, key) {
+        const shard = await fetchJSON(shards[hashKey(key) % shards.length]);
+        return Object.prototype.hasOwnProperty.call(shard, key) ? shard[key] : null;
+    }
+
+    // Record stored under key in a sharded index ('shipments', 'batches', or
+    // 'articles' by id), or null
+    async function lookup(name, key) {
+        const shards = (await loadIndex())[name].shards;
+        return lookupIn(shards, key);
+    }
+
+    // Lowercase ASCII words of a query, as indexed by keywords() in the build
+    function words(text) {
+        return text.normalize('NFKD').replace(/[^\x00-\x7f]/g, '').toLowerCase().match(/[a-z0-9]+/g) || [];
+    }
+
+    // Ids of the articles matching every word of the query, newest first
+    async function searchArticles(query) {
+        const { shards, stopWords } = (await loadIndex()).articles.keywords;
+        const terms = words(query).filter(word => word.length >= 2 && !stopWords.includes(word));
+        const matches = await Promise.all(terms.map(word => lookupIn(shards, word)));
+        if (!matches.length || matches.some(ids => !ids)) {
+            return [];
+        }
+        return matches.reduce((result, ids) => {
+            const found = new Set(ids);
+            return result.filter(id => found.has(id));
+        });
+    }
+
+    return { lookup, searchArticles };
+})();
@@ -0,0 +1,4 @@
+"""
+Build helpers for the Ironji website
+Shared by build.py and update-components.py
+"""
@@ -0,0 +1,547 @@
+"""
+News and article pages
+Renders one page per Markdown file in content/articles/ from
+templates/article.html, and the news listings from the layout in news.html:
+every article PAGE_SIZE to a page (news.html, news-2.html, ...) and the same
+for each category (news-industry.html, news-industry-2.html, ...), so a
+category filter is a link to a small pre-rendered page instead of hiding
+cards in one page that holds every article.
+
+Content files start with a front matter block of "key: value" lines:
+
+    ---
+    id: 12
+    title: New Customs Regulations Streamline Cross-Border Trade
+    category: regulations
+    category_label: Regulations
+    date: January 8, 2025
+    read_time: 4 min read
+    excerpt: Rwanda's latest customs reforms are expected to ...
+    ---
+
+author and author_title are optional. The page is named after the file
+(customs-reforms.md -> article-customs-reforms.html).
+
+Each page is rendered from a key of everything it is made of (its article,
+its related articles, the layout and the components it uses) recorded in
+.cache/articles.json, so only pages whose inputs changed are rendered
+again. Pages are rendered in worker processes when there are enough of
+them, and pages left over from removed articles or categories are deleted.
+"""
+
+import json
+import math
+import re
+from collections import namedtuple
+from datetime import datetime
+from html import escape
+from pathlib import Path
+
+from scripts.manifest import hash_content, write_if_changed
+from scripts.markdown import render_markdown
+from scripts.markers import GENERATED_PATTERN, indent_html, scan_regions, splice, splice_generated
+from scripts.pool import map_pages
+from scripts.templates import COMPONENTS_DIR, Components
+
+CONTENT_DIR = Path('content/articles')
+ARTICLE_TEMPLATE = Path('templates/article.html')
+NEWS_PAGE = Path('news.html')
+
+# Old article-details.html?id=N links are sent on from this page
+REDIRECT_PAGE = Path('article-details.html')
+
+MANIFEST_PATH = Path('.cache/articles.json')
+MANIFEST_VERSION = 1
+
+# Cards on each listing page
+PAGE_SIZE = 6
+
+# Pages linked around the current one in the pagination bar
+PAGINATION_WINDOW = 2
+
+RELATED_COUNT = 3
+
+# Below this many pages to render, starting worker processes costs more
+# than rendering them here
+PARALLEL_MIN_PAGES = 32
+
+DEFAULT_AUTHOR = 'Ironji Team'
+DEFAULT_AUTHOR_TITLE = 'Logistics Industry Experts'
+
+NEWS_TITLE = 'News & Insights'
+NEWS_DESCRIPTION = ("Latest news and insights about Rwanda's logistics industry from Ironji - "
+                    "Rwanda's Premier Logistics Partner.")
+
+# Marks the pages this module writes, so the ones it no longer writes can
+# be found and removed without relying on the cache
+GENERATOR_META = '<meta name="generator" content="scripts/articles.py">'
+
+REQUIRED_FIELDS = ('id', 'title', 'category', 'category_label', 'date', 'read_time', 'excerpt')
+FRONT_MATTER_PATTERN = re.compile(r'---[ \t]*\n(.*?)\n---[ \t]*(?:\n|$)(.*)', re.DOTALL)
+SLUG_PATTERN = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*$')
+
+# Fields of an article shown in listings and search results
+LISTING_FIELDS = ('id', 'url', 'category', 'categoryLabel', 'date', 'readTime', 'title', 'excerpt')
+
+# path is the layout file, text its content
+Layout = namedtuple('Layout', ['path', 'text'])
+
+# One listing page; category is None for the listing of every article
+Listing = namedtuple('Listing', ['category', 'label', 'number', 'pages', 'articles', 'categories'])
+
+CALENDAR_ICON = ('<svg viewBox="0 0 24 24"><rect x="3" y="4" width="18" height="18" rx="2" ry="2"/>'
+                 '<line x1="16" y1="2" x2="16" y2="6"/><line x1="8" y1="2" x2="8" y2="6"/>'
+                 '<line x1="3" y1="10" x2="21" y2="10"/></svg>')
+CLOCK_ICON = '<svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="10"/><polyline points="12 6 12 12 16 14"/></svg>'
+AUTHOR_ICON = '<svg viewBox="0 0 24 24"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg>'
+ARROW_ICON = '<svg viewBox="0 0 24 24"><line x1="5" y1="12" x2="19" y2="12"/><polyline points="12 5 19 12 12 19"/></svg>'
+
+# Fields filled by the news page for cards built from search results are
+# marked with data-field, so both renderers share this one template
+ARTICLE_CARD = f'''<a href="{{url}}" class="article-card" data-id="{{id}}" data-category="{{category}}">
+    <div class="article-image">
+        <div class="article-category" data-field="categoryLabel">{{categoryLabel}}</div>
+    </div>
+    <div class="article-content">
+        <div class="article-meta">
+            <span class="article-meta-item">
+                {CALENDAR_ICON}
+                <span data-field="date">{{date}}</span>
+            </span>
+            <span class="article-meta-item">
+                {CLOCK_ICON}
+                <span data-field="readTime">{{readTime}}</span>
+            </span>
+        </div>
+        <h3 class="article-title" data-field="title">{{title}}</h3>
+        <p class="article-excerpt" data-field="excerpt">{{excerpt}}</p>
+        <span class="article-read-more">
+            Read More
+            {ARROW_ICON}
+        </span>
+    </div>
+</a>'''
+
+RELATED_CARD = '''<a href="{url}" class="related-card">
+    <div class="related-image"></div>
+    <div class="related-content">
+        <div class="related-category">{categoryLabel}</div>
+        <h3 class="related-card-title">{title}</h3>
+        <p class="related-excerpt">{excerpt}</p>
+    </div>
+</a>'''
+
+ARTICLE_HEADER = f'''<div class="article-header-container">
+    <div class="article-category-badge">{{categoryLabel}}</div>
+    <h1 class="article-header-title">{{title}}</h1>
+    <div class="article-meta">
+        <span class="article-meta-item">
+            {CALENDAR_ICON}
+            <span>{{date}}</span>
+        </span>
+        <span class="article-meta-item">
+            {CLOCK_ICON}
+            <span>{{readTime}}</span>
+        </span>
+        <span class="article-meta-item">
+            {AUTHOR_ICON}
+            <span>{{author}}</span>
+        </span>
+    </div>
+    <div class="article-author">
+        <div class="author-avatar">{{initials}}</div>
+        <div class="author-info">
+            <div class="author-name">{{author}}</div>
+            <div class="author-title">{{authorTitle}}</div>
+        </div>
+    </div>
+</div>'''
+
+BREADCRUMB = '''<nav class="breadcrumb-nav">
+    <a href="/" class="breadcrumb-link">Home</a>
+    <span class="breadcrumb-separator">/</span>
+    <a href="news.html" class="breadcrumb-link">News &amp; Insights</a>
+    <span class="breadcrumb-separator">/</span>
+    <a href="{category_url}" class="breadcrumb-link">{categoryLabel}</a>
+    <span class="breadcrumb-separator">/</span>
+    <span class="breadcrumb-current">{short_title}</span>
+</nav>'''
+
+
+def article_date(article):
+    """Return the publication date of an article, for sorting"""
+    return datetime.strptime(article['date'], '%B %d, %Y')
+
+
+def parse_front_matter(text, path):
+    """Split a content file into ({key: value}, body)"""
+    match = FRONT_MATTER_PATTERN.match(text.replace('\r\n', '\n'))
+    if match is None:
+        raise ValueError(f"{path}: no front matter block between --- lines")
+    fields = {}
+    for number, line in enumerate(match.group(1).split('\n'), start=2):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        key, separator, value = line.partition(':')
+        if not separator:
+            raise ValueError(f"{path}, line {number}: expected 'key: value'")
+        fields[key.strip()] = value.strip()
+    return fields, match.group(2).strip('\n')
+
+
+def page_name(slug):
+    """Return the page of an article (customs-reforms -> article-customs-reforms.html)"""
+    return f"article-{slug}.html"
+
+
+def listing_name(category, number):
+    """Return the listing page of a category (None for every article) and page number"""
+    stem = 'news' if category is None else f"news-{category}"
+    return f"{stem}.html" if number == 1 else f"{stem}-{number}.html"
+
+
+def load_article(path, root='.'):
+    """Load one content file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        fields, body = parse_front_matter(f.read(), path)
+    missing = [field for field in REQUIRED_FIELDS if not fields.get(field)]
+    if missing:
+        raise ValueError(f"{path}: front matter has no {', '.join(missing)}")
+    slug = path.stem
+    for value, what in ((slug, 'file name'), (fields['category'], 'category')):
+        if not SLUG_PATTERN.match(value):
+            raise ValueError(f"{path}: {what} '{value}' must be lowercase words joined by hyphens")
+    try:
+        article_id = int(fields['id'])
+        datetime.strptime(fields['date'], '%B %d, %Y')
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from None
+    return {
+        'id': article_id,
+        'url': page_name(slug),
+        'category': fields['category'],
+        'categoryLabel': fields['category_label'],
+        'date': fields['date'],
+        'readTime': fields['read_time'],
+        'title': fields['title'],
+        'excerpt': fields['excerpt'],
+        'author': fields.get('author') or DEFAULT_AUTHOR,
+        'authorTitle': fields.get('author_title') or DEFAULT_AUTHOR_TITLE,
+        'source': path.relative_to(root).as_posix(),
+        'body': body,
+    }
+
+
+def load_articles(root='.'):
+    """Load every content file, newest first"""
+    root = Path(root)
+    articles = [load_article(path, root) for path in sorted((root / CONTENT_DIR).glob('*.md'))]
+    for field in ('id', 'url'):
+        seen = {}
+        for article in articles:
+            if article[field] in seen:
+                raise ValueError(f"{article['source']} and {seen[article[field]]} have the same {field}")
+            seen[article[field]] = article['source']
+    return sorted(articles, key=lambda article: (article_date(article), article['id']), reverse=True)
+
+
+def listing_record(article):
+    """Return the fields of an article that listings and search results show"""
+    return {field: article[field] for field in LISTING_FIELDS}
+
+
+def categories(articles):
+    """Return [(category, label)] in the order their first article was published"""
+    found = {}
+    for article in sorted(articles, key=lambda article: article['id']):
+        found.setdefault(article['category'], article['categoryLabel'])
+    return list(found.items())
+
+
+def related(article, articles, count=RELATED_COUNT):
+    """Return the newest other articles, those of the same category first"""
+    others = [other for other in articles if other['id'] != article['id']]
+    others.sort(key=lambda other: other['category'] != article['category'])
+    return [listing_record(other) for other in others[:count]]
+
+
+def escaped(record):
+    """Return a record with every value HTML-escaped"""
+    return {key: escape(str(value)) for key, value in record.items()}
+
+
+def render_head(title, description):
+    return indent_html(f"{GENERATOR_META}\n<meta name=\"description\" content=\"{escape(description)}\">\n"
+                       f"<title>{escape(title)} — Ironji</title>")
+
+
+def render_card(article):
+    """Render one listing card"""
+    return ARTICLE_CARD.format(**escaped(article))
+
+
+def render_template():
+    """Render the empty card the news page clones for search results"""
+    return ARTICLE_CARD.format(**{field: '' for field in LISTING_FIELDS})
+
+
+def page_window(number, pages):
+    """Return the page numbers the pagination bar links, None marking a gap"""
+    shown = {1, pages} | set(range(number - PAGINATION_WINDOW, number + PAGINATION_WINDOW + 1))
+    window = []
+    for page in sorted(shown):
+        if 1 <= page <= pages:
+            if window and page - window[-1] > 1:
+                window.append(None)
+            window.append(page)
+    return window
+
+
+def render_pagination(listing):
+    """Render the pagination bar of a listing page, or nothing if it has one page"""
+    if listing.pages <= 1:
+        return ''
+    number = listing.number
+
+    def step(label, target, rel):
+        if target < 1 or target > listing.pages:
+            return f'<span class="pagination-btn disabled">{label}</span>'
+        return f'<a href="{listing_name(listing.category, target)}" class="pagination-btn" rel="{rel}">{label}</a>'
+
+    links = [step('Previous', number - 1, 'prev')]
+    for page in page_window(number, listing.pages):
+        if page is None:
+            links.append('<span class="pagination-gap">…</span>')
+        elif page == number:
+            links.append(f'<a href="{listing_name(listing.category, page)}" class="pagination-btn active" '
+                         f'aria-current="page">{page}</a>')
+        else:
+            links.append(f'<a href="{listing_name(listing.category, page)}" class="pagination-btn">{page}</a>')
+    links.append(step('Next', number + 1, 'next'))
+    links = indent_html('\n'.join(links))
+    return f'<nav class="pagination" aria-label="Pages">\n{links}\n</nav>'
+
+
+def render_filters(listing):
+    """Render the category links, marking the listing's own"""
+    links = []
+    for category, label in [(None, 'All Articles')] + listing.categories:
+        current = category == listing.category
+        attributes = ' active" aria-current="page' if current else ''
+        links.append(f'<a href="{listing_name(category, 1)}" class="filter-tag{attributes}">{escape(label)}</a>')
+    return '\n'.join(links)
+
+
+def listing_blocks(listing):
+    """Return the generated regions of a listing page"""
+    title = NEWS_TITLE if listing.category is None else f"{listing.label} — {NEWS_TITLE}"
+    description = NEWS_DESCRIPTION
+    if listing.category is not None:
+        description = f"{listing.label} articles about Rwanda's logistics industry from Ironji."
+    if listing.number > 1:
+        title += f", Page {listing.number}"
+        description = f"{description} Page {listing.number} of {listing.pages}."
+    cards = '\n\n'.join(render_card(article) for article in listing.articles)
+    grid = (f'<div class="articles-grid" id="articles-grid" data-category="{escape(listing.category or "")}">\n'
+            f'{indent_html(cards)}\n</div>\n'
+            f'<template id="article-card-template">\n{indent_html(render_template())}\n</template>')
+    return {
+        'head': render_head(title, description),
+        'filters': indent_html(render_filters(listing), ' ' * 12),
+        'articles': indent_html(grid, ' ' * 12),
+        'pagination': indent_html(render_pagination(listing), ' ' * 12),
+    }
+
+
+def initials(name):
+    """Return the initials shown in the author avatar (Ironji Team -> IT)"""
+    return ''.join(word[0] for word in name.split()[:2]).upper()
+
+
+def short_title(title, length=30):
+    return title if len(title) <= length else title[:length].rstrip() + '...'
+
+
+def article_blocks(data):
+    """Return the generated regions of an article page"""
+    article, related_articles = data
+    values = escaped(article)
+    values['category_url'] = listing_name(article['category'], 1)
+    values['initials'] = escape(initials(article['author']))
+    values['short_title'] = escape(short_title(article['title']))
+    cards = '\n'.join(RELATED_CARD.format(**escaped(other)) for other in related_articles)
+    return {
+        'head': render_head(article['title'], article['excerpt']),
+        'breadcrumb': indent_html(BREADCRUMB.format(**values), ' ' * 12),
+        'article-header': indent_html(ARTICLE_HEADER.format(**values), ' ' * 8),
+        'article-body': indent_html(render_markdown(article['body']), ' ' * 16),
+        'related': indent_html(f'<div class="related-grid">\n{indent_html(cards)}\n</div>', ' ' * 12),
+    }
+
+
+def render_components(content, components, page):
+    """Fill the placeholders and static regions of a page with its components"""
+    regions = scan_regions(content)
+    rendered = {region.name: indent_html(components.render(region.name, page))
+                for region in regions if region.kind != 'loader' and region.name in components}
+    return splice(content, rendered, regions)[0]
+
+
+def render_page(path, layout, components, render_blocks, data):
+    """Render one page from its layout and write it; returns whether it changed
+
+    Runs in a worker process when pages are rendered in parallel.
+    """
+    blocks = render_blocks(data)
+    page = render_components(layout.text, components, path.name)
+    page, filled = splice_generated(page, blocks)
+    missing = sorted(set(blocks) - set(filled))
+    if missing:
+        raise ValueError(f"{layout.path} has no Generated region for: {', '.join(missing)}")
+    return write_if_changed(path, page)
+
+
+def layout_signature(layout):
+    """Return a hash of a layout without the content of its generated regions
+
+    news.html is the layout of every listing and also the first listing
+    page, so what the build writes into it must not change its signature.
+    """
+    return hash_content(GENERATED_PATTERN.sub(lambda match: match.group('marker'), layout.text))
+
+
+def build_listings(articles):
+    """Return every listing page, all articles first, then each category"""
+    category_list = categories(articles)
+    records = [listing_record(article) for article in articles]
+    listings = []
+    for category, label in [(None, NEWS_TITLE)] + category_list:
+        members = [record for record in records if category is None or record['category'] == category]
+        pages = max(1, math.ceil(len(members) / PAGE_SIZE))
+        for number in range(1, pages + 1):
+            chunk = members[(number - 1) * PAGE_SIZE:number * PAGE_SIZE]
+            listings.append(Listing(category, label, number, pages, chunk, category_list))
+    return listings
+
+
+def generated_pages(root='.'):
+    """Return the pages in root written by this module, news.html aside"""
+    found = []
+    for path in sorted(Path(root).glob('*.html')):
+        if path.name == NEWS_PAGE.name:
+            continue
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            if GENERATOR_META in f.read(4096):
+                found.append(path)
+    return found
+
+
+def load_page_keys(path):
+    """Return {page: key} recorded by the last run, or {} if there is none"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('pages', {})
+
+
+def save_page_keys(path, keys):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = json.dumps({'version': MANIFEST_VERSION, 'pages': keys}, indent=2, sort_keys=True)
+    write_if_changed(path, content + '\n')
+
+
+def write_redirects(root, articles):
+    """Point the old article-details.html?id=N links at the article pages
+
+    Returns whether the page was written, or None if there is no such page.
+    """
+    page_path = root / REDIRECT_PAGE
+    if not page_path.exists():
+        return None
+    pages = json.dumps({str(article['id']): article['url'] for article in sorted(articles, key=lambda a: a['id'])},
+                       separators=(',', ':')).replace('</', '<\\/')
+    block = indent_html(f'<script type="application/json" id="article-pages">{pages}</script>')
+    with open(page_path, 'r', encoding='utf-8') as f:
+        page = f.read()
+    page, filled = splice_generated(page, {'article-pages': block})
+    if not filled:
+        raise ValueError(f"{REDIRECT_PAGE} has no Generated region for: article-pages")
+    return write_if_changed(page_path, page)
+
+
+def write_pages(root='.', jobs=1):
+    """Render the article and listing pages whose inputs changed
+
+    Returns (articles, number of listing pages, pages rendered, pages
+    changed, pages removed).
+    """
+    root = Path(root)
+    articles = load_articles(root)
+    components = Components(root / COMPONENTS_DIR)
+    layouts = {}
+    for path in (ARTICLE_TEMPLATE, NEWS_PAGE):
+        with open(root / path, 'r', encoding='utf-8') as f:
+            layout = Layout(path, f.read())
+        layouts[path] = (layout, layout_signature(layout), sorted({region.name for region in scan_regions(layout.text)}))
+
+    # (page, layout, blocks renderer, data) for every page
+    pages = [(article['url'], ARTICLE_TEMPLATE, article_blocks, (article, related(article, articles)))
+             for article in articles]
+    listings = build_listings(articles)
+    pages += [(listing_name(listing.category, listing.number), NEWS_PAGE, listing_blocks, listing)
+              for listing in listings]
+
+    previous = load_page_keys(root / MANIFEST_PATH)
+    keys = {}
+    pending = []
+    for name, layout_path, render_blocks, data in pages:
+        layout, signature, slots = layouts[layout_path]
+        key = hash_content(json.dumps([render_blocks.__name__, data, signature,
+                                       components.fingerprint(slots, name)], sort_keys=True))
+        keys[name] = key
+        if previous.get(name) != key or not (root / name).exists():
+            pending.append((root / name, layout, render_blocks, data))
+
+    arguments = {path: (layout, components, render_blocks, data) for path, layout, render_blocks, data in pending}
+    jobs = jobs if len(pending) >= PARALLEL_MIN_PAGES else 1
+    written = 0
+    failed = []
+    for result in map_pages(render_page, [path for path, *_ in pending], jobs=jobs, args_for=arguments.get):
+        if result.error:
+            print(f"  Error: {result.path.name}: {result.error}")
+            keys.pop(result.path.name)
+            failed.append(result.path.name)
+        elif result.value:
+            written += 1
+
+    removed = 0
+    current = {name for name, *_ in pages}
+    for path in generated_pages(root):
+        if path.name not in current:
+            path.unlink()
+            removed += 1
+
+    save_page_keys(root / MANIFEST_PATH, keys)
+    if failed:
+        raise ValueError(f"could not render {', '.join(failed)}")
+    return articles, len(listings), len(pending), written, removed
+
+
+def articles_step(root='.', jobs=1):
+    """Regenerate the news listings and article pages from content/articles/"""
+    print("Generating news and article pages...")
+    missing = [path for path in (CONTENT_DIR, ARTICLE_TEMPLATE, NEWS_PAGE) if not (Path(root) / path).exists()]
+    if missing:
+        print(f"  Note: {missing[0]} not found, skipping news and article pages")
+        return
+    articles, listings, rendered, written, removed = write_pages(root, jobs)
+    total = len(articles) + listings
+    print(f"  ✓ {len(articles)} article pages and {listings} listing pages of up to {PAGE_SIZE} articles")
+    print(f"  ✓ {rendered} rendered ({written} changed), {total - rendered} unchanged, {removed} removed")
+    state = write_redirects(Path(root), articles)
+    if state is not None:
+        print(f"  ✓ {REDIRECT_PAGE}: old article links redirected ({'updated' if state else 'unchanged'})")
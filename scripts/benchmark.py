@@ -0,0 +1,258 @@
+"""
+Build benchmark
+Generates synthetic sites with the same marker structure as the real pages
+(header/footer placeholders that become static regions, shared and
+page-specific CSS and JS) and times the build scripts on them, so speedups
+can be shown and regressions caught
+
+Usage:
+    python3 -m scripts.benchmark                           # 10, 1,000 and 10,000 pages
+    python3 -m scripts.benchmark --sizes 10 1000 --jobs 0
+    python3 -m scripts.benchmark --output bench.json       # save the results
+    python3 -m scripts.benchmark --compare bench.json      # exit 1 on regressions
+
+Each scenario runs the real script in a fresh process from the synthetic
+site's directory. With --profile the scripts' own per-stage profiles are
+kept in the results as well.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SIZES = (10, 1000, 10000)
+
+# The dist build compresses every page at the highest levels, so it only
+# runs on sites up to this size unless --dist-max says otherwise
+DIST_MAX_PAGES = 1000
+
+# (name, script, arguments), run in order on the same site
+SCENARIOS = (
+    ('build', 'build.py', []),                              # placeholders -> static regions
+    ('update-cold', 'update-components.py', ['--force']),   # every page reprocessed
+    ('update-warm', 'update-components.py', []),            # nothing changed
+    ('dist', 'build.py', ['--dist']),
+)
+
+# Slower than the compared run by more than this fraction counts as a regression
+TOLERANCE = 0.15
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - Ironji</title>
+    <style>
+        :root {{
+            --accent: #FF7F1F;
+            --black: #000000;
+            --white: #FFFFFF;
+        }}
+
+        body {{
+            font-family: 'Avenir', -apple-system, BlinkMacSystemFont, sans-serif;
+            color: var(--black);
+            line-height: 1.6;
+        }}
+
+        header {{
+            position: fixed;
+            top: 0;
+            width: 100%;
+            transition: all 0.3s ease;
+        }}
+
+        header.scrolled {{
+            background: var(--white);
+            box-shadow: 0 2px 20px rgba(0, 0, 0, 0.08);
+        }}
+
+        footer {{
+            background: var(--black);
+            color: var(--white);
+            padding: 4rem 2rem 2rem;
+        }}
+
+        .page-{number} .section-title {{
+            font-size: {font_size}rem;
+            color: var(--accent);
+        }}
+    </style>
+</head>
+<body class="page-{number}">
+    <!-- Navigation -->
+    <div id="header-placeholder"></div>
+
+    <main>
+{sections}
+    </main>
+
+    <div id="footer-placeholder"></div>
+
+    <script>
+        // Header scroll effect
+        window.addEventListener('scroll', function() {{
+            const header = document.getElementById('header');
+            if (window.scrollY > 50) {{
+                header.classList.add('scrolled');
+            }} else {{
+                header.classList.remove('scrolled');
+            }}
+        }});
+
+        document.querySelector('.section-title').dataset.page = '{number}';
+    </script>
+</body>
+</html>
+'''
+
+SECTION_TEMPLATE = '''        <section class="content-section" id="section-{number}-{index}">
+            <h2 class="section-title">{title}: part {index}</h2>
+            <p>
+                Ironji moves goods across all 30 districts of Rwanda. This synthetic
+                paragraph {index} of page {number} stands in for real content so the
+                build sees pages of a realistic size.
+            </p>
+        </section>'''
+
+
+def page_html(number):
+    """Return the HTML of synthetic page number"""
+    title = f"Synthetic Page {number}"
+    sections = '\n\n'.join(SECTION_TEMPLATE.format(number=number, index=index, title=title)
+                           for index in range(1, 4 + number % 5))
+    return PAGE_TEMPLATE.format(title=title, number=number, sections=sections,
+                                font_size=2 + number % 3 / 2)
+
+
+def create_site(site_dir, pages):
+    """Write a synthetic site of the given number of pages"""
+    site_dir = Path(site_dir)
+    shutil.copytree(REPO_ROOT / 'components', site_dir / 'components')
+    for number in range(pages):
+        name = 'index.html' if number == 0 else f"page-{number:05d}.html"
+        (site_dir / name).write_text(page_html(number), encoding='utf-8')
+
+
+def run_scenario(site_dir, script, arguments, jobs, profile):
+    """Run a build script on a site; return its result entry"""
+    command = [sys.executable, str(REPO_ROOT / script), *arguments, '--jobs', str(jobs)]
+    profile_path = Path(site_dir) / 'profile.json'
+    if profile:
+        command += ['--profile', str(profile_path)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=site_dir, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{script} {' '.join(arguments)} failed:\n{completed.stderr}")
+    result = {'seconds': round(seconds, 4)}
+    if profile:
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        result['stages'] = {stage['name']: stage['seconds'] for stage in report['stages']}
+        result['max_rss'] = report['totals']['max_rss']
+    return result
+
+
+def run_benchmark(sizes, jobs=1, profile=False, dist_max=DIST_MAX_PAGES):
+    """Build synthetic sites of every size and time each scenario
+
+    Returns a list of {'pages', 'scenario', 'seconds', 'pages_per_second', ...}.
+    """
+    results = []
+    for pages in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"ironji-bench-{pages}-") as site_dir:
+            create_site(site_dir, pages)
+            for name, script, arguments in SCENARIOS:
+                if name == 'dist' and pages > dist_max:
+                    continue
+                result = run_scenario(site_dir, script, arguments, jobs, profile)
+                result = {'pages': pages, 'scenario': name, **result}
+                result['pages_per_second'] = round(pages / result['seconds'], 1)
+                results.append(result)
+                print(f"  {pages:>6} {name:<12} {result['seconds']:>9.3f}s "
+                      f"{result['pages_per_second']:>10.1f} pages/s")
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Print the change against a baseline run and return the regressions"""
+    previous = {(entry['pages'], entry['scenario']): entry for entry in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline.get('created', 'baseline')} (tolerance {tolerance:.0%}):")
+    for entry in results:
+        old = previous.get((entry['pages'], entry['scenario']))
+        if old is None:
+            continue
+        change = entry['seconds'] / old['seconds'] - 1
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(entry)
+        print(f"  {entry['pages']:>6} {entry['scenario']:<12} {old['seconds']:>9.3f}s → "
+              f"{entry['seconds']:>9.3f}s ({change:+.1%}){flag}")
+    return regressions
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Benchmark the build scripts on synthetic sites')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), metavar='PAGES',
+                        help='site sizes to generate (default: 10 1000 10000)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='--jobs passed to the build scripts (0 = one per CPU core)')
+    parser.add_argument('--dist-max', type=int, default=DIST_MAX_PAGES, metavar='PAGES',
+                        help=f'largest site to run the dist build on (default: {DIST_MAX_PAGES})')
+    parser.add_argument('--profile', action='store_true',
+                        help="also record the scripts' per-stage profiles (slows them down)")
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare with an earlier --output file and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f'allowed slowdown before a regression is reported (default: {TOLERANCE})')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("Benchmarking the Ironji build...")
+    print("=" * 50)
+    print(f"  {'pages':>6} {'scenario':<12} {'time':>10} {'throughput':>16}")
+    results = run_benchmark(args.sizes, args.jobs, args.profile, args.dist_max)
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'jobs': args.jobs,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
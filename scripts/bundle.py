@@ -0,0 +1,395 @@
+"""
+Shared CSS/JS extraction
+Finds the style rules and script statements that pages repeat (header,
+footer, design system, header scroll handler...) and moves them into
+content-hashed assets/site.<hash>.css and assets/site.<hash>.js bundles
+that browsers can cache across navigations
+
+A bundle is only linked into pages that contain every rule or statement in
+it, so moving code out never adds behaviour to a page that did not have it.
+Pages left out of one CSS bundle get a bundle of their own shared rules, so
+every page that shares rules with another caches some of them.
+Only statements of classic scripts that use nothing but browser globals and
+their own names are moved: the rest depend on the page's inline code and
+have to run next to it.
+"""
+
+import re
+from collections import defaultdict
+from textwrap import indent
+
+from scripts.css import dedent_rule, normalize, parse_rules, selectors
+from scripts.jslex import significant, split_statements, tokenize
+from scripts.manifest import hash_content
+
+STYLE_PATTERN = re.compile(r'<style\b[^>]*>(.*?)</style>', re.DOTALL)
+SCRIPT_PATTERN = re.compile(r'<script\b(?P<attrs>[^>]*)>(?P<body>.*?)</script>', re.DOTALL)
+
+# Statements that declare names stay inline: other inline code may use them
+DECLARATIONS = {'const', 'let', 'var', 'function', 'class', 'async', 'import', 'export'}
+
+# Names that never refer to a variable
+KEYWORDS = {
+    'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger', 'default',
+    'delete', 'do', 'else', 'extends', 'false', 'finally', 'for', 'function', 'if',
+    'in', 'instanceof', 'let', 'new', 'null', 'of', 'return', 'super', 'switch',
+    'this', 'throw', 'true', 'try', 'typeof', 'var', 'void', 'while', 'with',
+    'async', 'await', 'yield', 'arguments',
+}
+
+# Browser globals a bundled statement may use; a statement using any other
+# free name depends on the page's own scripts and stays inline
+GLOBALS = {
+    'window', 'document', 'navigator', 'location', 'history', 'console',
+    'localStorage', 'sessionStorage', 'performance', 'fetch', 'matchMedia',
+    'getComputedStyle', 'setTimeout', 'clearTimeout', 'setInterval', 'clearInterval',
+    'requestAnimationFrame', 'cancelAnimationFrame', 'IntersectionObserver',
+    'ResizeObserver', 'MutationObserver', 'Event', 'CustomEvent', 'URL',
+    'URLSearchParams', 'JSON', 'Math', 'Date', 'Number', 'String', 'Boolean',
+    'Array', 'Object', 'Promise', 'Error', 'Map', 'Set', 'RegExp', 'Symbol', 'Intl',
+    'parseInt', 'parseFloat', 'isNaN', 'encodeURIComponent', 'decodeURIComponent',
+    'undefined', 'NaN', 'Infinity',
+}
+
+# Only units repeated this many times are worth moving into a bundle
+MIN_PAGES = 2
+
+
+def fingerprint(name, content, extension):
+    """Return the content-hashed file name for a bundle"""
+    return f"assets/{name}.{hash_content(content)[:10]}.{extension}"
+
+
+def is_inline_script(attrs):
+    """Check whether a <script> tag holds inline classic JavaScript
+
+    Module scripts are left alone: their top-level names are not globals,
+    so a statement moved out of one would lose them.
+    """
+    if 'src=' in attrs:
+        return False
+    match = re.search(r'type=["\']?([^"\'\s>]+)', attrs)
+    return match is None or match.group(1) == 'text/javascript'
+
+
+def bound_names(tokens):
+    """Return the names a statement declares itself (variables and parameters)"""
+    bound = set()
+    for position, (kind, text) in enumerate(tokens):
+        if kind != 'name':
+            continue
+        before = tokens[position - 1][1] if position else ''
+        after = tokens[position + 1][1] if position + 1 < len(tokens) else ''
+        if before in ('const', 'let', 'var', 'function', 'class'):
+            bound.add(text)
+        elif after == '=' and tokens[position + 2:position + 3] == [('punct', '>')]:
+            # x => ...
+            bound.add(text)
+    for position, (kind, text) in enumerate(tokens):
+        if text != '(':
+            continue
+        before = tokens[position - 1][1] if position else ''
+        before_name = tokens[position - 2][1] if position > 1 else ''
+        close = closing_paren(tokens, position)
+        arrow = [text for _, text in tokens[close + 1:close + 3]] == ['=', '>']
+        if before in ('function', 'catch') or before_name == 'function' or arrow:
+            # Parameters: the names starting each comma-separated item
+            for inner in range(position + 1, close):
+                if tokens[inner][0] == 'name' and tokens[inner - 1][1] in ('(', ',', '.'):
+                    bound.add(tokens[inner][1])
+    return bound
+
+
+def closing_paren(tokens, position):
+    """Return the position of the ')' matching the '(' at position"""
+    depth = 0
+    for index in range(position, len(tokens)):
+        text = tokens[index][1]
+        if text in '([{':
+            depth += 1
+        elif text in ')]}':
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(tokens) - 1
+
+
+def free_names(tokens):
+    """Return the names a statement uses without declaring them"""
+    used = set()
+    for position, (kind, text) in enumerate(tokens):
+        if kind != 'name' or text[0].isdigit() or text in KEYWORDS:
+            continue
+        before = tokens[position - 1][1] if position else ''
+        after = tokens[position + 1][1] if position + 1 < len(tokens) else ''
+        spread = position > 1 and tokens[position - 2][1] == '.'
+        if (before == '.' and not spread) or (after == ':' and before in ('{', ',')):
+            # Property access or object literal key
+            continue
+        used.add(text)
+    return used - bound_names(tokens)
+
+
+def is_self_contained(tokens):
+    """Check whether a statement only uses browser globals and its own names"""
+    return free_names(tokens) <= GLOBALS
+
+
+def rule_selectors(rule):
+    """Return the selectors a rule targets, used to keep cascade order intact"""
+    if rule.body is None:
+        return {rule.prelude}
+    if rule.prelude.startswith(('@media', '@supports')):
+        found = set()
+        for inner in parse_rules(rule.body):
+            found |= rule_selectors(inner)
+        return found
+    if rule.prelude.startswith('@'):
+        return {normalize(rule.prelude)}
+    return {normalize(selector) for selector in selectors(rule.prelude)}
+
+
+def choose_shared(units):
+    """Pick the group of pages and shared units that saves the most bytes
+
+    units maps each page to its list of unit keys. Returns the set of keys
+    to bundle and the sorted list of pages that will use the bundle.
+    """
+    pages_by_key = defaultdict(set)
+    for page, keys in units.items():
+        for key in keys:
+            pages_by_key[key].add(page)
+
+    groups = {frozenset(pages) for pages in pages_by_key.values() if len(pages) >= MIN_PAGES}
+    best_saved, best_keys, best_pages = 0, set(), []
+    for group in sorted(groups, key=sorted):
+        keys = {key for key, pages in pages_by_key.items() if pages >= group}
+        saved = (len(group) - 1) * sum(len(key) for key in keys)
+        if saved > best_saved:
+            best_saved, best_keys, best_pages = saved, keys, sorted(group)
+    return best_keys, best_pages
+
+
+def bundle_order(units, shared, pages):
+    """Order shared keys as they first appear across the bundled pages"""
+    order = []
+    seen = set()
+    for page in pages:
+        for key in units[page]:
+            if key in shared and key not in seen:
+                seen.add(key)
+                order.append(key)
+    return order
+
+
+def enforce_cascade(css_units, shared, pages):
+    """Drop shared rules whose move would change which rule wins
+
+    Bundled rules end up before every inline rule, so a shared rule must not
+    follow an inline rule (or a later bundled rule) with the same selector.
+    """
+    while True:
+        order = {key: position for position, key in enumerate(bundle_order(
+            {page: [key for key, _ in css_units[page]] for page in pages}, shared, pages))}
+        conflicts = set()
+        for page in pages:
+            earlier = []
+            for key, targets in css_units[page]:
+                if key in shared:
+                    for other_key, other_targets in earlier:
+                        if not targets & other_targets:
+                            continue
+                        if other_key not in shared or order[other_key] > order[key]:
+                            conflicts.add(key)
+                            break
+                earlier.append((key, targets))
+        if not conflicts:
+            return shared
+        shared = shared - conflicts
+
+
+def enforce_order(js, shared, pages):
+    """Drop shared statements that would no longer run where they did
+
+    The bundle is loaded in place of a page's first moved statement, so on
+    every page the moved statements must follow each other in one script,
+    in bundle order.
+    """
+    while True:
+        order = bundle_order({page: [key for key, *_ in js[page][1]] for page in pages}, shared, pages)
+        rank = {key: position for position, key in enumerate(order)}
+        conflicts = set()
+        for page in pages:
+            moved = [(key, index, position) for key, _, _, index, position in js[page][1] if key in shared]
+            for (key, index, position), (next_key, next_index, next_position) in zip(moved, moved[1:]):
+                if (next_index, next_position, rank[next_key]) != (index, position + 1, rank[key] + 1):
+                    conflicts.add(next_key)
+        if not conflicts:
+            return shared
+        shared = shared - conflicts
+
+
+def collect_css(html):
+    """Return (block spans, [(key, rule, block index)]) for a page's style blocks"""
+    blocks = []
+    rules = []
+    for index, match in enumerate(STYLE_PATTERN.finditer(html)):
+        blocks.append(match.span())
+        for rule in parse_rules(match.group(1)):
+            rules.append((normalize(rule.text), rule, index))
+    return blocks, rules
+
+
+def collect_js(html):
+    """Return (script spans, [(key, start, end, script index, position)]) for inline scripts
+
+    position numbers every statement of the page's inline scripts, including
+    the ones that cannot be moved.
+    """
+    scripts = []
+    statements = []
+    position = 0
+    for match in SCRIPT_PATTERN.finditer(html):
+        if not is_inline_script(match.group('attrs')):
+            continue
+        index = len(scripts)
+        scripts.append((match.span(), match.span('body')))
+        body = match.group('body')
+        for start, end in split_statements(body):
+            position += 1
+            tokens = significant(tokenize(body[start:end]))
+            if not tokens or tokens[0][1] in DECLARATIONS or not is_self_contained(tokens):
+                continue
+            key = ' '.join(text for _, text in tokens)
+            statements.append((key, start, end, index, position))
+    return scripts, statements
+
+
+def rewrite_styles(html, blocks, rules, shared, link):
+    """Remove shared rules from the style blocks and link the CSS bundle"""
+    kept = defaultdict(list)
+    for key, rule, index in rules:
+        if key not in shared:
+            kept[index].append(dedent_rule(rule.text))
+
+    pieces = []
+    position = 0
+    for index, (start, end) in enumerate(blocks):
+        pieces.append(html[position:start])
+        if index == 0:
+            pieces.append(link)
+        if kept[index]:
+            css = indent('\n'.join(kept[index]), '        ')
+            pieces.append(f"<style>\n{css}\n    </style>")
+        position = end
+    pieces.append(html[position:])
+    return ''.join(pieces)
+
+
+def strip_trailing_comments(code):
+    """Cut comments and blank lines from the end of a piece of script"""
+    cut = 0
+    offset = 0
+    for kind, text in tokenize(code):
+        offset += len(text)
+        if kind not in ('space', 'newline', 'comment'):
+            cut = offset
+    return code[:cut] + ('\n' if cut else '')
+
+
+def rewrite_scripts(html, scripts, statements, shared, tag):
+    """Replace the shared statements of a page with the JS bundle
+
+    The statements are consecutive in one script (see enforce_order), which
+    is split around them so the bundle runs exactly where they did.
+    """
+    moved = [(start, end, index) for key, start, end, index, _ in statements if key in shared]
+    if not moved:
+        return html
+    first, last = moved[0], moved[-1]
+    (start, end), (body_start, body_end) = scripts[first[2]]
+    body = html[body_start:body_end]
+    # The comment describing the first moved statement goes with it
+    before = strip_trailing_comments(body[:first[0]])
+    after = body[last[1]:]
+    pieces = [html[:start]]
+    if significant(tokenize(before)):
+        pieces.append(html[start:body_start] + before + html[body_end:end])
+    pieces.append(tag)
+    if significant(tokenize(after)):
+        pieces.append(html[start:body_start] + after + html[body_end:end])
+    pieces.append(html[end:])
+    return ''.join(pieces)
+
+
+def bundle_stage(site):
+    """Move CSS/JS shared between pages into fingerprinted bundles"""
+    print("Extracting shared CSS and JS bundles...")
+
+    before = {name: len(html.encode('utf-8')) for name, html in site.pages.items()}
+    css = {name: collect_css(html) for name, html in site.pages.items()}
+
+    # Shared style rules
+    css_units = {
+        name: [(key, rule_selectors(rule)) for key, rule, _ in rules]
+        for name, (_, rules) in css.items()
+    }
+    # One group of pages per bundle; pages left out of a group can form the next one
+    css_bundles = {}    # page -> its bundle's text
+    remaining = dict(css_units)
+    summary = []
+    while remaining:
+        css_keys, css_pages = choose_shared({name: [key for key, _ in units] for name, units in remaining.items()})
+        css_keys = enforce_cascade(remaining, css_keys, css_pages)
+        if not css_keys:
+            break
+        texts = {key: dedent_rule(rule.text) for name in css_pages for key, rule, _ in css[name][1]}
+        order = bundle_order({name: [key for key, _, _ in css[name][1]] for name in css_pages}, css_keys, css_pages)
+        css_bundle = '\n\n'.join(texts[key] for key in order) + '\n'
+        css_path = fingerprint('site', css_bundle, 'css')
+        site.add_file(css_path, css_bundle)
+        link = f'<link rel="stylesheet" href="{css_path}">\n    '
+        for name in css_pages:
+            blocks, rules = css[name]
+            site.pages[name] = rewrite_styles(site.pages[name], blocks, rules, css_keys, link)
+            css_bundles[name] = css_bundle
+            del remaining[name]
+        summary.append(f"{len(css_keys)} rules in {len(css_pages)} pages")
+
+    # Shared script statements (scripts are re-read as styles may have moved them)
+    js = {name: collect_js(html) for name, html in site.pages.items()}
+    js_keys, js_pages = choose_shared({name: [key for key, *_ in statements] for name, (_, statements) in js.items()})
+    js_keys = enforce_order(js, js_keys, js_pages)
+    js_bundle = ''
+    if js_keys:
+        texts = {}
+        for name in js_pages:
+            html = site.pages[name]
+            scripts, statements = js[name]
+            for key, start, end, index, _ in statements:
+                body_start = scripts[index][1][0]
+                texts.setdefault(key, html[body_start + start:body_start + end])
+        order = bundle_order({name: [key for key, *_ in js[name][1]] for name in js_pages}, js_keys, js_pages)
+        js_bundle = '\n\n'.join(texts[key] for key in order) + '\n'
+        js_path = fingerprint('site', js_bundle, 'js')
+        site.add_file(js_path, js_bundle)
+        tag = f'<script src="{js_path}"></script>'
+        for name in js_pages:
+            scripts, statements = js[name]
+            site.pages[name] = rewrite_scripts(site.pages[name], scripts, statements, js_keys, tag)
+
+    report = {}
+    for name in sorted(site.pages):
+        after = len(site.pages[name].encode('utf-8'))
+        report[name] = {
+            'before': before[name],
+            'after': after,
+            'css_bundle': len(css_bundles.get(name, '').encode('utf-8')),
+            'js_bundle': len(js_bundle.encode('utf-8')) if name in js_pages else 0,
+        }
+        shared = report[name]['css_bundle'] + report[name]['js_bundle']
+        note = f" (+ {shared:,} bytes cached in shared bundles)" if shared else ''
+        print(f"  ✓ {name}: {before[name]:,} → {after:,} bytes{note}")
+    site.report['bundle'] = report
+    print(f"  Shared CSS: {', '.join(summary) or 'none'}, "
+          f"shared JS: {len(js_keys)} statements in {len(js_pages)} pages")
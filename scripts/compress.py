@@ -0,0 +1,79 @@
+"""
+Precompressed output
+Writes .gz and .br siblings for every text file in the built site at the
+highest compression level, and records a size report for each release
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TEXT_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.xml', '.txt', '.webmanifest'}
+
+REPORT_PATH = 'size-report.json'
+
+
+def gzip_bytes(data):
+    """Compress data with gzip at level 9 (mtime is fixed so output is reproducible)"""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    """Compress data with brotli at quality 11, or return None if brotli is missing"""
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def as_bytes(content):
+    """Return output content as bytes, reading copied assets from disk"""
+    if isinstance(content, Path):
+        return content.read_bytes()
+    if isinstance(content, str):
+        return content.encode('utf-8')
+    return content
+
+
+def compress_stage(site):
+    """Add .gz/.br files next to every text output and write the size report"""
+    print("Compressing text assets...")
+    if brotli is None:
+        print("  Note: brotli is not installed, skipping .br files (pip install brotli)")
+
+    minified = site.report.get('minify', {})
+    report = {}
+    for name, content in sorted(site.outputs().items()):
+        if Path(name).suffix not in TEXT_EXTENSIONS:
+            continue
+        data = as_bytes(content)
+        gz = gzip_bytes(data)
+        br = brotli_bytes(data)
+        site.add_file(f"{name}.gz", gz)
+        if br is not None:
+            site.add_file(f"{name}.br", br)
+        report[name] = {
+            'source': minified.get(name, {}).get('before', len(data)),
+            'minified': len(data),
+            'gzip': len(gz),
+            'brotli': len(br) if br is not None else None,
+        }
+
+    width = max((len(name) for name in report), default=0)
+    print(f"  {'file':<{width}}  {'source':>9}  {'minified':>9}  {'gzip':>8}  {'brotli':>8}")
+    for name, sizes in report.items():
+        brotli_size = f"{sizes['brotli']:,}" if sizes['brotli'] is not None else '-'
+        print(f"  {name:<{width}}  {sizes['source']:>9,}  {sizes['minified']:>9,}  "
+              f"{sizes['gzip']:>8,}  {brotli_size:>8}")
+    totals = {key: sum(sizes[key] or 0 for sizes in report.values())
+              for key in ('source', 'minified', 'gzip', 'brotli')}
+    brotli_total = f"{totals['brotli']:,}" if brotli is not None else '-'
+    print(f"  {'total':<{width}}  {totals['source']:>9,}  {totals['minified']:>9,}  "
+          f"{totals['gzip']:>8,}  {brotli_total:>8}")
+
+    site.report['compress'] = report
+    site.add_report(REPORT_PATH, json.dumps({'files': report, 'totals': totals}, indent=2) + '\n')
@@ -0,0 +1,122 @@
+"""
+Minimal CSS parser
+Splits a style sheet into top-level rules so build stages can compare,
+move and drop whole rules without a full CSS engine
+"""
+
+import re
+from collections import namedtuple
+
+# prelude is the selector or at-rule ("@media (max-width: 768px)"), body the
+# text between the braces (None for statements like @import), text the rule
+# exactly as written
+Rule = namedtuple('Rule', ['prelude', 'body', 'text'])
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def strip_comments(css):
+    """Remove /* */ comments outside of strings"""
+    pieces = []
+    position = 0
+    for start, end, kind in scan(css):
+        if kind == 'comment':
+            pieces.append(css[position:start])
+            position = end
+    pieces.append(css[position:])
+    return ''.join(pieces)
+
+
+def scan(css):
+    """Yield (start, end, kind) for every comment and string in css"""
+    index = 0
+    length = len(css)
+    while index < length:
+        char = css[index]
+        if char == '/' and css.startswith('/*', index):
+            end = css.find('*/', index + 2)
+            end = length if end == -1 else end + 2
+            yield index, end, 'comment'
+            index = end
+        elif char in '"\'':
+            end = index + 1
+            while end < length and css[end] != char:
+                end += 2 if css[end] == '\\' else 1
+            end = min(end + 1, length)
+            yield index, end, 'string'
+            index = end
+        else:
+            index += 1
+
+
+def parse_rules(css):
+    """Split css into a list of top-level Rules (comments are dropped)"""
+    css = strip_comments(css)
+    rules = []
+    depth = 0
+    rule_start = 0
+    body_start = None
+    strings = {start: end for start, end, kind in scan(css)}
+    index = 0
+    length = len(css)
+    while index < length:
+        if index in strings:
+            index = strings[index]
+            continue
+        char = css[index]
+        if char == '{':
+            if depth == 0:
+                body_start = index
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                prelude = css[rule_start:body_start].strip()
+                body = css[body_start + 1:index]
+                rules.append(Rule(prelude, body, css[rule_start:index + 1].strip()))
+                rule_start = index + 1
+            depth = max(depth, 0)
+        elif char == ';' and depth == 0:
+            # Statement at-rules such as @import or @charset
+            text = css[rule_start:index + 1].strip()
+            rules.append(Rule(text[:-1].strip(), None, text))
+            rule_start = index + 1
+        index += 1
+    return rules
+
+
+def normalize(text):
+    """Collapse whitespace so equivalent rules compare equal"""
+    text = WHITESPACE.sub(' ', text).strip()
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return re.sub(r':\s+', ':', text)
+
+
+def selectors(prelude):
+    """Return the individual selectors of a style rule prelude"""
+    parts = []
+    depth = 0
+    current = []
+    for char in prelude:
+        if char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        current.append(char)
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def dedent_rule(text):
+    """Remove the source indentation from a rule's continuation lines"""
+    lines = text.split('\n')
+    if len(lines) == 1:
+        return text
+    last = lines[-1]
+    indent = len(last) - len(last.lstrip())
+    return '\n'.join([lines[0]] + [line[indent:] if line[:indent].isspace() else line.lstrip()
+                                    for line in lines[1:]])
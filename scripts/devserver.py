@@ -0,0 +1,292 @@
+"""
+Development server with live reload
+Watches components, pages, data, content and assets, rebuilds only what a change
+affects and serves the site with a small live-reload script injected into
+every page, so an edit shows up in the browser without a full rebuild
+
+The watcher polls file signatures (size and mtime), so it needs no extra
+packages. Component and page changes are handed to the update script's
+rebuild callback; data files, content files, templates and the pages used
+as layouts run the data steps that depend on them. Pages
+reload over a server-sent event stream, and only when a file they use
+changed.
+"""
+
+import json
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from scripts.articles import ARTICLE_TEMPLATE, CONTENT_DIR, NEWS_PAGE, REDIRECT_PAGE, articles_step, generated_pages
+from scripts.manifest import stat_signature
+from scripts.schedule import ROUTES_PATH, SCHEDULE_PAGE, TABLE_DIR, schedule_step
+from scripts.search_index import INDEX_DIR, SHIPMENTS_PATH, search_index_step
+from scripts.tariffs import DISTRICTS_PATH, QUOTE_PAGE, TARIFFS_PATH, quote_step
+
+COMPONENTS_DIR = Path('components')
+DATA_DIR = Path('data')
+ASSETS_DIR = Path('assets')
+
+# Step inputs outside data/, watched along with it
+SOURCE_DIRS = (CONTENT_DIR, ARTICLE_TEMPLATE.parent)
+
+# Seconds between two scans of the watched files
+POLL_INTERVAL = 0.05
+
+# Seconds between keep-alive comments on idle reload streams
+KEEPALIVE_INTERVAL = 15
+
+RELOAD_PATH = '/__livereload'
+
+# (files and directories read, step, files and directories written); the
+# files written can be a function of root for steps that add and remove pages
+DATA_STEPS = [
+    ((SHIPMENTS_PATH, CONTENT_DIR), search_index_step, (INDEX_DIR,)),
+    ((ROUTES_PATH, TARIFFS_PATH), schedule_step, (SCHEDULE_PAGE, TABLE_DIR)),
+    ((TARIFFS_PATH, DISTRICTS_PATH, ROUTES_PATH), quote_step, (QUOTE_PAGE,)),
+    ((CONTENT_DIR, ARTICLE_TEMPLATE, NEWS_PAGE), articles_step,
+     lambda root: [NEWS_PAGE, REDIRECT_PAGE] + [path.relative_to(root) for path in generated_pages(root)]),
+]
+
+# Reloads the page when a file it uses changed: the page itself or any
+# non-HTML file (assets and data can be used by any page)
+RELOAD_SCRIPT = '''<script>
+(function () {
+    var page = location.pathname.replace(/^\\//, '') || 'index.html';
+    if (page.slice(-1) === '/') page += 'index.html';
+    new EventSource('%s').onmessage = function (event) {
+        var changed = JSON.parse(event.data);
+        if (changed.some(function (path) { return path === page || !/\\.html$/.test(path); })) {
+            location.reload();
+        }
+    };
+})();
+</script>''' % RELOAD_PATH
+
+# Changed paths sorted by what has to happen to them
+Changes = namedtuple('Changes', ['components', 'pages', 'data', 'assets'])
+
+
+def watched_files(root):
+    """Return every file the server watches, relative to root"""
+    root = Path(root)
+    files = list(root.glob('*.html'))
+    files += (path for path in (root / COMPONENTS_DIR).rglob('*') if path.is_file())
+    files += (path for path in (root / DATA_DIR).glob('*') if path.is_file())
+    for source_dir in SOURCE_DIRS:
+        files += (path for path in (root / source_dir).rglob('*') if path.is_file())
+    files += (path for path in (root / ASSETS_DIR).rglob('*') if path.is_file())
+    return [path.relative_to(root) for path in files]
+
+
+class Watcher:
+    """Reports the files that were added, changed or removed since the last poll"""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self.signatures = self.scan()
+
+    def signature(self, path):
+        """Return the signature of a file, or None if it no longer exists"""
+        try:
+            return stat_signature(self.root / path)
+        except OSError:
+            return None
+
+    def scan(self):
+        """Return {path: signature} for every watched file"""
+        signatures = {}
+        for path in watched_files(self.root):
+            signature = self.signature(path)
+            if signature is not None:
+                signatures[path] = signature
+        return signatures
+
+    def poll(self):
+        """Return the sorted paths that changed since the last poll"""
+        current = self.scan()
+        changed = {path for path in current.keys() | self.signatures.keys()
+                   if current.get(path) != self.signatures.get(path)}
+        self.signatures = current
+        return sorted(changed)
+
+    def absorb(self, paths):
+        """Record files the build wrote itself, so they are not seen as edits
+
+        Directories absorb every watched file under them.
+        """
+        paths = [Path(path) for path in paths]
+        for path in watched_files(self.root) + list(self.signatures):
+            if any(path == written or written in path.parents for written in paths):
+                signature = self.signature(path)
+                if signature is None:
+                    self.signatures.pop(path, None)
+                else:
+                    self.signatures[path] = signature
+
+
+def classify(paths):
+    """Split changed paths into components, pages, data files and assets"""
+    changes = Changes([], [], [], [])
+    for path in paths:
+        if COMPONENTS_DIR in path.parents:
+            changes.components.append(path)
+        elif path.parent == DATA_DIR or any(source_dir in path.parents for source_dir in SOURCE_DIRS):
+            changes.data.append(path)
+        elif path.parent == Path('.') and path.suffix == '.html':
+            changes.pages.append(path)
+        else:
+            changes.assets.append(path)
+    return changes
+
+
+def reads(inputs, path):
+    """Return whether a step with the given inputs reads path"""
+    return any(path == source or source in path.parents for source in inputs)
+
+
+def run_data_steps(changed_paths, root='.'):
+    """Run the data steps that read any of the changed files; return their outputs"""
+    outputs = []
+    for inputs, step, written in DATA_STEPS:
+        if any(reads(inputs, path) for path in changed_paths):
+            if callable(written):
+                # Pages the step removes are outputs too
+                before = written(root)
+                step(root)
+                outputs.extend(set(before) | set(written(root)))
+            else:
+                step(root)
+                outputs.extend(written)
+    return outputs
+
+
+class ReloadBroadcaster:
+    """Hands every batch of changed paths to the open reload streams"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.changed = []
+
+    def publish(self, paths):
+        """Tell every connected page which files changed"""
+        with self.condition:
+            self.version += 1
+            self.changed = [Path(path).as_posix() for path in paths]
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Wait for a batch newer than version; return (version, paths or None)"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            if self.version == version:
+                return version, None
+            return self.version, self.changed
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Serves the site uncached, with the reload script in every page"""
+
+    broadcaster = None
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.stream_reloads()
+            return
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            path = path / 'index.html'
+        if path.suffix == '.html' and path.is_file():
+            self.send_page(path)
+            return
+        super().do_GET()
+
+    def send_page(self, path):
+        """Send an HTML page with the reload script before </body>"""
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        position = content.rfind('</body>')
+        if position == -1:
+            position = len(content)
+        body = (content[:position] + RELOAD_SCRIPT + '\n' + content[position:]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        """Keep a server-sent event stream open and push every change batch"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        version = self.broadcaster.version
+        try:
+            while True:
+                version, changed = self.broadcaster.wait(version, KEEPALIVE_INTERVAL)
+                message = ': keep-alive\n\n' if changed is None else f"data: {json.dumps(changed)}\n\n"
+                self.wfile.write(message.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # Requests are not logged; the rebuild output is what matters
+        pass
+
+
+def start_server(host, port, broadcaster, root='.'):
+    """Serve root on a background thread and return the server"""
+    handler = partial(type('Handler', (DevRequestHandler,), {'broadcaster': broadcaster}),
+                      directory=str(root))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve(rebuild, host='127.0.0.1', port=8000, root='.'):
+    """Watch the site, rebuild on every change and serve it with live reload
+
+    rebuild(components, pages) is called with the changed component files
+    and pages (paths relative to root) and returns the pages it wrote.
+    Runs until interrupted.
+    """
+    broadcaster = ReloadBroadcaster()
+    server = start_server(host, port, broadcaster, root)
+    watcher = Watcher(root)
+    print(f"Serving http://{host}:{server.server_address[1]}/ with live reload")
+    print(f"Watching {COMPONENTS_DIR}/, pages, {DATA_DIR}/, {', '.join(f'{path}/' for path in SOURCE_DIRS)} "
+          f"and {ASSETS_DIR}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            started = time.perf_counter()
+            changes = classify(changed)
+            written = []
+            try:
+                written += run_data_steps(changes.data + changes.pages, root)
+                written += rebuild(changes.components, changes.pages)
+            except Exception as exc:
+                print(f"  Error: {type(exc).__name__}: {exc}")
+            watcher.absorb(written)
+            reloaded = sorted(set(changed) | {Path(path) for path in written})
+            broadcaster.publish(reloaded)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"  ✓ Rebuilt {', '.join(path.as_posix() for path in changed)} in {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        server.shutdown()
+    return 0
@@ -0,0 +1,257 @@
+"""
+Minimal HTML tree and selector matcher
+Parses a page into an element tree and tells whether a CSS selector matches
+anything in it, so build stages can reason about which rules a page uses
+without a browser
+
+Matching errs on the side of "matches": pseudo-classes, pseudo-elements and
+attribute selectors depend on state the build cannot see, so they are
+treated as always true, and selectors that cannot be parsed match everything.
+
+The elements inside <head> are left out of the tree: they are never
+rendered, and leaving them out lets stages that rewrite a page's style
+sheets and scripts keep using the tree parsed before.
+"""
+
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'source', 'track', 'wbr',
+}
+
+# The parts of a page that decide its tree, for telling whether two versions
+# of a page parse into the same elements
+RAW_TEXT_PATTERN = re.compile(r'(<(script|style)\b[^>]*>).*?(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+HEAD_PATTERN = re.compile(r'(<head\b[^>]*>).*?(</head\s*>)', re.DOTALL | re.IGNORECASE)
+TAG_PATTERN = re.compile(r'<(/?[A-Za-z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+TREE_ATTRIBUTE_PATTERN = re.compile(r'\s(?:id|class)\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)', re.IGNORECASE)
+
+# One simple selector or combinator of a complex selector
+SELECTOR_TOKEN = re.compile(r'''
+    (?P<combinator>\s*[>+~]\s*)
+  | (?P<space>\s+)
+  | (?P<universal>\*)
+  | (?P<tag>[a-zA-Z][\w-]*)
+  | \#(?P<id>(?:[\w-]|\\.)+)
+  | \.(?P<class>(?:[\w-]|\\.)+)
+  | (?P<attribute>\[[^\]]*\])
+  | (?P<pseudo>::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?)
+''', re.VERBOSE)
+
+
+class Element:
+    """One element of the page with just what selector matching needs"""
+
+    __slots__ = ('tag', 'id', 'classes', 'parent', 'children', 'index')
+
+    def __init__(self, tag, attrs, parent, index):
+        attrs = dict(attrs)
+        self.tag = tag
+        self.id = attrs.get('id')
+        self.classes = set((attrs.get('class') or '').split())
+        self.parent = parent
+        self.children = []
+        self.index = index      # position in document order
+
+    def ancestors(self):
+        """Yield the parent, grandparent... up to the root"""
+        element = self.parent
+        while element is not None and element.tag is not None:
+            yield element
+            element = element.parent
+
+    def previous_siblings(self):
+        """Yield the preceding sibling elements, nearest first"""
+        if self.parent is None:
+            return
+        siblings = self.parent.children
+        yield from reversed(siblings[:siblings.index(self)])
+
+    def iter(self):
+        """Yield this element and all its descendants in document order"""
+        yield self
+        for child in self.children:
+            yield from child.iter()
+
+
+class TreeBuilder(HTMLParser):
+    """Builds an Element tree, closing unclosed elements the forgiving way"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element(None, (), None, -1)
+        self.stack = [self.root]
+        self.elements = []
+        self.in_head = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.in_head:
+            if tag != 'body':
+                return
+            self.handle_endtag('head')
+        element = Element(tag, attrs, self.stack[-1], len(self.elements))
+        self.stack[-1].children.append(element)
+        self.elements.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+        self.in_head = tag == 'head'
+
+    def handle_startendtag(self, tag, attrs):
+        if self.in_head:
+            return
+        element = Element(tag, attrs, self.stack[-1], len(self.elements))
+        self.stack[-1].children.append(element)
+        self.elements.append(element)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+
+class Document:
+    """A parsed page with lookup tables for selector matching"""
+
+    def __init__(self, html):
+        builder = TreeBuilder()
+        builder.feed(html)
+        builder.close()
+        self.root = builder.root
+        self.elements = builder.elements
+        self.by_tag = {}
+        self.by_id = {}
+        self.by_class = {}
+        for element in self.elements:
+            self.by_tag.setdefault(element.tag, []).append(element)
+            if element.id:
+                self.by_id.setdefault(element.id, []).append(element)
+            for name in element.classes:
+                self.by_class.setdefault(name, []).append(element)
+
+    def find(self, tag):
+        """Return the first element with the given tag, or None"""
+        elements = self.by_tag.get(tag)
+        return elements[0] if elements else None
+
+    def select(self, selector, elements=None):
+        """Return the elements (optionally limited to elements) matching selector"""
+        parts = parse_selector(selector)
+        if parts is None:
+            return list(self.elements if elements is None else elements)
+        _, compound = parts[-1]
+        candidates = self.candidates(compound)
+        if elements is not None:
+            allowed = set(map(id, elements))
+            candidates = [element for element in candidates if id(element) in allowed]
+        return [element for element in candidates if matches(element, parts, len(parts) - 1)]
+
+    def candidates(self, compound):
+        """Return the elements that could match the rightmost compound selector"""
+        if compound['id']:
+            return self.by_id.get(compound['id'], [])
+        if compound['classes']:
+            return self.by_class.get(next(iter(compound['classes'])), [])
+        if compound['tag']:
+            return self.by_tag.get(compound['tag'], [])
+        return self.elements
+
+
+def tree_key(html):
+    """Return what decides a page's tree: its <body> tags with their id and class
+
+    Pages with the same key parse into the same elements, so a change to
+    text, other attributes, the <head> or the CSS and JavaScript inside a
+    page keeps its Document.
+    """
+    html = HEAD_PATTERN.sub(r'\1\2', RAW_TEXT_PATTERN.sub(r'\1\3', html))
+    return ' '.join(name + ''.join(TREE_ATTRIBUTE_PATTERN.findall(attrs)) + ('/' if attrs.endswith('/') else '')
+                    for name, attrs in TAG_PATTERN.findall(html))
+
+
+def unescape(name):
+    """Remove CSS escapes from an identifier (md\\:flex -> md:flex)"""
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def parse_selector(selector):
+    """Split a complex selector into [(combinator, compound)], left to right
+
+    compound is {'tag', 'id', 'classes'}; the first combinator is None.
+    Returns None for selectors the matcher does not understand.
+    """
+    parts = []
+    compound = None
+    combinator = None
+    position = 0
+    selector = selector.strip()
+    while position < len(selector):
+        match = SELECTOR_TOKEN.match(selector, position)
+        if match is None:
+            return None
+        position = match.end()
+        kind = match.lastgroup
+        if kind in ('space', 'combinator'):
+            if compound is None:
+                return None
+            parts.append((combinator, compound))
+            compound = None
+            combinator = match.group(kind).strip() or ' '
+            continue
+        if compound is None:
+            compound = {'tag': None, 'id': None, 'classes': set()}
+        if kind == 'tag':
+            compound['tag'] = match.group('tag').lower()
+        elif kind == 'id':
+            compound['id'] = unescape(match.group('id'))
+        elif kind == 'class':
+            compound['classes'].add(unescape(match.group('class')))
+    if compound is None:
+        return None
+    parts.append((combinator, compound))
+    return parts
+
+
+def matches_compound(element, compound):
+    """Check an element against the tag, id and classes of a compound selector"""
+    return ((compound['tag'] is None or element.tag == compound['tag'])
+            and (compound['id'] is None or element.id == compound['id'])
+            and compound['classes'] <= element.classes)
+
+
+def matches(element, parts, position):
+    """Check whether element matches parts[:position + 1], right to left"""
+    combinator, compound = parts[position]
+    if not matches_compound(element, compound):
+        return False
+    if position == 0:
+        return True
+    if combinator == ' ':
+        return any(matches(ancestor, parts, position - 1) for ancestor in element.ancestors())
+    if combinator == '>':
+        parent = element.parent
+        return parent is not None and parent.tag is not None and matches(parent, parts, position - 1)
+    siblings = element.previous_siblings()
+    if combinator == '+':
+        sibling = next(siblings, None)
+        return sibling is not None and matches(sibling, parts, position - 1)
+    return any(matches(sibling, parts, position - 1) for sibling in siblings)
+
+
+def selector_names(selector):
+    """Return the tags, ids and classes a selector refers to, or None if unparseable"""
+    parts = parse_selector(selector)
+    if parts is None:
+        return None
+    names = set()
+    for _, compound in parts:
+        if compound['tag']:
+            names.add(compound['tag'])
+        if compound['id']:
+            names.add(compound['id'])
+        names |= compound['classes']
+    return names
@@ -0,0 +1,48 @@
+"""
+Fingerprinted page scripts
+Renames the local script files pages load (the shared page runtime, the
+search index client) after their content, as the CSS/JS bundles are, so
+browsers and the service worker can keep them without revalidating and a
+deploy that changes one is picked up on the next navigation
+
+The unhashed originals are no longer referenced by any page, so
+publish_stage leaves them out of the output.
+"""
+
+from pathlib import PurePosixPath
+
+from scripts.bundle import fingerprint
+from scripts.purge import SCRIPT_SRC_PATTERN
+
+
+def hashed_name(src, content):
+    """Return the fingerprinted path of a script under assets/"""
+    return fingerprint(PurePosixPath(src).relative_to('assets').with_suffix('').as_posix(), content, 'js')
+
+
+def fingerprint_stage(site):
+    """Give every local script file pages load a content-hashed name"""
+    print("Fingerprinting page scripts...")
+    renamed = {}
+    for name in sorted(site.pages):
+        for src in SCRIPT_SRC_PATTERN.findall(site.pages[name]):
+            if src in renamed or src not in site.assets or not src.startswith('assets/') or not src.endswith('.js'):
+                continue
+            content = site.assets[src].read_text(encoding='utf-8')
+            renamed[src] = hashed_name(src, content)
+            site.add_file(renamed[src], content)
+
+    report = {}
+    for name in sorted(site.pages):
+        html = site.pages[name]
+        for src, path in renamed.items():
+            if f'src="{src}"' in html:
+                html = html.replace(f'src="{src}"', f'src="{path}"')
+                report.setdefault(src, {'path': path, 'pages': 0})['pages'] += 1
+        site.pages[name] = html
+
+    for src, entry in report.items():
+        print(f"  ✓ {src} → {entry['path']} ({entry['pages']} pages)")
+    if not report:
+        print("  ✓ no local scripts to fingerprint")
+    site.report['fingerprint'] = report
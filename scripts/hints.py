@@ -0,0 +1,210 @@
+"""
+Image dimensions, lazy loading and resource hints
+Writes the intrinsic width and height into every local <img> so the browser
+reserves its space before it loads (no layout shift), lazy-loads the images
+below the fold, and tells the browser early about what the first screen
+needs: the hero image gets fetchpriority="high" and a preload, and the web
+fonts the inline CSS uses are preloaded.
+
+Runs after images_stage, so the hints point at the responsive derivatives,
+and uses the same above-the-fold budget as critical_stage. Dimensions need
+Pillow; without it only the loading hints are added.
+"""
+
+import re
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from scripts.bundle import SCRIPT_PATTERN, STYLE_PATTERN
+from scripts.compress import as_bytes
+from scripts.images import IMG_PATTERN, format_attrs, parse_attrs
+from scripts.minify import COMMENT_PATTERN
+from scripts.purge import STYLESHEET_PATTERN, above_fold
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PICTURE_PATTERN = re.compile(r'<picture\b[^>]*>(?P<sources>.*?)<img\b', re.DOTALL | re.IGNORECASE)
+SOURCE_PATTERN = re.compile(r'<source\b[^>]*>', re.IGNORECASE)
+HEAD_RESOURCE_PATTERN = re.compile(r'<(?:link|style|script)\b')
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{(?P<body>[^}]*)\}')
+FONT_FAMILY_PATTERN = re.compile(r'font-family\s*:\s*(?P<names>[^;}]+)')
+URL_PATTERN = re.compile(r'url\(\s*(["\']?)(?P<url>[^)"\']+)\1\s*\)')
+
+FONT_TYPES = {'.woff2': 'font/woff2', '.woff': 'font/woff', '.ttf': 'font/ttf', '.otf': 'font/otf'}
+
+
+def is_local(url):
+    """Check whether a URL points at a file of the site"""
+    return bool(url) and not url.startswith(('data:', '#', '/')) and '://' not in url
+
+
+def image_size(site, src, cache):
+    """Return the (width, height) of a local image, or None"""
+    if src not in cache:
+        content = site.outputs().get(src)
+        cache[src] = None
+        if content is not None and Image is not None:
+            try:
+                with Image.open(BytesIO(as_bytes(content))) as image:
+                    cache[src] = image.size
+            except OSError:
+                pass
+    return cache[src]
+
+
+def page_images(html):
+    """Return the <img> tag matches the parser sees as elements
+
+    Tags inside scripts and comments are not elements, so they are left out.
+    """
+    hidden = [match.span() for match in SCRIPT_PATTERN.finditer(html)]
+    hidden += [match.span() for match in COMMENT_PATTERN.finditer(html)]
+    return [match for match in IMG_PATTERN.finditer(html)
+            if not any(start <= match.start() < end for start, end in hidden)]
+
+
+def fill_dimensions(attrs, size):
+    """Add the missing width/height of an <img>, keeping any declared one"""
+    width, height = size
+    if 'width' not in attrs and 'height' not in attrs:
+        attrs['width'], attrs['height'] = str(width), str(height)
+    elif 'height' not in attrs and attrs['width'].isdigit():
+        attrs['height'] = str(round(int(attrs['width']) * height / width))
+    elif 'width' not in attrs and attrs['height'].isdigit():
+        attrs['width'] = str(round(int(attrs['height']) * width / height))
+
+
+def image_preload(html, match, attrs):
+    """Return the <link rel=preload> for the hero image
+
+    A <picture> is preloaded through its first <source>, the format browsers
+    that support it will pick; others ignore a preload of an unknown type.
+    """
+    link = {'rel': 'preload', 'as': 'image'}
+    picture = None
+    for candidate in PICTURE_PATTERN.finditer(html, 0, match.end()):
+        if candidate.end() == match.start() + len('<img'):
+            picture = candidate
+    sources = SOURCE_PATTERN.findall(picture.group('sources')) if picture else []
+    if sources:
+        source = parse_attrs(sources[0])
+        link['imagesrcset'] = source.get('srcset')
+        link['imagesizes'] = source.get('sizes')
+        if source.get('type'):
+            link['type'] = source['type']
+    elif attrs.get('srcset'):
+        link['imagesrcset'] = attrs['srcset']
+        link['imagesizes'] = attrs.get('sizes')
+    else:
+        link['href'] = attrs['src']
+    link['fetchpriority'] = 'high'
+    return f"<link {format_attrs({name: value for name, value in link.items() if value is not None})}>"
+
+
+def font_preloads(site, html):
+    """Return preload links for the local fonts the page's inline CSS uses"""
+    sheets = [('', css) for css in STYLE_PATTERN.findall(html)]
+    for href in STYLESHEET_PATTERN.findall(html):
+        if isinstance(site.files.get(href), str):
+            sheets.append((str(PurePosixPath(href).parent), site.files[href]))
+    used = set()
+    for css in STYLE_PATTERN.findall(html):
+        for match in FONT_FAMILY_PATTERN.finditer(FONT_FACE_PATTERN.sub('', css)):
+            used.update(name.strip().strip('"\'') for name in match.group('names').split(','))
+
+    links = []
+    for base, css in sheets:
+        for face in FONT_FACE_PATTERN.finditer(css):
+            family = FONT_FAMILY_PATTERN.search(face.group('body'))
+            if family is None or family.group('names').strip().strip('"\'') not in used:
+                continue
+            for url in URL_PATTERN.finditer(face.group('body')):
+                font = url.group('url')
+                suffix = PurePosixPath(font).suffix
+                if is_local(font) and suffix in FONT_TYPES:
+                    href = str(PurePosixPath(base) / font) if base else font
+                    link = (f'<link rel="preload" href="{href}" as="font" '
+                            f'type="{FONT_TYPES[suffix]}" crossorigin>')
+                    if link not in links:
+                        links.append(link)
+                    break
+    return links
+
+
+def insert_preloads(html, links):
+    """Put preload links in <head>, ahead of its first style sheet or script"""
+    if not links:
+        return html
+    head_end = html.find('</head>')
+    if head_end == -1:
+        return html
+    first = HEAD_RESOURCE_PATTERN.search(html, html.find('<head'), head_end)
+    position = first.start() if first else head_end
+    return html[:position] + '\n    '.join(links) + '\n    ' + html[position:]
+
+
+def hint_page(site, name, sizes):
+    """Add dimensions, loading hints and preloads to one page; return (html, stats)"""
+    html = site.pages[name]
+    document = site.document(name)
+    elements = document.by_tag.get('img', [])
+    matches = page_images(html)
+    if len(matches) != len(elements):
+        # The markup and the parsed tree disagree: do not guess the fold
+        fold = None
+    else:
+        fold_ids = set(map(id, above_fold(document)))
+        fold = [id(element) in fold_ids for element in elements]
+
+    stats = {'sized': 0, 'lazy': 0, 'hero': None, 'fonts': 0}
+    preloads = []
+    pieces = []
+    position = 0
+    for number, match in enumerate(matches):
+        attrs = parse_attrs(match.group(0))
+        src = attrs.get('src') or ''
+        size = image_size(site, src, sizes) if is_local(src) else None
+        if size is not None and ('width' not in attrs or 'height' not in attrs):
+            fill_dimensions(attrs, size)
+            stats['sized'] += 1
+        if fold is not None and not fold[number]:
+            if 'loading' not in attrs:
+                attrs['loading'] = 'lazy'
+                stats['lazy'] += 1
+            attrs.setdefault('decoding', 'async')
+        elif fold is not None and stats['hero'] is None and attrs.get('loading') != 'lazy':
+            attrs.setdefault('fetchpriority', 'high')
+            stats['hero'] = src or '(set by script)'
+            if is_local(src):
+                preloads.append(image_preload(html, match, attrs))
+        pieces.append(html[position:match.start()])
+        pieces.append(f"<img {format_attrs(attrs)}>")
+        position = match.end()
+    pieces.append(html[position:])
+    html = ''.join(pieces)
+
+    fonts = font_preloads(site, html)
+    stats['fonts'] = len(fonts)
+    return insert_preloads(html, fonts + preloads), stats
+
+
+def hints_stage(site):
+    """Size every image, lazy-load those below the fold and preload what the first screen needs"""
+    print("Adding image dimensions and resource hints...")
+    if Image is None:
+        print("  Note: Pillow is not installed, images get no width/height (pip install Pillow)")
+
+    sizes = {}
+    report = {}
+    for name in sorted(site.pages):
+        site.pages[name], stats = hint_page(site, name, sizes)
+        if not (stats['sized'] or stats['lazy'] or stats['hero'] or stats['fonts']):
+            continue
+        report[name] = stats
+        hero = f", hero {stats['hero']}" if stats['hero'] else ''
+        print(f"  ✓ {name}: {stats['sized']} images sized, {stats['lazy']} lazy, "
+              f"{stats['fonts']} fonts preloaded{hero}")
+    site.report['hints'] = report
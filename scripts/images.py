@@ -0,0 +1,234 @@
+"""
+Responsive image derivatives
+Encodes every raster image referenced by a page at several widths in AVIF,
+WebP and a JPEG (or PNG, for images with transparency) fallback, then
+rewrites the <img> into a <picture> with srcset/sizes so each device only
+downloads the size it needs
+
+Derivatives are cached under .cache/images by source hash, with the
+image's width and fallback format next to them, so an unchanged image is
+never decoded or re-encoded.
+"""
+
+import json
+import re
+from pathlib import Path
+
+from scripts.manifest import hash_content
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+# Relative to the site root
+CACHE_DIR = Path('.cache/images')
+
+WIDTHS = (320, 480, 640, 960, 1280, 1920)
+
+# Sizes used when an <img> does not declare its own sizes attribute
+DEFAULT_SIZES = '100vw'
+
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# format -> (file extension, mime type, save options)
+ENCODERS = {
+    'avif': ('avif', 'image/avif', {'quality': 55}),
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('png', 'image/png', {'optimize': True}),
+}
+
+IMG_PATTERN = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+PICTURE_PATTERN = re.compile(r'<picture\b.*?</picture>', re.DOTALL | re.IGNORECASE)
+
+
+def parse_attrs(tag):
+    """Return the attributes of a tag as an ordered dict (value None if bare)"""
+    inner = re.sub(r'^<\w+', '', tag).rstrip('>').rstrip('/')
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(inner):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        attrs[name] = value
+    return attrs
+
+
+def format_attrs(attrs):
+    """Serialize attributes back into tag markup, always double-quoted
+
+    Values are markup as parse_attrs found it (entities stay escaped), so
+    only the double quotes a single-quoted value may contain need escaping.
+    """
+    parts = []
+    for name, value in attrs.items():
+        if value is None:
+            parts.append(name)
+        else:
+            value = value.replace('"', '&quot;')
+            parts.append(f'{name}="{value}"')
+    return ' '.join(parts)
+
+
+def available_formats():
+    """Return the modern formats this Pillow build can encode"""
+    formats = []
+    for name in ('avif', 'webp'):
+        try:
+            if features.check(name):
+                formats.append(name)
+        except ValueError:
+            pass
+    return formats
+
+
+def has_transparency(image):
+    """Check whether an image actually uses its alpha channel"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        alpha = image.convert('RGBA').getchannel('A')
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+def derivative_widths(width):
+    """Return the widths to encode for an image of the given width"""
+    widths = [candidate for candidate in WIDTHS if candidate < width]
+    widths.append(width)
+    return widths
+
+
+def derivative_paths(source, digest, cache_dir, width, fallback):
+    """Return {format: [(width, cache path), ...]} for a source image"""
+    derivatives = {}
+    for size in derivative_widths(width):
+        for name in available_formats() + [fallback]:
+            extension = ENCODERS[name][0]
+            derivatives.setdefault(name, []).append((size, cache_dir / f"{source.stem}-{digest}-{size}.{extension}"))
+    return derivatives
+
+
+def encode_derivatives(source, cache_dir):
+    """Encode (or load from cache) every derivative of a source image
+
+    The source is only decoded when a derivative is missing from cache_dir.
+    Returns (fallback format, {format: [(width, cache path), ...]}).
+    """
+    digest = hash_content(source.read_bytes())[:16]
+    info_path = cache_dir / f"{source.stem}-{digest}.json"
+    if info_path.exists():
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        derivatives = derivative_paths(source, digest, cache_dir, info['width'], info['fallback'])
+        if all(path.exists() for entries in derivatives.values() for _, path in entries):
+            return info['fallback'], derivatives
+
+    image = Image.open(source)
+    image.load()
+    fallback = 'png' if has_transparency(image) else 'jpeg'
+    derivatives = derivative_paths(source, digest, cache_dir, image.width, fallback)
+
+    loaded = {}
+    for name, entries in derivatives.items():
+        _, _, options = ENCODERS[name]
+        for width, path in entries:
+            if path.exists():
+                continue
+            if width not in loaded:
+                height = round(image.height * width / image.width)
+                loaded[width] = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            resized = loaded[width]
+            if name == 'jpeg':
+                resized = resized.convert('RGB')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            resized.save(tmp_path, format=name.upper(), **options)
+            tmp_path.replace(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(info_path, 'w', encoding='utf-8') as f:
+        json.dump({'width': image.width, 'fallback': fallback}, f)
+    return fallback, derivatives
+
+
+def output_name(source_name, path):
+    """Return the dist path of a cached derivative"""
+    stem, digest, width = path.stem.rsplit('-', 2)
+    folder = Path(source_name).parent.as_posix()
+    return f"{folder}/{stem}-{width}.{digest[:10]}{path.suffix}"
+
+
+def picture_markup(attrs, sizes, fallback, srcsets):
+    """Build the <picture> element replacing an <img>"""
+    sources = []
+    for name, srcset in srcsets.items():
+        if name == fallback:
+            continue
+        sources.append(f'<source type="{ENCODERS[name][1]}" srcset="{srcset}" sizes="{sizes}">')
+    img_attrs = dict(attrs)
+    largest = srcsets[fallback].split(', ')[-1].rsplit(' ', 1)[0]
+    img_attrs['src'] = largest
+    img_attrs['srcset'] = srcsets[fallback]
+    img_attrs['sizes'] = sizes
+    return f"<picture>{''.join(sources)}<img {format_attrs(img_attrs)}></picture>"
+
+
+def rewrite_images(html, site, cache):
+    """Rewrite every eligible <img> in a page into a responsive <picture>"""
+    protected = [match.span() for match in PICTURE_PATTERN.finditer(html)]
+
+    def replace(match):
+        if any(start <= match.start() < end for start, end in protected):
+            return match.group(0)
+        attrs = parse_attrs(match.group(0))
+        src = attrs.get('src') or ''
+        if 'srcset' in attrs or not src.lower().endswith(RASTER_EXTENSIONS):
+            return match.group(0)
+        name = src.lstrip('/')
+        source = site.root / name
+        if '://' in src or not source.is_file():
+            return match.group(0)
+        if name not in cache:
+            cache[name] = encode_derivatives(source, site.root / CACHE_DIR)
+        fallback, derivatives = cache[name]
+        srcsets = {}
+        for fmt, entries in derivatives.items():
+            parts = []
+            for width, path in entries:
+                out = output_name(name, path)
+                site.assets[out] = path
+                parts.append(f"{out} {width}w")
+            srcsets[fmt] = ', '.join(parts)
+        sizes = attrs.pop('sizes', None) or DEFAULT_SIZES
+        return picture_markup(attrs, sizes, fallback, srcsets)
+
+    return IMG_PATTERN.sub(replace, html)
+
+
+def images_stage(site):
+    """Generate responsive derivatives and srcset markup for page images"""
+    print("Generating responsive images...")
+    if Image is None:
+        print("  Note: Pillow is not installed, skipping image derivatives (pip install Pillow)")
+        return
+
+    cache_dir = site.root / CACHE_DIR
+    cached_before = set(cache_dir.glob('*')) if cache_dir.exists() else set()
+    cache = {}
+    for name in sorted(site.pages):
+        site.pages[name] = rewrite_images(site.pages[name], site, cache)
+
+    report = {}
+    for source_name, (fallback, derivatives) in sorted(cache.items()):
+        paths = [path for entries in derivatives.values() for _, path in entries]
+        encoded = sum(1 for path in paths if path not in cached_before)
+        sizes = {fmt: entries[0][1].stat().st_size for fmt, entries in derivatives.items()}
+        report[source_name] = {
+            'source': (site.root / source_name).stat().st_size,
+            'derivatives': len(paths),
+            'encoded': encoded,
+            'smallest': sizes,
+        }
+        smallest = ', '.join(f"{fmt} {size:,}" for fmt, size in sizes.items())
+        print(f"  ✓ {source_name}: {len(paths)} derivatives ({encoded} encoded, "
+              f"{len(paths) - encoded} cached); smallest: {smallest} bytes")
+    site.report['images'] = report
@@ -0,0 +1,208 @@
+"""
+Minimal JavaScript tokenizer
+Good enough to tell code from strings, template literals, regular
+expressions and comments, which is all the build needs to split inline
+scripts into statements and to strip whitespace safely
+"""
+
+import re
+
+# Tokens after which a '/' starts a regular expression rather than a division
+REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+
+NAME_PATTERN = re.compile(r'[\w$\u0080-\uffff]+')
+NUMBER_PATTERN = re.compile(r'\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?')
+SPACE_PATTERN = re.compile(r'\s+')
+
+
+def tokenize(source):
+    """Return a list of (kind, text) tokens for source
+
+    kind is one of 'space', 'newline', 'comment', 'string', 'template',
+    'regex', 'name' (identifiers, keywords and numbers) or 'punct' (one
+    character each).
+    """
+    tokens, _ = _tokenize(source, 0, False)
+    return tokens
+
+
+def significant(tokens):
+    """Return tokens without whitespace and comments"""
+    return [token for token in tokens if token[0] not in ('space', 'newline', 'comment')]
+
+
+def _tokenize(source, index, in_template):
+    """Tokenize from index; inside a ${...} stop at its closing brace"""
+    tokens = []
+    depth = 0
+    length = len(source)
+    last = None
+    while index < length:
+        char = source[index]
+        if char.isspace():
+            end = SPACE_PATTERN.match(source, index).end()
+            text = source[index:end]
+            kind = 'newline' if '\n' in text else 'space'
+        elif source.startswith('//', index):
+            end = source.find('\n', index)
+            end = length if end == -1 else end
+            kind = 'comment'
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            end = length if end == -1 else end + 2
+            kind = 'comment'
+        elif char in '\'"':
+            end = _read_string(source, index)
+            kind = 'string'
+        elif char == '`':
+            end = _read_template(source, index)
+            kind = 'template'
+        elif char == '/' and _regex_allowed(last):
+            end = _read_regex(source, index)
+            kind = 'regex'
+        elif char.isdigit() or (char == '.' and index + 1 < length and source[index + 1].isdigit()):
+            end = NUMBER_PATTERN.match(source, index).end()
+            kind = 'name'
+        elif char.isalpha() or char in '_$' or ord(char) > 127:
+            end = NAME_PATTERN.match(source, index).end()
+            kind = 'name'
+        else:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if in_template and depth == 0:
+                    return tokens, index
+                depth -= 1
+            end = index + 1
+            kind = 'punct'
+        token = (kind, source[index:end])
+        tokens.append(token)
+        if kind not in ('space', 'newline', 'comment'):
+            last = token
+        index = end
+    return tokens, index
+
+
+def _read_string(source, index):
+    """Return the end of the quoted string starting at index"""
+    quote = source[index]
+    end = index + 1
+    length = len(source)
+    while end < length:
+        char = source[end]
+        if char == '\\':
+            end += 2
+            continue
+        if char == quote or char == '\n':
+            return end + 1
+        end += 1
+    return length
+
+
+def _read_template(source, index):
+    """Return the end of the template literal starting at index"""
+    end = index + 1
+    length = len(source)
+    while end < length:
+        char = source[end]
+        if char == '\\':
+            end += 2
+        elif char == '`':
+            return end + 1
+        elif source.startswith('${', end):
+            _, end = _tokenize(source, end + 2, True)
+            end += 1
+        else:
+            end += 1
+    return length
+
+
+def _read_regex(source, index):
+    """Return the end of the regular expression literal starting at index"""
+    end = index + 1
+    length = len(source)
+    in_class = False
+    while end < length:
+        char = source[end]
+        if char == '\\':
+            end += 2
+            continue
+        if char == '\n':
+            break
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            end += 1
+            break
+        end += 1
+    while end < length and (source[end].isalnum() or source[end] == '_'):
+        end += 1
+    return end
+
+
+def _regex_allowed(last):
+    """Decide whether a '/' after the last significant token starts a regex"""
+    if last is None:
+        return True
+    kind, text = last
+    if kind == 'name':
+        return text in REGEX_KEYWORDS
+    if kind == 'punct':
+        return text not in ')]}'
+    return False
+
+
+def split_statements(source):
+    """Split a script into top-level statements
+
+    Returns a list of (start, end) offsets. Statements end at a top-level
+    ';' or at a top-level '}' that closes a block and is followed by a new
+    statement (function declarations, if/else chains and so on).
+    """
+    tokens = tokenize(source)
+    spans = []
+    depth = 0
+    offset = 0
+    start = None
+    offsets = []
+    for kind, text in tokens:
+        offsets.append(offset)
+        offset += len(text)
+    offsets.append(offset)
+
+    for position, (kind, text) in enumerate(tokens):
+        if kind in ('space', 'newline', 'comment'):
+            continue
+        if start is None:
+            start = offsets[position]
+        if kind != 'punct':
+            continue
+        if text in '([{':
+            depth += 1
+        elif text in ')]}':
+            depth -= 1
+        if depth != 0:
+            continue
+        end = offsets[position + 1]
+        if text == ';' or (text == '}' and _ends_block(tokens, position + 1)):
+            spans.append((start, end))
+            start = None
+    if start is not None:
+        spans.append((start, offset))
+    return spans
+
+
+def _ends_block(tokens, position):
+    """Check whether the statement ends after a closing brace"""
+    for kind, text in tokens[position:]:
+        if kind in ('space', 'newline', 'comment'):
+            continue
+        if kind == 'name':
+            return text not in ('else', 'catch', 'finally', 'while')
+        return text not in '.,;([?:+-*/%=&|^<>'
+    return True
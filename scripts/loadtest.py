@@ -0,0 +1,283 @@
+"""
+Tracking service load test
+Sends tracking lookups to a local scripts/tracking_service.py instance at
+increasing concurrency and prints requests per second and p50/p99 latency
+for each level, so changes to the service can be measured
+
+Usage:
+    python3 -m scripts.loadtest                                  # 1, 8, 32 and 128 clients
+    python3 -m scripts.loadtest --concurrency 1 64 --requests 5000
+    python3 -m scripts.loadtest --url http://127.0.0.1:8300      # a running instance
+    python3 -m scripts.loadtest --output load.json               # save the results
+    python3 -m scripts.loadtest --compare load.json              # exit 1 on regressions
+
+Without --url a service is started on a free port in a separate process for
+the run. Each client keeps one connection open and sends its next request as
+soon as the previous answer arrives. The mix is mostly single shipment
+lookups with some batch lookups, unknown keys and bulk lookups, drawn from
+data/shipments.json with a fixed seed. Client and service share the
+machine, so compare runs made on the same machine only.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from scripts.search_index import SHIPMENTS_PATH, load_shipments
+from scripts.tracking_service import MAX_BULK_KEYS
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CONCURRENCY = (1, 8, 32, 128)
+
+# Requests sent at each concurrency level, after WARMUP requests at the first
+REQUESTS = 2000
+WARMUP = 200
+
+# Share of each kind of request in the mix; the rest are shipment lookups
+BATCH_SHARE = 0.1
+UNKNOWN_SHARE = 0.1
+BULK_SHARE = 0.05
+
+BULK_KEYS = 20
+
+# Distinct made-up tracking numbers the unknown lookups cycle through
+UNKNOWN_KEYS = 16
+
+SEED = 1
+
+# Fewer requests per second or a higher p99 than the compared run by more
+# than this fraction counts as a regression
+TOLERANCE = 0.15
+
+# Seconds to wait for a started service to listen
+START_TIMEOUT = 10
+
+LISTENING_PATTERN = re.compile(r'http://([^/:]+):(\d+)/')
+
+
+def request_mix(data, count, seed=SEED):
+    """Return count encoded requests drawn from the tracking data"""
+    rng = random.Random(seed)
+    # The service looks up shipments by the top-level list only; the
+    # shipments inside batches are answered through their batch
+    tracking = sorted({shipment['trackingNumber'] for shipment in data['shipments']})
+    unknown = [f"TRK-0000-{number:06d}" for number in range(UNKNOWN_KEYS)]
+    batches = [batch['batchId'] for batch in data['batches']]
+    requests = []
+    for _ in range(count):
+        draw = rng.random()
+        if draw < BULK_SHARE:
+            keys = [rng.choice(tracking) for _ in range(min(BULK_KEYS, MAX_BULK_KEYS))]
+            body = json.dumps({'keys': keys}).encode('utf-8')
+            requests.append(encode_request('POST', '/shipments/lookup', body))
+        elif draw < BULK_SHARE + UNKNOWN_SHARE:
+            requests.append(encode_request('GET', f"/shipments/{rng.choice(unknown)}"))
+        elif draw < BULK_SHARE + UNKNOWN_SHARE + BATCH_SHARE and batches:
+            requests.append(encode_request('GET', f"/batches/{quote(rng.choice(batches))}"))
+        else:
+            requests.append(encode_request('GET', f"/shipments/{quote(rng.choice(tracking))}"))
+    return requests
+
+
+def encode_request(method, path, body=b''):
+    """Return the bytes of a keep-alive request"""
+    head = f"{method} {path} HTTP/1.1\r\nHost: loadtest\r\nConnection: keep-alive\r\n"
+    if body:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return (head + '\r\n').encode('latin-1') + body
+
+
+async def read_response(reader):
+    """Read one response and return its status"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def run_level(host, port, requests, concurrency):
+    """Send every request over concurrency connections; return its result entry"""
+    pending = iter(requests)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for request in pending:
+                started = time.perf_counter()
+                writer.write(request)
+                status = await read_response(reader)
+                latencies.append(time.perf_counter() - started)
+                # Unknown keys are part of the mix, so 404 is an answer too
+                if status not in (200, 404):
+                    errors += 1
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 4),
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def percentile(values, rank):
+    """Return the nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, -(-len(values) * rank // 100) - 1))
+    return values[index]
+
+
+async def run_load_test(host, port, requests, levels, warmup=WARMUP):
+    """Run every concurrency level against the service; return the results"""
+    if warmup:
+        await run_level(host, port, requests[:warmup], levels[0])
+    results = []
+    for concurrency in levels:
+        result = await run_level(host, port, requests, concurrency)
+        results.append(result)
+        print(f"  {concurrency:>7} {result['requests']:>9} {result['requests_per_second']:>10,.1f} "
+              f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['errors']:>7}")
+    return results
+
+
+def start_service(root, cache_size=None):
+    """Start a tracking service on a free port; return (process, host, port)"""
+    command = [sys.executable, '-m', 'scripts.tracking_service', '--port', '0', '--root', str(root)]
+    if cache_size is not None:
+        command += ['--cache-size', str(cache_size)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        match = LISTENING_PATTERN.search(line)
+        if match:
+            return process, match.group(1), int(match.group(2))
+    process.kill()
+    raise RuntimeError(f"tracking service did not start:\n{process.stderr.read()}")
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Print the change against a baseline run and return the regressions"""
+    previous = {entry['concurrency']: entry for entry in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline.get('created', 'baseline')} (tolerance {tolerance:.0%}):")
+    for entry in results:
+        old = previous.get(entry['concurrency'])
+        if old is None:
+            continue
+        throughput = entry['requests_per_second'] / old['requests_per_second'] - 1
+        tail = entry['p99_ms'] / old['p99_ms'] - 1 if old['p99_ms'] else 0
+        flag = ''
+        if throughput < -tolerance or tail > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(entry)
+        print(f"  {entry['concurrency']:>7} clients: {old['requests_per_second']:>10,.1f} → "
+              f"{entry['requests_per_second']:>10,.1f} req/s ({throughput:+.1%}), p99 "
+              f"{old['p99_ms']:.3f} → {entry['p99_ms']:.3f} ms ({tail:+.1%}){flag}")
+    return regressions
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Load test the tracking lookup service')
+    parser.add_argument('--url', help='service to test (default: start one on a free port)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=list(CONCURRENCY), metavar='CLIENTS',
+                        help='concurrent clients for each level (default: 1 8 32 128)')
+    parser.add_argument('--requests', type=int, default=REQUESTS, metavar='N',
+                        help=f'requests sent at each level (default: {REQUESTS})')
+    parser.add_argument('--cache-size', type=int, metavar='N',
+                        help='--cache-size for the started service (default: its own)')
+    parser.add_argument('--root', default='.', help='site directory holding data/ (default: .)')
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare with an earlier --output file and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f'allowed change before a regression is reported (default: {TOLERANCE})')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = Path(args.root).resolve()
+    if not (root / SHIPMENTS_PATH).exists():
+        print(f"Error: {root / SHIPMENTS_PATH} not found")
+        return 1
+    requests = request_mix(load_shipments(root), args.requests)
+
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, host, port = start_service(root, args.cache_size)
+
+    print(f"Load testing the tracking service at http://{host}:{port}/...")
+    print("=" * 50)
+    print(f"  {'clients':>7} {'requests':>9} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    try:
+        results = asyncio.run(run_load_test(host, port, requests, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'requests': args.requests,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\nResults written to {args.output}")
+
+    if any(result['errors'] for result in results):
+        print("\nSome requests failed")
+        return 1
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Build manifest for incremental builds
+Stores content hashes of components and pages between runs so unchanged
+pages can be skipped and unchanged files are never rewritten
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_content(content):
+    """Return the SHA-256 hex digest of a string or bytes"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def empty_manifest():
+    """Return a fresh manifest with no recorded inputs"""
+    return {'version': MANIFEST_VERSION, 'components': {}, 'pages': {}}
+
+
+def load_manifest(path):
+    """Load the manifest at path, or an empty one if missing or outdated"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return empty_manifest()
+    manifest.setdefault('components', {})
+    manifest.setdefault('pages', {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """Atomically write the manifest to path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def stat_signature(path):
+    """Return the (size, mtime_ns) pair used to detect untouched files"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def write_if_changed(path, content):
+    """Write content (str or bytes) to path only if it differs from what is on disk"""
+    if isinstance(content, str):
+        read_mode, write_mode, encoding = 'r', 'w', 'utf-8'
+    else:
+        read_mode, write_mode, encoding = 'rb', 'wb', None
+    try:
+        with open(path, read_mode, encoding=encoding) as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, write_mode, encoding=encoding) as f:
+        f.write(content)
+    return True
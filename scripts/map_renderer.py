@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Data-driven coverage map renderer
+Renders every coverage map variant (whole country, per province, per
+service, per language) listed in data/map_variants.json from the district
+list in data/districts.csv
+
+Fonts, the darkened base map and the marker sprites are prepared once per
+run. Each variant stamps its markers into a single alpha layer that is
+composited onto the base in one pass, instead of drawing every glow ring
+and circle on the full-size image.
+
+Usage:
+    python3 scripts/map_renderer.py                  # render every variant
+    python3 scripts/map_renderer.py coverage-fr      # render selected variants
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+CONFIG_PATH = "data/map_variants.json"
+
+# Colors
+ACCENT = (255, 127, 31, 255)        # Orange
+ACCENT_GLOW = (255, 127, 31, 100)   # Semi-transparent orange
+MUTED = (140, 140, 155, 255)        # Districts without the mapped service
+MUTED_GLOW = (140, 140, 155, 60)
+WHITE = (255, 255, 255, 255)
+BACKDROP = (0, 0, 0, 200)
+OVERLAY = (15, 15, 35, 180)
+
+FONT_PATHS = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/System/Library/Fonts/SFNSDisplay.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+
+MARKER_RADIUS = 12
+CENTER_RADIUS = 3
+GLOW_RINGS = 3
+GLOW_STEP = 3
+
+CORNER_SIZE = 50
+CORNER_WIDTH = 4
+
+
+def load_config(path=CONFIG_PATH):
+    """Load the variant list and localized strings"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_districts(path):
+    """Load district positions (fractions of the map size) and their services"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    districts = []
+    for row in rows:
+        districts.append({
+            'name': row['district'],
+            'province': row['province'],
+            'x': float(row['x']),
+            'y': float(row['y']),
+            'services': {service for service in row['services'].split(';') if service},
+        })
+    return districts
+
+
+@lru_cache(maxsize=None)
+def load_fonts():
+    """Return (title font, label font), falling back to Pillow's default"""
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            return ImageFont.truetype(font_path, 16), ImageFont.truetype(font_path, 12)
+    default = ImageFont.load_default()
+    return default, default
+
+
+@lru_cache(maxsize=None)
+def load_base(path):
+    """Return the map darkened for contrast, with the corner accents drawn"""
+    img = Image.open(path).convert('RGBA')
+    base = Image.alpha_composite(img, Image.new('RGBA', img.size, OVERLAY))
+    draw = ImageDraw.Draw(base, 'RGBA')
+    width, height = base.size
+    for x, y, dx, dy in ((20, 20, 1, 1), (width - 20, 20, -1, 1),
+                         (20, height - 20, 1, -1), (width - 20, height - 20, -1, -1)):
+        draw.line([(x, y), (x + dx * CORNER_SIZE, y)], fill=ACCENT, width=CORNER_WIDTH)
+        draw.line([(x, y), (x, y + dy * CORNER_SIZE)], fill=ACCENT, width=CORNER_WIDTH)
+    return base
+
+
+@lru_cache(maxsize=None)
+def marker_sprite(color, glow):
+    """Draw one district marker (glow rings, circle, center dot) as a small sprite"""
+    half = MARKER_RADIUS + GLOW_RINGS * GLOW_STEP
+    sprite = Image.new('RGBA', (half * 2 + 1, half * 2 + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sprite, 'RGBA')
+
+    def circle(radius, **kwargs):
+        draw.ellipse([half - radius, half - radius, half + radius, half + radius], **kwargs)
+
+    for i in range(GLOW_RINGS, 0, -1):
+        circle(MARKER_RADIUS + i * GLOW_STEP, fill=(*color[:3], 20 - i * 4))
+    circle(MARKER_RADIUS, fill=glow, outline=color, width=2)
+    circle(CENTER_RADIUS, fill=color)
+    return sprite
+
+
+def variant_districts(variant, districts):
+    """Return (district, covered) pairs shown on a variant"""
+    shown = [d for d in districts if variant.get('province') in (None, d['province'])]
+    service = variant.get('service')
+    return [(d, service is None or service in d['services']) for d in shown]
+
+
+def variant_text(variant, strings, shown):
+    """Return the title, subtitle and stats lines of a variant"""
+    covered = sum(1 for _, is_covered in shown if is_covered)
+    values = {
+        'districts': len(shown),
+        'provinces': len({d['province'] for d, _ in shown}),
+        'covered': covered,
+        'coverage': round(100 * covered / len(shown)) if shown else 0,
+    }
+    if 'province' in variant:
+        key = 'province_'
+        values['province'] = strings['provinces'][variant['province']]
+    elif 'service' in variant:
+        key = 'service_'
+        values['service'] = strings['services'][variant['service']]
+    else:
+        key = ''
+    title = variant.get('title', strings[key + 'title']).format(**values)
+    subtitle = variant.get('subtitle', strings[key + 'subtitle']).format(**values)
+    stats = [line.format(**values) for line in strings['stats']]
+    return title, subtitle, stats
+
+
+def marker_layer(size, shown):
+    """Stamp every district marker into a single transparent layer"""
+    layer = Image.new('RGBA', size, (0, 0, 0, 0))
+    width, height = size
+    for district, covered in shown:
+        sprite = marker_sprite(ACCENT, ACCENT_GLOW) if covered else marker_sprite(MUTED, MUTED_GLOW)
+        half = sprite.width // 2
+        x = int(district['x'] * width) - half
+        y = int(district['y'] * height) - half
+        layer.alpha_composite(sprite, dest=(max(x, 0), max(y, 0)))
+    return layer
+
+
+def boxed_text(draw, position, text, font, fill, pad_x, pad_y):
+    """Draw centered text over a dark box for readability"""
+    bbox = draw.textbbox(position, text, font=font, anchor="mt")
+    draw.rectangle([bbox[0] - pad_x, bbox[1] - pad_y, bbox[2] + pad_x, bbox[3] + pad_y], fill=BACKDROP)
+    draw.text(position, text, fill=fill, font=font, anchor="mt")
+
+
+def render_variant(config, variant, districts):
+    """Render one map variant and return the image"""
+    strings = config['strings'][variant.get('lang', 'en')]
+    font, label_font = load_fonts()
+    base = load_base(config['base'])
+    width, height = base.size
+    shown = variant_districts(variant, districts)
+
+    enhanced = Image.alpha_composite(base, marker_layer(base.size, shown))
+    draw = ImageDraw.Draw(enhanced, 'RGBA')
+
+    # District names
+    for district, _ in shown:
+        x = int(district['x'] * width)
+        y = int(district['y'] * height)
+        boxed_text(draw, (x, y + MARKER_RADIUS + 3), district['name'], label_font, WHITE, 3, 3)
+
+    # Title and subtitle
+    title, subtitle, stats = variant_text(variant, strings, shown)
+    boxed_text(draw, (width // 2, 40), title, font, ACCENT, 20, 10)
+    boxed_text(draw, (width // 2, 70), subtitle, label_font, WHITE, 15, 8)
+
+    # Coverage stats box
+    stats_x = width - 200
+    stats_y = height - 150
+    draw.rectangle([stats_x - 20, stats_y - 20, stats_x + 180, stats_y + 100],
+                   fill=BACKDROP, outline=ACCENT, width=3)
+    for i, text in enumerate(stats):
+        draw.text((stats_x, stats_y + i * 35), text, fill=ACCENT, font=font)
+    return enhanced
+
+
+def save_png(image, output):
+    """Save a rendered map, creating its folder if needed"""
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    image.save(output, 'PNG', optimize=True)
+    return output
+
+
+def render_variants(config, names=None, jobs=None):
+    """Render the selected variants (all by default) and save them
+
+    Rendering is cheap; PNG encoding dominates and releases the GIL, so
+    images are encoded on a thread pool of `jobs` workers (one per CPU core
+    by default). Returns the list of output paths written.
+    """
+    districts = load_districts(config['districts'])
+    variants = config['variants']
+    if names:
+        unknown = set(names) - {variant['name'] for variant in variants}
+        if unknown:
+            raise ValueError(f"Unknown map variant(s): {', '.join(sorted(unknown))}")
+        variants = [variant for variant in variants if variant['name'] in names]
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = [
+            (variant, executor.submit(save_png, render_variant(config, variant, districts), variant['output']))
+            for variant in variants
+        ]
+        written = []
+        for variant, future in futures:
+            written.append(future.result())
+            print(f"  ✓ {variant['name']}: {variant['output']}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the coverage map variants.')
+    parser.add_argument('variants', nargs='*', help='Variant names to render (default: all)')
+    parser.add_argument('--config', default=CONFIG_PATH, help=f'Variant file (default: {CONFIG_PATH})')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='Images encoded in parallel (default: 0 = one per CPU core)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    print("Rendering coverage maps...")
+    try:
+        written = render_variants(load_config(args.config), args.variants, args.jobs)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    print(f"\n✅ Rendered {len(written)} map(s) in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Markdown renderer for article bodies
+Covers the subset the content files use, so the build needs no extra
+packages:
+
+    # Heading ... ###### Heading
+    paragraphs separated by blank lines
+    - unordered and 1. ordered list items
+    > blockquotes
+    **bold**, *italic*, `code` and [links](url)
+
+A block that starts with an HTML tag (<div class="highlight-box">, for
+example) is copied to the page as it is, up to the next blank line.
+"""
+
+import re
+from html import escape
+
+HEADING_PATTERN = re.compile(r'(#{1,6})\s+(.*?)\s*#*$')
+UNORDERED_PATTERN = re.compile(r'[-*+]\s+(.*)$')
+ORDERED_PATTERN = re.compile(r'\d+[.)]\s+(.*)$')
+HTML_BLOCK_PATTERN = re.compile(r'</?[A-Za-z][\w-]*[\s/>]')
+
+# Applied in order to escaped text; code spans and link URLs are taken out
+# first so they are never formatted
+INLINE_PATTERNS = (
+    (re.compile(r'\*\*(.+?)\*\*|__(.+?)__'), lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>"),
+    (re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\w)|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)'),
+     lambda m: f"<em>{m.group(1) or m.group(2)}</em>"),
+)
+CODE_PATTERN = re.compile(r'`([^`]+)`')
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+STASHED_PATTERN = re.compile(r'\0(\d+)\0')
+
+
+def render_link(text, url):
+    """Render a link; both parts are already escaped, except for quotes in the URL"""
+    url = url.replace('"', '&quot;')
+    return f'<a href="{url}">{text}</a>'
+
+
+def format_text(html):
+    """Apply the bold and italic patterns to escaped text"""
+    for pattern, replace in INLINE_PATTERNS:
+        html = pattern.sub(replace, html)
+    return html
+
+
+def render_inline(text):
+    """Render the inline formatting of one block of text"""
+    stashed = []
+
+    def stash(html):
+        stashed.append(html)
+        return f"\0{len(stashed) - 1}\0"
+
+    def restore(match):
+        return STASHED_PATTERN.sub(restore, stashed[int(match.group(1))])
+
+    html = CODE_PATTERN.sub(lambda m: stash(f"<code>{m.group(1)}</code>"), escape(text, quote=False))
+    html = LINK_PATTERN.sub(lambda m: stash(render_link(format_text(m.group(1)), m.group(2))), html)
+    return STASHED_PATTERN.sub(restore, format_text(html))
+
+
+def blocks(text):
+    """Split text into blocks of lines separated by blank lines"""
+    block = []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        if line.strip():
+            block.append(line.rstrip())
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def render_list(lines, pattern, tag):
+    """Render list items; lines that do not start an item continue the previous one"""
+    items = []
+    for line in lines:
+        match = pattern.match(line.strip())
+        if match or not items:
+            items.append(match.group(1) if match else line.strip())
+        else:
+            items[-1] += ' ' + line.strip()
+    body = '\n'.join(f"    <li>{render_inline(item)}</li>" for item in items)
+    return f"<{tag}>\n{body}\n</{tag}>"
+
+
+def render_block(lines):
+    """Render one block of lines"""
+    first = lines[0].strip()
+    if HTML_BLOCK_PATTERN.match(first):
+        return '\n'.join(lines)
+    heading = HEADING_PATTERN.match(first)
+    if heading:
+        level = len(heading.group(1))
+        html = f"<h{level}>{render_inline(heading.group(2))}</h{level}>"
+        # Text straight under the heading is a block of its own
+        return f"{html}\n\n{render_block(lines[1:])}" if len(lines) > 1 else html
+    if all(line.lstrip().startswith('>') for line in lines):
+        text = ' '.join(line.lstrip()[1:].strip() for line in lines)
+        return f"<blockquote>{render_inline(text)}</blockquote>"
+    if UNORDERED_PATTERN.match(first):
+        return render_list(lines, UNORDERED_PATTERN, 'ul')
+    if ORDERED_PATTERN.match(first):
+        return render_list(lines, ORDERED_PATTERN, 'ol')
+    return f"<p>{render_inline(' '.join(line.strip() for line in lines))}</p>"
+
+
+def render_markdown(text):
+    """Render Markdown text to HTML"""
+    return '\n\n'.join(render_block(lines) for lines in blocks(text))
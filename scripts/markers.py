@@ -0,0 +1,142 @@
+"""
+Component marker splicer
+Finds every static component region, placeholder and component loader in a
+page with one linear scan, then splices component HTML in with a single join
+
+Regions look like:
+
+    <!-- Static Header Start -->
+    ...
+    <!-- Static Header End -->
+
+Any name works, so <!-- Static Banner Start --> is filled from the "banner"
+component. Placeholders (<div id="banner-placeholder"></div>) are replaced
+by a full static region, and the old JavaScript component loader is removed.
+
+Generated regions (<!-- Generated Routes Start --> ... End) are filled by
+the build from data/ instead of from components/ and are never touched by
+the component splicer.
+"""
+
+import re
+from collections import namedtuple
+
+# Every alternative starts with '<' so the scan can jump between tags
+TOKEN_PATTERN = re.compile(
+    r'<(?:!-- (?:Static (?P<marker>[A-Za-z][\w-]*) (?P<edge>Start|End) -->'
+    r'|Component Loader -->.*?<script src="/js/components-loader\.js[^"]*"></script>)'
+    r'|div id="(?P<placeholder>[\w-]+)-placeholder">\s*</div>)',
+    re.DOTALL
+)
+
+# A label comment right before a placeholder (<!-- Navigation -->) goes with it
+LABEL_PATTERN = re.compile(r'<!-- [\w ]+ -->\s*$')
+
+# A generated region, with the indentation of its Start marker
+GENERATED_PATTERN = re.compile(
+    r'(?P<indent>[ \t]*)<!-- Generated (?P<marker>[A-Za-z][\w-]*) Start -->.*?<!-- Generated (?P=marker) End -->',
+    re.DOTALL
+)
+
+# kind is 'static', 'placeholder' or 'loader'; start/end are offsets in the page
+Region = namedtuple('Region', ['kind', 'name', 'start', 'end'])
+
+
+def slot_name(marker):
+    """Return the component slot for a marker name (Header -> header)"""
+    return marker.lower()
+
+
+def marker_name(slot):
+    """Return the marker name for a component slot (cta-banner -> Cta-Banner)"""
+    return '-'.join(part.capitalize() for part in slot.split('-'))
+
+
+def indent_html(html, prefix='    '):
+    """Indent every non-empty line of a component"""
+    return '\n'.join(prefix + line if line else '' for line in html.split('\n'))
+
+
+def render_region(slot, html):
+    """Return a complete static region for a slot"""
+    marker = marker_name(slot)
+    return f'<!-- Static {marker} Start -->\n{html}\n    <!-- Static {marker} End -->'
+
+
+def scan_regions(content):
+    """Find all component regions in a single pass over the page"""
+    regions = []
+    open_slot = None
+    open_start = None
+    for match in TOKEN_PATTERN.finditer(content):
+        marker = match.group('marker')
+        if open_slot is not None:
+            # Anything inside a static region is replaced along with it
+            if marker is not None and match.group('edge') == 'End' and slot_name(marker) == open_slot:
+                regions.append(Region('static', open_slot, open_start, match.end()))
+                open_slot = None
+            continue
+        if marker is not None:
+            if match.group('edge') == 'Start':
+                open_slot, open_start = slot_name(marker), match.start()
+            continue
+        placeholder = match.group('placeholder')
+        if placeholder is not None:
+            start = match.start()
+            floor = regions[-1].end if regions else 0
+            label = LABEL_PATTERN.search(content, max(floor, start - 120), start)
+            if label:
+                start = label.start()
+            regions.append(Region('placeholder', slot_name(placeholder), start, match.end()))
+        else:
+            regions.append(Region('loader', None, match.start(), match.end()))
+    return regions
+
+
+def splice(content, components, regions=None):
+    """Splice components into their regions
+
+    components maps slot names to ready-to-insert (already indented) HTML.
+    Returns the new content and the list of regions that were rewritten.
+    Regions whose component is unknown are left untouched.
+    """
+    if regions is None:
+        regions = scan_regions(content)
+
+    pieces = []
+    spliced = []
+    position = 0
+    for region in regions:
+        if region.kind == 'loader':
+            replacement = ''
+        elif components.get(region.name) is not None:
+            replacement = render_region(region.name, components[region.name])
+        else:
+            continue
+        pieces.append(content[position:region.start])
+        pieces.append(replacement)
+        position = region.end
+        spliced.append(region)
+    pieces.append(content[position:])
+    return ''.join(pieces), spliced
+
+
+def splice_generated(content, blocks):
+    """Replace the body of generated regions
+
+    blocks maps slot names ('routes' for <!-- Generated Routes Start -->) to
+    ready-to-insert HTML. Returns the new content and the sorted list of
+    slots that were filled.
+    """
+    found = set()
+
+    def replace(match):
+        slot = slot_name(match.group('marker'))
+        if blocks.get(slot) is None:
+            return match.group(0)
+        found.add(slot)
+        indent, marker = match.group('indent', 'marker')
+        return (f"{indent}<!-- Generated {marker} Start -->\n{blocks[slot]}\n"
+                f"{indent}<!-- Generated {marker} End -->")
+
+    return GENERATED_PATTERN.sub(replace, content), sorted(found)
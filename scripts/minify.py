@@ -0,0 +1,188 @@
+"""
+HTML/CSS/JS minification
+Conservative minifiers that only remove comments and whitespace; they never
+rename or reorder anything, so the output behaves exactly like the source
+"""
+
+import re
+
+from scripts.css import scan as scan_css
+from scripts.jslex import tokenize
+
+RAW_PATTERN = re.compile(
+    r'(<(script|style|pre|textarea)\b([^>]*)>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE
+)
+COMMENT_PATTERN = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+
+# Whitespace next to these tags never renders, so it can be dropped
+BLOCK_TAGS = (
+    'html|head|body|title|meta|link|script|style|noscript|header|footer|main|nav|'
+    'section|article|aside|div|p|h[1-6]|ul|ol|li|dl|dt|dd|form|fieldset|legend|'
+    'table|thead|tbody|tfoot|tr|th|td|option|optgroup|br|hr|figure|figcaption|source|'
+    'path|g|circle|rect|line|polyline|polygon|symbol|use|defs|!doctype'
+)
+BLOCK_TAG_NAMES = re.compile(rf'(?:{BLOCK_TAGS})$', re.IGNORECASE)
+TAG_GAP = re.compile(r'(<(/?)([a-zA-Z!][\w-]*)[^<>]*>)\s+(?=<(/?)([a-zA-Z!][\w-]*))')
+
+# Characters around which CSS never needs whitespace
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+# A newline can be dropped after these without changing automatic semicolon insertion
+JS_OPENERS = set('{([,;:=&|?!*%<>^~')
+JS_CLOSERS = set('})],;.?:=&|*%<>^')
+
+TEXT_TYPES = (None, '', 'text/javascript', 'module', 'application/javascript')
+
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a style sheet"""
+    pieces = []
+    position = 0
+    for start, end, kind in scan_css(css):
+        pieces.append(_minify_css_code(css[position:start]))
+        if kind == 'string':
+            pieces.append(css[start:end])
+        position = end
+    pieces.append(_minify_css_code(css[position:]))
+    return ''.join(pieces).strip()
+
+
+def _minify_css_code(code):
+    """Minify a stretch of CSS that holds no strings or comments"""
+    code = WHITESPACE.sub(' ', code)
+    code = CSS_PUNCTUATION.sub(r'\1', code)
+    code = re.sub(r':\s+', ':', code)
+    return code.replace(';}', '}')
+
+
+def minify_js(js):
+    """Strip comments and insignificant whitespace from a script
+
+    Line breaks are kept wherever automatic semicolon insertion could depend
+    on them, and a space is kept wherever two tokens would otherwise merge.
+    """
+    tokens = tokenize(js)
+    out = []
+    pending = None  # whitespace waiting to be emitted: ' ' or '\n'
+    previous = None
+    for kind, text in tokens:
+        if kind in ('space', 'newline', 'comment'):
+            is_break = kind == 'newline' or (kind == 'comment' and ('\n' in text or text.startswith('//')))
+            if is_break:
+                pending = '\n'
+            elif pending is None:
+                pending = ' '
+            continue
+        if pending and previous is not None:
+            separator = _js_separator(previous, (kind, text), pending)
+            if separator:
+                out.append(separator)
+        pending = None
+        out.append(text)
+        previous = (kind, text)
+    return ''.join(out).strip()
+
+
+def _js_separator(previous, current, pending):
+    """Return the whitespace needed between two tokens, if any"""
+    prev_kind, prev_text = previous
+    kind, text = current
+    if pending == '\n':
+        if prev_kind == 'punct' and prev_text in JS_OPENERS:
+            return ''
+        if kind == 'punct' and text in JS_CLOSERS:
+            return ''
+        return '\n'
+    if _is_word(prev_kind, prev_text[-1]) and _is_word(kind, text[0]):
+        return ' '
+    if prev_kind == 'punct' and kind == 'punct' and prev_text + text in ('++', '--', '+-', '-+'):
+        return ' '
+    if prev_text[-1] == '/' and text[0] in '/*':
+        return ' '
+    if prev_kind == 'regex' and _is_word(kind, text[0]):
+        return ' '
+    return ''
+
+
+def _is_word(kind, char):
+    """Check whether a token edge would merge with a neighbouring word"""
+    return kind == 'name' and (char.isalnum() or char in '_$' or ord(char) > 127)
+
+
+def minify_html(html):
+    """Minify a page, including its inline <style> and <script> blocks"""
+    pieces = []
+    position = 0
+    after_block = False
+    for match in RAW_PATTERN.finditer(html):
+        open_tag, tag, attrs, body, close_tag = match.group(1, 2, 3, 4, 5)
+        tag = tag.lower()
+        is_block = tag in ('script', 'style')
+        pieces.append(_minify_gap(html[position:match.start()], after_block, is_block))
+        if tag == 'style':
+            body = minify_css(body)
+        elif tag == 'script' and 'src=' not in attrs and _script_type(attrs) in TEXT_TYPES:
+            body = minify_js(body)
+        elif tag == 'script':
+            body = body.strip()
+        pieces.append(_minify_markup(open_tag) + body + close_tag)
+        position = match.end()
+        after_block = is_block
+    pieces.append(_minify_gap(html[position:], after_block, False))
+    return ''.join(pieces).strip() + '\n'
+
+
+def _minify_gap(markup, after_block, before_block):
+    """Minify markup between raw text elements, trimming next to scripts and styles"""
+    markup = _minify_markup(markup)
+    if after_block:
+        markup = markup.lstrip()
+    if before_block:
+        markup = markup.rstrip()
+    return markup
+
+
+def _script_type(attrs):
+    """Return the type attribute of a script tag, or None"""
+    match = re.search(r'type=["\']?([^"\'\s>]+)', attrs)
+    return match.group(1).lower() if match else None
+
+
+def _minify_markup(markup):
+    """Minify markup that holds no raw text elements"""
+    markup = COMMENT_PATTERN.sub('', markup)
+    markup = WHITESPACE.sub(' ', markup)
+    return TAG_GAP.sub(_tag_gap, markup)
+
+
+def _tag_gap(match):
+    """Drop whitespace between two tags when either one is block-level"""
+    if BLOCK_TAG_NAMES.match(match.group(3)) or BLOCK_TAG_NAMES.match(match.group(5)):
+        return match.group(1)
+    return match.group(0)
+
+
+def minify_stage(site):
+    """Minify every page and generated CSS/JS file"""
+    print("Minifying HTML, CSS and JS...")
+    report = {}
+    for name in sorted(site.pages):
+        before = len(site.pages[name].encode('utf-8'))
+        site.pages[name] = minify_html(site.pages[name])
+        report[name] = {'before': before, 'after': len(site.pages[name].encode('utf-8'))}
+
+    minifiers = {'.css': minify_css, '.js': minify_js}
+    for name in sorted(site.files):
+        content = site.files[name]
+        minifier = minifiers.get(name[name.rfind('.'):])
+        if minifier is None or not isinstance(content, str):
+            continue
+        before = len(content.encode('utf-8'))
+        site.files[name] = minifier(content) + '\n'
+        report[name] = {'before': before, 'after': len(site.files[name].encode('utf-8'))}
+
+    for name, sizes in report.items():
+        saved = sizes['before'] - sizes['after']
+        print(f"  ✓ {name}: {sizes['before']:,} → {sizes['after']:,} bytes (-{saved:,})")
+    site.report['minify'] = report
@@ -0,0 +1,66 @@
+"""
+Parallel page processing
+Runs a per-page function over many pages, optionally spread across a process
+pool, and yields the results in input order with each page's printed output
+captured so the combined log stays deterministic
+"""
+
+import contextlib
+import io
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from scripts.profiling import measure_call
+
+# value is whatever the page function returned; error is None on success;
+# stats holds the page's measurements when profiling, None otherwise
+PageResult = namedtuple('PageResult', ['path', 'value', 'output', 'error', 'stats'], defaults=(None,))
+
+
+def resolve_jobs(jobs):
+    """Turn a --jobs value into a worker count (0 means one per CPU core)"""
+    if jobs is None or jobs < 0:
+        return 1
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def run_page(func, path, args, profile=False):
+    """Call func(path, *args), capturing its output and any error"""
+    buffer = io.StringIO()
+    value = None
+    error = None
+    stats = None
+    with contextlib.redirect_stdout(buffer):
+        try:
+            if profile:
+                value, stats = measure_call(func, path, *args)
+            else:
+                value = func(path, *args)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+    return PageResult(path, value, buffer.getvalue(), error, stats)
+
+
+def map_pages(func, paths, args=(), jobs=1, args_for=None, profile=False):
+    """Yield a PageResult for every path, in the same order as paths
+
+    func is called as func(path, *args), or func(path, *args_for(path)) when
+    per-page arguments are needed. It must be a module-level function so it
+    can be sent to worker processes. With jobs <= 1 pages are processed in
+    this process. With profile, each result carries the page's stats.
+    """
+    paths = list(paths)
+    page_args = [args_for(path) for path in paths] if args_for else repeat(args)
+    jobs = min(resolve_jobs(jobs), len(paths))
+    if jobs <= 1:
+        for path, call_args in zip(paths, page_args):
+            yield run_page(func, path, call_args, profile)
+        return
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(run_page, repeat(func), paths, page_args, repeat(profile), chunksize=chunksize)
@@ -0,0 +1,182 @@
+"""
+Build profiling
+Measures wall time, bytes read and written and peak memory for every build
+stage and every page, and writes them as a JSON report (--profile)
+
+Byte counts come from the kernel's per-process I/O counters (/proc/self/io)
+so they cover everything a stage reads or writes; they are null where those
+counters do not exist. Peak memory is the largest Python heap tracemalloc
+saw, which slows the build down: compare timings between profiled runs only.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+IO_COUNTERS = '/proc/self/io'
+
+# Measurements in progress in this process, outermost first
+_active = []
+
+
+def io_counters():
+    """Return (bytes read, bytes written) by this process so far, or (None, None)"""
+    try:
+        with open(IO_COUNTERS, 'r', encoding='ascii') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None, None
+    return int(fields['rchar']), int(fields['wchar'])
+
+
+def max_rss():
+    """Return the peak resident set size of this process or its children, in bytes"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+class Measurement:
+    """Wall time, I/O and peak Python memory of one block of work"""
+
+    def __init__(self):
+        self.stats = None
+        self.peak = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # Resetting the peak would hide it from enclosing measurements, so
+        # hand it to them first
+        current_peak = tracemalloc.get_traced_memory()[1]
+        for outer in _active:
+            outer.peak = max(outer.peak, current_peak)
+        tracemalloc.reset_peak()
+        self.read, self.written = io_counters()
+        self.started = time.perf_counter()
+        _active.append(self)
+
+    def stop(self):
+        """Finish the measurement and return its stats"""
+        seconds = time.perf_counter() - self.started
+        read, written = io_counters()
+        _active.remove(self)
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        for outer in _active:
+            outer.peak = max(outer.peak, self.peak)
+        self.stats = {
+            'seconds': round(seconds, 6),
+            'bytes_read': None if read is None else read - self.read,
+            'bytes_written': None if written is None else written - self.written,
+            'peak_memory': self.peak,
+        }
+        return self.stats
+
+
+@contextmanager
+def measure():
+    """Measure the enclosed block; stats are on the yielded Measurement afterwards"""
+    measurement = Measurement()
+    try:
+        yield measurement
+    finally:
+        measurement.stop()
+
+
+def measure_call(func, *args):
+    """Call func(*args) and return (value, stats)
+
+    stats also holds the pid, so pages measured in worker processes (whose
+    I/O the parent's own counters do not see) can be told apart.
+    """
+    with measure() as measurement:
+        value = func(*args)
+    return value, dict(measurement.stats, pid=os.getpid())
+
+
+class Profiler:
+    """Collects stage and page measurements for one run of a build script"""
+
+    def __init__(self, command, enabled=True):
+        self.command = command
+        self.enabled = enabled
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure a build stage; yields the stage entry pages are added to"""
+        if not self.enabled:
+            yield None
+            return
+        entry = {'name': name, 'pages': [], '_workers': []}
+        with measure() as measurement:
+            yield entry
+        entry.update(measurement.stats)
+        # Work done in worker processes is not in this process's counters
+        for stats in entry.pop('_workers'):
+            for key in ('bytes_read', 'bytes_written'):
+                if entry[key] is not None and stats[key] is not None:
+                    entry[key] += stats[key]
+            entry['peak_memory'] = max(entry['peak_memory'], stats['peak_memory'])
+        self.stages.append(entry)
+
+    def add_page(self, stage, name, stats):
+        """Record the stats measured by measure_call() for one page of a stage"""
+        if stage is None or stats is None:
+            return
+        stats = dict(stats)
+        pid = stats.pop('pid')
+        stage['pages'].append({'name': name, **stats})
+        if pid != os.getpid():
+            stage['_workers'].append(stats)
+
+    def report(self):
+        """Return the profile as a JSON-serializable dict"""
+        totals = {'seconds': round(time.perf_counter() - self.started, 6)}
+        for key in ('bytes_read', 'bytes_written'):
+            values = [stage[key] for stage in self.stages]
+            totals[key] = None if None in values else sum(values)
+        totals['peak_memory'] = max((stage['peak_memory'] for stage in self.stages), default=0)
+        totals['max_rss'] = max_rss()
+        return {
+            'command': self.command,
+            'argv': sys.argv[1:],
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'totals': totals,
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        """Write the report to path and print a per-stage summary"""
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+        print(f"Profile ({path}):")
+        print(f"  {'stage':<16} {'seconds':>9} {'read':>12} {'written':>12} {'peak memory':>12}")
+        for stage in self.stages + [dict(report['totals'], name='total')]:
+            print(f"  {stage['name']:<16} {stage['seconds']:>9.3f} {format_bytes(stage['bytes_read']):>12} "
+                  f"{format_bytes(stage['bytes_written']):>12} {format_bytes(stage['peak_memory']):>12}")
+        return report
+
+
+def format_bytes(count):
+    """Format a byte count for the summary table"""
+    if count is None:
+        return 'n/a'
+    for unit in ('B', 'KB', 'MB'):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
@@ -0,0 +1,231 @@
+"""
+Published files and page weight budgets
+publish_stage drops every file no page can reach, so dist/ holds only what
+the site serves; budget_stage adds up what each page makes the browser
+download and fails the build when a page is over its budget in
+data/publish.json
+
+A file is reachable when a page, or a file a page reaches, mentions its path
+in a quoted string, an attribute or a url(). Files that scripts only reach
+through paths built at runtime are listed under "runtime" and followed from
+there (assets/search/index.json lists every search shard).
+
+Page weight counts the page itself and every style sheet, script, image,
+icon sprite and preload it loads, at its compressed transfer size: .br if
+there is one, then .gz, then the file itself. A <picture> counts as the
+largest candidate of its first <source>, the worst case for a browser that
+supports that format.
+"""
+
+import json
+import posixpath
+import re
+from pathlib import Path
+
+from scripts.compress import as_bytes
+from scripts.images import parse_attrs
+
+CONFIG_PATH = Path('data/publish.json')
+
+REPORT_PATH = 'page-weight.json'
+
+TEXT_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.webmanifest', '.xml', '.txt'}
+
+# Weight categories, in report order
+CATEGORIES = ('html', 'css', 'js', 'images', 'other')
+
+EXTENSION_CATEGORIES = {
+    '.css': 'css', '.js': 'js',
+    '.png': 'images', '.jpg': 'images', '.jpeg': 'images', '.webp': 'images',
+    '.avif': 'images', '.gif': 'images', '.svg': 'images', '.ico': 'images',
+}
+
+STRING_PATTERN = re.compile(r'"([^"<>\n]*)"|\'([^\'<>\n]*)\'|url\(\s*([^)"\'\s]+)\s*\)')
+PICTURE_PATTERN = re.compile(r'<picture\b.*?</picture>', re.DOTALL | re.IGNORECASE)
+SOURCE_PATTERN = re.compile(r'<source\b[^>]*>', re.IGNORECASE)
+RESOURCE_PATTERN = re.compile(r'<(?P<tag>link|script|img|use|image)\b[^>]*>', re.IGNORECASE)
+STYLE_PATTERN = re.compile(r'<style\b[^>]*>(.*?)</style>', re.DOTALL)
+INLINE_SCRIPT_PATTERN = re.compile(r'<script\b(?![^>]*\bsrc=)[^>]*>(.*?)</script>', re.DOTALL)
+
+# <link rel> values that make the browser download the target
+LOADING_RELS = {'stylesheet', 'preload', 'modulepreload', 'icon', 'apple-touch-icon', 'manifest'}
+
+
+def load_config(root='.'):
+    """Return the {"runtime": [...], "budgets": {...}} configuration"""
+    path = Path(root) / CONFIG_PATH
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve(base, reference, outputs):
+    """Return the output path a reference from a file in base points at, or None"""
+    reference = reference.split('#', 1)[0].split('?', 1)[0].strip()
+    if not reference or reference.startswith(('data:', '//')) or ':' in reference.split('/', 1)[0]:
+        return None
+    if reference.startswith('/'):
+        path = reference.lstrip('/')
+    else:
+        path = posixpath.normpath(posixpath.join(base, reference))
+    return path if path in outputs else None
+
+
+def references(name, text, outputs):
+    """Return the output paths a text file mentions
+
+    Each string is tried relative to the file and to the site root, and
+    srcset-style lists are split into their URLs.
+    """
+    base = posixpath.dirname(name)
+    found = set()
+    for match in STRING_PATTERN.finditer(text):
+        value = next(group for group in match.groups() if group is not None)
+        for candidate in value.split(','):
+            words = candidate.split()
+            if not words:
+                continue
+            for directory in (base, ''):
+                path = resolve(directory, words[0], outputs)
+                if path is not None:
+                    found.add(path)
+    return found
+
+
+def reachable(site, runtime=()):
+    """Return every output path reachable from the pages and runtime entry points"""
+    outputs = site.outputs()
+    pending = list(site.pages) + [path for path in runtime if path in outputs]
+    seen = set(pending)
+    while pending:
+        name = pending.pop()
+        if Path(name).suffix not in TEXT_EXTENSIONS:
+            continue
+        text = as_bytes(outputs[name]).decode('utf-8', errors='replace')
+        for path in references(name, text, outputs) - seen:
+            seen.add(path)
+            pending.append(path)
+    return seen
+
+
+def publish_stage(site):
+    """Remove the files no page can reach from the output"""
+    print("Selecting published files...")
+    runtime = load_config(site.root).get('runtime', [])
+    keep = reachable(site, runtime)
+    dropped = {}
+    for files in (site.assets, site.files):
+        for name in sorted(files):
+            if name not in keep:
+                dropped[name] = len(as_bytes(files.pop(name)))
+    for name, size in dropped.items():
+        print(f"  ✓ dropped {name} ({size:,} bytes, not reachable from any page)")
+    print(f"  ✓ publishing {len(site.outputs())} files, {len(dropped)} unreachable files left out")
+    site.report['publish'] = {'dropped': dropped}
+
+
+def largest_candidate(srcset):
+    """Return the URL of the widest candidate of a srcset"""
+    best, best_width = None, -1
+    for candidate in srcset.split(','):
+        words = candidate.split()
+        if not words:
+            continue
+        descriptor = words[1] if len(words) > 1 else '1x'
+        try:
+            width = float(descriptor[:-1])
+        except ValueError:
+            width = 0
+        if width > best_width:
+            best, best_width = words[0], width
+    return best
+
+
+def page_resources(html):
+    """Return the URLs a page makes the browser download as it loads"""
+    urls = []
+    for picture in PICTURE_PATTERN.finditer(html):
+        sources = SOURCE_PATTERN.findall(picture.group(0))
+        if sources and parse_attrs(sources[0]).get('srcset'):
+            urls.append(largest_candidate(parse_attrs(sources[0])['srcset']))
+    html = PICTURE_PATTERN.sub('', html)
+    for match in RESOURCE_PATTERN.finditer(html):
+        tag = match.group('tag').lower()
+        attrs = parse_attrs(match.group(0))
+        if tag == 'link':
+            if set((attrs.get('rel') or '').split()) & LOADING_RELS:
+                urls.append(largest_candidate(attrs['imagesrcset']) if attrs.get('imagesrcset') else attrs.get('href'))
+        elif tag == 'img' and attrs.get('srcset'):
+            urls.append(largest_candidate(attrs['srcset']))
+        else:
+            urls.append(attrs.get('src') or attrs.get('href') or attrs.get('xlink:href'))
+    return [url for url in urls if url]
+
+
+def transfer_size(outputs, name):
+    """Return the bytes sent for a file: its .br, .gz or plain size"""
+    for suffix in ('.br', '.gz', ''):
+        if name + suffix in outputs:
+            return len(as_bytes(outputs[name + suffix]))
+    return 0
+
+
+def page_weight(site, name, outputs):
+    """Return the transfer bytes of a page and its subresources, by category"""
+    html = site.pages[name]
+    weight = dict.fromkeys(CATEGORIES, 0)
+    weight['html'] = transfer_size(outputs, name)
+    counted = set()
+    for url in page_resources(html):
+        path = resolve('', url, outputs)
+        if path is None or path in counted:
+            continue
+        counted.add(path)
+        weight[EXTENSION_CATEGORIES.get(Path(path).suffix, 'other')] += transfer_size(outputs, path)
+    weight['total'] = sum(weight.values())
+    weight['inline_css'] = sum(len(css.encode('utf-8')) for css in STYLE_PATTERN.findall(html))
+    weight['inline_js'] = sum(len(js.encode('utf-8')) for js in INLINE_SCRIPT_PATTERN.findall(html))
+    return weight
+
+
+def over_budget(weight, budget):
+    """Return the (category, bytes, limit) a page is over its budget on"""
+    over = []
+    for key, limit_kb in budget.items():
+        category = key[:-len('_kb')]
+        limit = limit_kb * 1024
+        if weight.get(category, 0) > limit:
+            over.append((category, weight[category], limit))
+    return over
+
+
+def budget_stage(site):
+    """Report each page's transfer weight and check it against its budget
+
+    Pages over budget are listed in site.report['budget']['failed'], which
+    makes build.py exit with an error once the site is written.
+    """
+    print("Checking page weight budgets...")
+    budgets = load_config(site.root).get('budgets', {})
+    if not budgets:
+        print(f"  Note: no budgets in {CONFIG_PATH}, reporting page weight only")
+    outputs = site.outputs()
+
+    report = {}
+    failed = {}
+    width = max((len(name) for name in site.pages), default=0)
+    print(f"  {'page':<{width}}  " + '  '.join(f"{key:>8}" for key in CATEGORIES + ('total',)))
+    for name in sorted(site.pages):
+        weight = page_weight(site, name, outputs)
+        budget = {**budgets.get('*', {}), **budgets.get(name, {})}
+        report[name] = {'weight': weight, 'budget': budget}
+        print(f"  {name:<{width}}  " + '  '.join(f"{weight[key]:>8,}" for key in CATEGORIES + ('total',)))
+        for category, size, limit in over_budget(weight, budget):
+            failed.setdefault(name, []).append(category)
+            print(f"  ✗ {name}: {category} is {size:,} bytes, over its budget of {limit:,}")
+    if budgets and not failed:
+        print("  ✓ every page is within its budget")
+
+    site.report['budget'] = {'pages': report, 'failed': failed}
+    site.add_report(REPORT_PATH, json.dumps(report, indent=2) + '\n')
@@ -0,0 +1,283 @@
+"""
+Unused CSS purge and critical CSS
+purge_stage drops the style rules that match nothing on a page; critical_stage
+inlines the part of a linked style sheet that the top of the page needs and
+loads the rest without blocking rendering
+
+A selector is kept when it matches the page's DOM, or when it names
+something the page's scripts may add at runtime: any word in the page's
+scripts or a name in data/css_safelist.json. Class names the scripts build
+from data ('status-badge ${shipment.status}') never appear literally, so
+they have to be safelisted.
+"""
+
+import fnmatch
+import json
+import re
+from pathlib import Path
+from textwrap import dedent, indent
+
+from scripts.bundle import SCRIPT_PATTERN, STYLE_PATTERN, fingerprint
+from scripts.css import dedent_rule, parse_rules, selectors
+from scripts.dom import selector_names
+from scripts.minify import minify_css
+
+SAFELIST_PATH = Path('data/css_safelist.json')
+
+# At-rules whose body is a list of style rules
+GROUPING_RULES = ('@media', '@supports')
+
+# Elements counted as above the fold: enough for the header and the hero
+# or page title section that follows it
+ABOVE_FOLD_ELEMENTS = 100
+
+# Inline style blocks are only moved out when this much of them is below the fold
+MIN_DEFERRED_BYTES = 4096
+
+# Elements that are never rendered, so never above the fold
+HIDDEN_TAGS = {'script', 'style', 'template', 'noscript', 'link', 'meta'}
+
+SCRIPT_SRC_PATTERN = re.compile(r'<script\b[^>]*\bsrc="(?!https?:|//)([^"]+)"')
+STYLESHEET_PATTERN = re.compile(r'<link rel="stylesheet" href="(?!https?:|//)([^"]+)">')
+KEYFRAMES_PATTERN = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)')
+WORD_PATTERN = re.compile(r'[A-Za-z_][\w-]*')
+
+
+def load_safelist(root='.'):
+    """Return {page or '*': [name patterns]} from data/css_safelist.json"""
+    path = Path(root) / SAFELIST_PATH
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def script_words(site, html):
+    """Return every word in a page's inline scripts and local script files"""
+    texts = [match.group('body') for match in SCRIPT_PATTERN.finditer(html)]
+    for src in SCRIPT_SRC_PATTERN.findall(html):
+        content = site.files.get(src)
+        if content is None and src in site.assets:
+            content = site.assets[src].read_text(encoding='utf-8')
+        if isinstance(content, str):
+            texts.append(content)
+    return set(WORD_PATTERN.findall('\n'.join(texts)))
+
+
+class Usage:
+    """Decides which selectors a page can use"""
+
+    def __init__(self, document, runtime_names, patterns):
+        self.document = document
+        self.present = set(document.by_tag) | set(document.by_id) | set(document.by_class)
+        self.runtime = runtime_names
+        self.patterns = patterns
+
+    def is_runtime(self, name):
+        """Check whether scripts may add the name after the page loads"""
+        return name in self.runtime or any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def uses(self, selector):
+        """Check whether a selector can match something on the page"""
+        names = selector_names(selector)
+        if names is None or self.document.select(selector):
+            return True
+        runtime = {name for name in names if self.is_runtime(name)}
+        return bool(runtime) and names <= self.present | runtime
+
+
+def purge_rules(css, keep):
+    """Return the rules of css with every selector keep() rejects removed
+
+    keep is called with each selector. Grouping rules left empty are
+    dropped; other at-rules are kept as they are.
+    """
+    kept = []
+    for rule in parse_rules(css):
+        if rule.body is None:
+            kept.append(rule.text)
+        elif rule.prelude.startswith(GROUPING_RULES):
+            inner = purge_rules(rule.body, keep)
+            if inner:
+                kept.append(f"{rule.prelude} {{\n{indent(inner, '    ')}\n}}")
+        elif rule.prelude.startswith('@'):
+            kept.append(dedent_rule(rule.text))
+        else:
+            targets = selectors(rule.prelude)
+            used = [selector for selector in targets if keep(selector)]
+            if len(used) == len(targets):
+                kept.append(dedent_rule(rule.text))
+            elif used:
+                kept.append(dedent_rule(f"{', '.join(used)} {{{rule.body}}}"))
+    return '\n'.join(kept)
+
+
+def drop_unused_keyframes(css, scripts):
+    """Remove @keyframes that no remaining rule or script refers to"""
+    rules = [(rule, KEYFRAMES_PATTERN.match(rule.prelude)) for rule in parse_rules(css)]
+    if not any(keyframes for _, keyframes in rules):
+        return css
+    others = ' '.join(rule.text for rule, keyframes in rules if not keyframes)
+    used = set(WORD_PATTERN.findall(others)) | scripts
+    return '\n'.join(dedent_rule(rule.text) for rule, keyframes in rules
+                      if not keyframes or keyframes.group(1) in used)
+
+
+def rewrite_style_blocks(html, rewrite):
+    """Replace the content of every <style> block with rewrite(css)
+
+    Blocks left empty are removed.
+    """
+    def replace(match):
+        css = rewrite(match.group(1))
+        if not css.strip():
+            return ''
+        return f"<style>\n{indent(css, '        ')}\n    </style>"
+
+    return STYLE_PATTERN.sub(replace, html)
+
+
+def css_size(html):
+    """Return the minified size of a page's inline CSS, so layout changes do not count"""
+    return sum(len(minify_css(match.group(1)).encode('utf-8')) for match in STYLE_PATTERN.finditer(html))
+
+
+def purge_page(site, name, patterns):
+    """Remove unused CSS from one page; return (bytes before, bytes after, selectors removed)"""
+    html = site.pages[name]
+    scripts = script_words(site, html)
+    usage = Usage(site.document(name), scripts, patterns)
+    removed = []
+
+    def keep(selector):
+        if usage.uses(selector):
+            return True
+        removed.append(selector)
+        return False
+
+    before = css_size(html)
+    html = rewrite_style_blocks(html, lambda css: drop_unused_keyframes(purge_rules(css, keep), scripts))
+    after = css_size(html)
+    site.pages[name] = html
+    return before, after, removed
+
+
+def purge_stage(site):
+    """Remove the style rules each page never uses"""
+    print("Removing unused CSS...")
+    safelist = load_safelist(site.root)
+    report = {}
+    for name in sorted(site.pages):
+        patterns = safelist.get('*', []) + safelist.get(name, [])
+        before, after, removed = purge_page(site, name, patterns)
+        report[name] = {'before': before, 'after': after, 'removed_selectors': len(removed)}
+        print(f"  ✓ {name}: removed {before - after:,} of {before:,} minified CSS bytes "
+              f"({len(removed)} unused selectors)")
+    site.report['purge'] = report
+
+
+def above_fold(document):
+    """Return the elements rendered before the first scroll
+
+    Those are the first ABOVE_FOLD_ELEMENTS visible elements of <body> in
+    document order, with their ancestors.
+    """
+    body = document.find('body')
+    if body is None:
+        return document.elements
+    fold = [body, *body.ancestors()]
+    pending = list(reversed(body.children))
+    count = 0
+    while pending and count < ABOVE_FOLD_ELEMENTS:
+        element = pending.pop()
+        if element.tag in HIDDEN_TAGS:
+            continue
+        count += 1
+        if element.tag == 'svg':
+            # An icon counts as one element however many shapes it has
+            fold.extend(element.iter())
+        else:
+            fold.append(element)
+            pending.extend(reversed(element.children))
+    return fold
+
+
+def critical_rules(css, document, fold):
+    """Return the rules of css that style anything above the fold"""
+    fold_ids = set(map(id, fold))
+
+    def keep(selector):
+        if selector_names(selector) is None:
+            return True
+        return any(id(element) in fold_ids for element in document.select(selector))
+
+    return purge_rules(css, keep)
+
+
+def defer_stylesheet(href, critical):
+    """Return the markup that inlines critical CSS and loads href without blocking"""
+    style = f"<style>\n{indent(critical, '        ')}\n    </style>\n    " if critical else ''
+    return (f'{style}<link rel="preload" href="{href}" as="style" '
+            f'onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+            f'    <noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+def critical_stage(site):
+    """Inline the above-the-fold part of each page's CSS and defer the rest
+
+    Linked style sheets and inline blocks with more than MIN_DEFERRED_BYTES
+    of below-the-fold CSS are loaded without blocking rendering, with their
+    critical rules copied inline in front of them. The deferred sheet keeps
+    every rule in order, so the cascade ends up exactly as before.
+    """
+    print("Inlining critical CSS...")
+    report = {}
+    for name in sorted(site.pages):
+        html = site.pages[name]
+        document = site.document(name)
+        fold = above_fold(document)
+        sizes = {'inlined': 0, 'deferred': 0}
+
+        def defer(href, sheet, critical=None):
+            if critical is None:
+                critical = critical_rules(sheet, document, fold)
+            sizes['inlined'] += len(critical.encode('utf-8'))
+            sizes['deferred'] += len(sheet.encode('utf-8'))
+            return defer_stylesheet(href, critical)
+
+        def replace_link(match):
+            sheet = site.files.get(match.group(1))
+            if not isinstance(sheet, str):
+                return match.group(0)
+            return defer(match.group(1), sheet)
+
+        def replace_style(match):
+            sheet = dedent(match.group(1)).strip() + '\n'
+            critical = critical_rules(sheet, document, fold)
+            if len(sheet) - len(critical) < MIN_DEFERRED_BYTES:
+                return match.group(0)
+            href = fingerprint(f"css/{Path(name).stem}", sheet, 'css')
+            site.add_file(href, sheet)
+            return defer(href, sheet, critical)
+
+        # Both kinds of blocks are found in the page as it was, so the
+        # critical <style> blocks put in front of deferred sheets are never
+        # looked at again
+        matches = sorted([(match, replace_link) for match in STYLESHEET_PATTERN.finditer(html)]
+                         + [(match, replace_style) for match in STYLE_PATTERN.finditer(html)],
+                         key=lambda item: item[0].start())
+        pieces = []
+        position = 0
+        for match, replace in matches:
+            pieces.append(html[position:match.start()])
+            pieces.append(replace(match))
+            position = match.end()
+        pieces.append(html[position:])
+        html = ''.join(pieces)
+        if not sizes['deferred']:
+            continue
+        site.pages[name] = html
+        report[name] = sizes
+        print(f"  ✓ {name}: {sizes['inlined']:,} bytes of critical CSS inline, "
+              f"{sizes['deferred']:,} bytes deferred")
+    site.report['critical'] = report
@@ -0,0 +1,263 @@
+"""
+Schedule page generation
+Renders the route grid and filter options of schedule.html from
+data/routes.csv, so the first routes are in the HTML at first paint, and
+writes a columnar route table with prebuilt row indexes by origin,
+destination, truck type and time slot. The page filters by intersecting
+those indexes and only creates the cards it is about to show.
+
+Route prices come from data/tariffs.json, the table the quote page prices
+trips with, so both pages always agree.
+"""
+
+import csv
+import json
+from html import escape
+from pathlib import Path
+
+from scripts.manifest import hash_content, write_if_changed
+from scripts.markers import indent_html, splice_generated
+from scripts.tariffs import ROUTES_PATH, TARIFFS_PATH, load_tariffs, route_price
+
+SCHEDULE_PAGE = Path('schedule.html')
+TABLE_DIR = Path('assets/schedule')
+
+# Cards rendered into the page; the rest are created as the visitor scrolls
+PAGE_SIZE = 12
+
+# Route columns the page filters on; each gets a value -> rows index
+INDEXED_COLUMNS = ('origin', 'destination', 'truckType', 'timeSlot')
+
+# Fields filled by the page for cards built from the route table are marked
+# with data-field, so both renderers share this one template
+ROUTE_CARD = '''<div class="route-card" data-route-id="{id}" data-row="{row}">
+    <div class="route-header">
+        <div class="route-type">
+            <svg viewBox="0 0 24 24">
+                <rect x="1" y="3" width="15" height="13"/>
+                <polygon points="16 8 20 8 23 11 23 16 16 16 16 8"/>
+                <circle cx="5.5" cy="18.5" r="2.5"/>
+                <circle cx="18.5" cy="18.5" r="2.5"/>
+            </svg>
+            <span data-field="truckType">{truckType}</span>
+        </div>
+        <div class="route-price">
+            <div class="price-label">Starting from</div>
+            <div class="price-value">
+                <span class="price-currency">RWF</span> <span data-field="price">{price}</span>
+            </div>
+        </div>
+    </div>
+
+    <div class="route-details">
+        <div class="route-path">
+            <div class="route-location">
+                <div class="location-dot"></div>
+                <div class="location-name" data-field="originName">{originName}</div>
+            </div>
+            <div class="route-arrow">→</div>
+            <div class="route-location">
+                <div class="location-dot"></div>
+                <div class="location-name" data-field="destinationName">{destinationName}</div>
+            </div>
+        </div>
+
+        <div class="route-info">
+            <div class="info-item">
+                <svg viewBox="0 0 24 24">
+                    <circle cx="12" cy="12" r="10"/>
+                    <polyline points="12 6 12 12 16 14"/>
+                </svg>
+                <span class="info-text" data-field="time">{time}</span>
+            </div>
+            <div class="info-item">
+                <svg viewBox="0 0 24 24">
+                    <polyline points="22 12 18 12 15 21 9 3 6 12 2 12"/>
+                </svg>
+                <span class="info-text" data-field="duration">{duration}</span>
+            </div>
+            <div class="info-item">
+                <svg viewBox="0 0 24 24">
+                    <line x1="18" y1="20" x2="18" y2="10"/>
+                    <line x1="12" y1="20" x2="12" y2="4"/>
+                    <line x1="6" y1="20" x2="6" y2="14"/>
+                </svg>
+                <span class="info-text" data-field="distance">{distance}</span>
+            </div>
+            <div class="info-item">
+                <svg viewBox="0 0 24 24">
+                    <circle cx="12" cy="12" r="10"/>
+                    <path d="M12 6v6l4 2"/>
+                </svg>
+                <span class="info-text">Daily Service</span>
+            </div>
+        </div>
+    </div>
+
+    <div class="route-actions">
+        <a href="{book_url}" class="btn-book">
+            <svg viewBox="0 0 24 24">
+                <path d="M9 11l3 3L22 4"/>
+                <path d="M21 12v7a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h11"/>
+            </svg>
+            Book Now
+        </a>
+        <a href="#" class="btn-details">Details</a>
+    </div>
+</div>'''
+
+
+def load_routes(path, tariffs):
+    """Load the routes dataset, priced with the tariffs"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    return [{
+        'id': int(row['id']),
+        'origin': row['origin'],
+        'destination': row['destination'],
+        'originName': row['origin_name'],
+        'destinationName': row['destination_name'],
+        'truckType': row['truck_type'],
+        'time': row['time'],
+        'duration': row['duration'],
+        'distance': row['distance'],
+        'price': route_price(tariffs, row),
+        'timeSlot': row['time_slot'],
+    } for row in rows]
+
+
+def filter_key(column, value):
+    """Return the <select> value a route column value is filtered by"""
+    return value.lower() if column == 'truckType' else value
+
+
+def book_url(route):
+    """Return the quote link of a route"""
+    return (f"quote.html?origin={route['origin']}&amp;destination={route['destination']}"
+            f"&amp;truck={escape(route['truckType'])}")
+
+
+def render_card(route, row):
+    """Render one route card"""
+    values = {key: escape(str(value)) for key, value in route.items()}
+    values['price'] = f"{route['price']:,}"
+    return ROUTE_CARD.format(row=row, book_url=book_url(route), **values)
+
+
+def render_template():
+    """Render the empty card the page clones for routes built from the table"""
+    blank = {key: '' for key in ('id', 'row', 'truckType', 'price', 'originName',
+                                 'destinationName', 'time', 'duration', 'distance')}
+    return ROUTE_CARD.format(book_url='', **blank)
+
+
+def places(routes):
+    """Return [(code, name)] for every origin and destination, in first-seen order"""
+    found = {}
+    for route in routes:
+        found.setdefault(route['origin'], route['originName'])
+        found.setdefault(route['destination'], route['destinationName'])
+    return list(found.items())
+
+
+def build_table(routes):
+    """Return the columnar route table with its filter indexes
+
+    Repeated values (places, truck types, time slots) are stored once and
+    referenced by position; index[column][value] lists matching rows in
+    ascending order.
+    """
+    place_list = places(routes)
+    place_codes = [code for code, _ in place_list]
+    truck_types = sorted({route['truckType'] for route in routes})
+    time_slots = sorted({route['timeSlot'] for route in routes})
+    place_at = {code: position for position, code in enumerate(place_codes)}
+    truck_at = {truck: position for position, truck in enumerate(truck_types)}
+    slot_at = {slot: position for position, slot in enumerate(time_slots)}
+
+    columns = {
+        'id': [route['id'] for route in routes],
+        'origin': [place_at[route['origin']] for route in routes],
+        'destination': [place_at[route['destination']] for route in routes],
+        'truckType': [truck_at[route['truckType']] for route in routes],
+        'timeSlot': [slot_at[route['timeSlot']] for route in routes],
+        'time': [route['time'] for route in routes],
+        'duration': [route['duration'] for route in routes],
+        'distance': [route['distance'] for route in routes],
+        'price': [route['price'] for route in routes],
+    }
+    index = {column: {} for column in INDEXED_COLUMNS}
+    for row, route in enumerate(routes):
+        for column in INDEXED_COLUMNS:
+            index[column].setdefault(filter_key(column, route[column]), []).append(row)
+
+    return {
+        'count': len(routes),
+        'places': {'codes': place_codes, 'names': [name for _, name in place_list]},
+        'truckTypes': truck_types,
+        'timeSlots': time_slots,
+        'columns': columns,
+        'index': index,
+    }
+
+
+def render_options(options):
+    """Render <option> elements for (value, label) pairs"""
+    return '\n'.join(f'<option value="{escape(value)}">{escape(label)}</option>' for value, label in options)
+
+
+def render_grid(routes, table_path):
+    """Render the route grid with its first page of cards and the card template"""
+    cards = '\n\n'.join(render_card(route, row) for row, route in enumerate(routes[:PAGE_SIZE]))
+    grid = (f'<div class="routes-grid" id="routes-grid" data-table="{table_path}" '
+            f'data-count="{len(routes)}" data-page-size="{PAGE_SIZE}">\n'
+            f'{indent_html(cards)}\n</div>\n'
+            f'<template id="route-card-template">\n{indent_html(render_template())}\n</template>')
+    return indent_html(grid, ' ' * 12)
+
+
+def write_schedule(root='.'):
+    """Write the route table and regenerate schedule.html
+
+    Returns (number of routes, table path, page written).
+    """
+    root = Path(root)
+    routes = load_routes(root / ROUTES_PATH, load_tariffs(root))
+    content = json.dumps(build_table(routes), ensure_ascii=False, separators=(',', ':'))
+    table_path = (TABLE_DIR / f"routes.{hash_content(content)[:8]}.json").as_posix()
+
+    (root / TABLE_DIR).mkdir(parents=True, exist_ok=True)
+    write_if_changed(root / table_path, content + '\n')
+    for path in (root / TABLE_DIR).glob('routes.*.json'):
+        if path.relative_to(root).as_posix() != table_path:
+            path.unlink()
+
+    place_options = places(routes)
+    truck_options = [(truck.lower(), truck) for truck in sorted({route['truckType'] for route in routes})]
+    blocks = {
+        'routes': render_grid(routes, table_path),
+        'origin-options': indent_html(render_options(place_options), ' ' * 24),
+        'destination-options': indent_html(render_options(place_options), ' ' * 24),
+        'truck-options': indent_html(render_options(truck_options), ' ' * 24),
+    }
+    page_path = root / SCHEDULE_PAGE
+    with open(page_path, 'r', encoding='utf-8') as f:
+        page = f.read()
+    page, filled = splice_generated(page, blocks)
+    missing = sorted(set(blocks) - set(filled))
+    if missing:
+        raise ValueError(f"{SCHEDULE_PAGE} has no Generated region for: {', '.join(missing)}")
+    return len(routes), table_path, write_if_changed(page_path, page)
+
+
+def schedule_step(root='.'):
+    """Regenerate the schedule page and route table from data/routes.csv and data/tariffs.json"""
+    print("Generating route schedule...")
+    missing = [path for path in (ROUTES_PATH, TARIFFS_PATH) if not (Path(root) / path).exists()]
+    if missing:
+        print(f"  Note: {missing[0]} not found, skipping route schedule")
+        return
+    count, table_path, written = write_schedule(root)
+    state = 'updated' if written else 'unchanged'
+    print(f"  ✓ {SCHEDULE_PAGE}: {min(count, PAGE_SIZE)} of {count} routes pre-rendered ({state})")
+    print(f"  ✓ {table_path}: columnar table indexed by {', '.join(INDEXED_COLUMNS)}")
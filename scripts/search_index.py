@@ -0,0 +1,173 @@
+"""
+Static search indexes
+Turns data/shipments.json and the articles in content/articles/ into small JSON shards
+under assets/search/ that pages fetch on demand, so a lookup downloads and
+parses one shard instead of every record on page load
+
+Keys are spread over shards by a 32-bit FNV-1a hash (assets/js/search-index.js
+computes the same hash in the browser), with about SHARD_SIZE records per
+shard. Shard names carry a content hash so browsers can cache them for
+good; assets/search/index.json lists the current shards of every index.
+"""
+
+import json
+import math
+import re
+import unicodedata
+from pathlib import Path
+
+from scripts.articles import CONTENT_DIR, listing_record, load_articles
+from scripts.manifest import hash_content, write_if_changed
+
+INDEX_DIR = Path('assets/search')
+SHIPMENTS_PATH = Path('data/shipments.json')
+
+# Records per shard: small enough to fetch instantly, large enough to keep
+# the shard list in index.json short
+SHARD_SIZE = 256
+
+# Keyword prefixes shorter than this are not indexed (whole words still are)
+MIN_PREFIX = 3
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 's', 'the', 'to', 'up', 'while', 'with',
+}
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def fnv1a(key):
+    """Return the 32-bit FNV-1a hash of an ASCII key"""
+    value = 0x811c9dc5
+    for char in key:
+        value ^= ord(char)
+        value = (value * 0x01000193) & 0xffffffff
+    return value
+
+
+def shard_count(records):
+    """Return the number of shards for an index of the given size"""
+    return max(1, math.ceil(records / SHARD_SIZE))
+
+
+def encode(data):
+    """Serialize index data as compact JSON"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def normalize_words(text):
+    """Return the lowercase ASCII words of text"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return WORD_PATTERN.findall(text.lower())
+
+
+def keywords(text):
+    """Return the words and word prefixes a query can match in text"""
+    found = set()
+    for word in normalize_words(text):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        found.add(word)
+        found.update(word[:length] for length in range(MIN_PREFIX, len(word)))
+    return found
+
+
+def sharded(name, entries):
+    """Split {key: value} into hashed shard files
+
+    Returns ({relative path: content}, [relative path per shard]).
+    """
+    count = shard_count(len(entries))
+    shards = [{} for _ in range(count)]
+    for key, value in entries.items():
+        shards[fnv1a(key) % count][key] = value
+    files = {}
+    names = []
+    for number, shard in enumerate(shards):
+        content = encode(shard)
+        path = f"{name}/{number}.{hash_content(content)[:8]}.json"
+        files[path] = content
+        names.append(path)
+    return files, names
+
+
+def build_indexes(shipments, articles):
+    """Return ({relative path: content} for every index file, index.json data)"""
+    files = {}
+    index = {}
+
+    for name, records, key in (('shipments', shipments['shipments'], 'trackingNumber'),
+                               ('batches', shipments['batches'], 'batchId')):
+        shard_files, names = sharded(name, {record[key]: record for record in records})
+        files.update(shard_files)
+        index[name] = {'records': len(records), 'shards': names}
+
+    # Articles (newest first, as load_articles returns them): the listing
+    # fields by id, so search results can be shown as cards, and ids by keyword
+    records = {str(article['id']): listing_record(article) for article in articles}
+    record_files, record_names = sharded('articles/records', records)
+    files.update(record_files)
+
+    matches = {}
+    for article in articles:
+        text = ' '.join((article['title'], article['excerpt'], article['categoryLabel']))
+        for word in keywords(text):
+            matches.setdefault(word, []).append(article['id'])
+    keyword_files, keyword_names = sharded('articles/keywords', matches)
+    files.update(keyword_files)
+    index['articles'] = {
+        'records': len(articles),
+        'shards': record_names,
+        'keywords': {'words': len(matches), 'shards': keyword_names, 'stopWords': sorted(STOP_WORDS)},
+    }
+
+    files['index.json'] = encode(index)
+    return files, index
+
+
+def load_shipments(root='.'):
+    """Return the {"shipments": [...], "batches": [...]} tracking data"""
+    with open(Path(root) / SHIPMENTS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_indexes(root='.'):
+    """Build the search indexes from the data files and write them
+
+    Only changed shards are written and shards left over from earlier
+    builds are removed. Returns (index, written, removed).
+    """
+    root = Path(root)
+    files, index = build_indexes(load_shipments(root), load_articles(root))
+
+    out_dir = root / INDEX_DIR
+    written = removed = 0
+    for name, content in sorted(files.items()):
+        path = out_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if write_if_changed(path, content + '\n'):
+            written += 1
+    for path in sorted(out_dir.rglob('*.json')):
+        if path.relative_to(out_dir).as_posix() not in files:
+            path.unlink()
+            removed += 1
+    return index, written, removed
+
+
+def search_index_step(root='.'):
+    """Regenerate the static search indexes from data/ and content/articles/"""
+    print("Building search indexes...")
+    missing = [path for path in (SHIPMENTS_PATH, CONTENT_DIR) if not (Path(root) / path).exists()]
+    if missing:
+        print(f"  Note: {missing[0]} not found, skipping search indexes")
+        return
+    index, written, removed = write_indexes(root)
+    for name in ('shipments', 'batches'):
+        shards = len(index[name]['shards'])
+        print(f"  ✓ {name}: {index[name]['records']} records in {shards} shard{'s' if shards != 1 else ''}")
+    articles = index['articles']
+    print(f"  ✓ articles: {articles['records']} records in {len(articles['shards'])} shard"
+          f"{'s' if len(articles['shards']) != 1 else ''}, "
+          f"{articles['keywords']['words']} keywords in {len(articles['keywords']['shards'])} shards")
+    print(f"  {written} index files written, {removed} removed")
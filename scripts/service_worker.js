@@ -0,0 +1,166 @@
+/*
+ * Ironji service worker
+ * Generated into dist/sw.js by build.py --dist; VERSION and MANIFEST_URL are
+ * filled in by the build. The precache manifest lists every file of the
+ * build with its content hash.
+ *
+ * - install: the app shell (pages, CSS, JS, icons) is cached. Files whose
+ *   hash did not change since the last deploy are copied from the previous
+ *   cache instead of being downloaded again
+ * - activate: caches of earlier deploys are deleted
+ * - fetch: files of the build are served from the cache at once and
+ *   revalidated in the background; other files of the build are cached the
+ *   first time they are used. Fingerprinted files never change, so they are
+ *   never revalidated
+ */
+
+const VERSION = '__VERSION__';
+const MANIFEST_URL = '__MANIFEST_URL__';
+const CACHE_PREFIX = 'ironji-';
+const CACHE_NAME = CACHE_PREFIX + VERSION;
+
+// Cached responses carry the manifest hash they were stored for
+const HASH_HEADER = 'X-Content-Hash';
+
+// Names like site.3eeedfb103.js
+const FINGERPRINTED = /\.[0-9a-f]{8,}\.[a-z0-9]+$/;
+
+let manifestPromise = null;
+
+function loadManifest() {
+    if (!manifestPromise) {
+        manifestPromise = caches.open(CACHE_NAME)
+            .then(cache => cache.match(MANIFEST_URL))
+            .then(response => response || fetch(MANIFEST_URL))
+            .then(response => response.json())
+            .catch(error => {
+                manifestPromise = null;
+                throw error;
+            });
+    }
+    return manifestPromise;
+}
+
+// Path of a URL relative to the service worker, as listed in the manifest
+function sitePath(url) {
+    const scope = new URL(self.registration.scope);
+    if (url.origin !== scope.origin || !url.pathname.startsWith(scope.pathname)) {
+        return null;
+    }
+    const path = decodeURI(url.pathname.slice(scope.pathname.length));
+    return path === '' || path.endsWith('/') ? path + 'index.html' : path;
+}
+
+async function tagged(response, hash) {
+    const headers = new Headers(response.headers);
+    headers.set(HASH_HEADER, hash);
+    return new Response(await response.blob(), {
+        status: response.status,
+        statusText: response.statusText,
+        headers: headers
+    });
+}
+
+async function previousCaches() {
+    const names = await caches.keys();
+    return Promise.all(names
+        .filter(name => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+        .map(name => caches.open(name)));
+}
+
+async function precache(cache, previous, path, hash) {
+    // Unchanged since the last deploy: reuse the cached copy
+    for (const old of previous) {
+        const response = await old.match(path);
+        if (response && response.headers.get(HASH_HEADER) === hash) {
+            return cache.put(path, response);
+        }
+    }
+    const response = await fetch(path, { cache: 'no-cache' });
+    if (!response.ok) {
+        throw new Error(`${path}: HTTP ${response.status}`);
+    }
+    return cache.put(path, await tagged(response, hash));
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const response = await fetch(MANIFEST_URL, { cache: 'no-cache' });
+        const manifest = await response.clone().json();
+        const cache = await caches.open(CACHE_NAME);
+        await cache.put(MANIFEST_URL, response);
+        const previous = await previousCaches();
+        await Promise.all(Object.entries(manifest.files)
+            .filter(([, file]) => file.precache)
+            .map(([path, file]) => precache(cache, previous, path, file.hash)));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter(name => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+            .map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+async function revalidate(cache, path, hash) {
+    try {
+        const response = await fetch(path, { cache: 'no-cache' });
+        if (response.ok) {
+            await cache.put(path, await tagged(response, hash));
+        }
+    } catch (error) {
+        // Offline: the cached copy stays
+    }
+}
+
+async function respond(event, path) {
+    const request = event.request;
+    const manifest = await loadManifest().catch(() => null);
+    const file = manifest && manifest.files[path];
+    const cache = await caches.open(CACHE_NAME);
+
+    if (!file) {
+        try {
+            return await fetch(request);
+        } catch (error) {
+            // Offline navigation to a page that is not cached
+            const fallback = request.mode === 'navigate' && await cache.match('index.html');
+            if (fallback) {
+                return fallback;
+            }
+            throw error;
+        }
+    }
+
+    const cached = await cache.match(path);
+    if (cached) {
+        if (!FINGERPRINTED.test(path)) {
+            event.waitUntil(revalidate(cache, path, file.hash));
+        }
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok) {
+        event.waitUntil(tagged(response.clone(), file.hash).then(copy => cache.put(path, copy)));
+    }
+    return response;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+    const path = sitePath(url);
+    // Pages are cached once whatever their query string (quote.html?origin=...)
+    if (path === null || (url.search && request.mode !== 'navigate')) {
+        return;
+    }
+    event.respondWith(respond(event, path));
+});
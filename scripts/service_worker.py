@@ -0,0 +1,92 @@
+"""
+Service worker and precache manifest
+Hashes every file of the built site into a versioned precache manifest and
+generates sw.js from scripts/service_worker.js. The worker serves the app
+shell from its cache immediately and revalidates it in the background; on a
+new deploy it only downloads the files whose hash changed.
+
+The manifest is fingerprinted by its version, so a deploy that changes any
+file also changes sw.js, which is what makes browsers install the new worker.
+Runs after minify_stage (hashes must match the bytes that are served) and
+before compress_stage (sw.js and the manifest get precompressed too).
+"""
+
+import json
+from pathlib import Path
+
+from scripts.compress import as_bytes
+from scripts.manifest import hash_content
+from scripts.minify import minify_js
+
+TEMPLATE_PATH = Path(__file__).with_name('service_worker.js')
+
+# Served from the site root, so the worker controls every page
+WORKER_PATH = 'sw.js'
+
+# Cached on install; every other file is cached the first time it is used,
+# so image variants a browser never picks are never downloaded
+SHELL_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.webmanifest'}
+
+# Files the worker must always fetch from the network
+EXCLUDED = {WORKER_PATH}
+
+HASH_LENGTH = 16
+
+REGISTER_SCRIPT = ("<script>if('serviceWorker' in navigator){addEventListener('load',function(){"
+                   f"navigator.serviceWorker.register('{WORKER_PATH}')}})}}</script>")
+
+
+def register_worker(html):
+    """Add the service worker registration before </body>"""
+    position = html.rfind('</body>')
+    if position == -1:
+        position = len(html)
+    return html[:position] + REGISTER_SCRIPT + html[position:]
+
+
+def build_manifest(site):
+    """Return {path: {hash, size, precache}} for every file of the site"""
+    files = {}
+    for name, content in sorted(site.outputs().items()):
+        if name in EXCLUDED or name.endswith(('.gz', '.br')):
+            continue
+        data = as_bytes(content)
+        files[name] = {
+            'hash': hash_content(data)[:HASH_LENGTH],
+            'size': len(data),
+            'precache': Path(name).suffix in SHELL_EXTENSIONS,
+        }
+    return files
+
+
+def render_worker(version, manifest_path):
+    """Fill the worker template with the version and manifest location"""
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    source = template.replace('__VERSION__', version).replace('__MANIFEST_URL__', manifest_path)
+    return minify_js(source) + '\n'
+
+
+def service_worker_stage(site):
+    """Register a service worker on every page and write it with its precache manifest"""
+    print("Generating service worker...")
+    for name in site.pages:
+        site.pages[name] = register_worker(site.pages[name])
+
+    files = build_manifest(site)
+    version = hash_content(json.dumps(files, sort_keys=True))[:10]
+    manifest_path = f"precache-manifest.{version}.json"
+    site.add_file(manifest_path, json.dumps({'version': version, 'files': files}, separators=(',', ':')) + '\n')
+    site.add_file(WORKER_PATH, render_worker(version, manifest_path))
+
+    shell = {name: file for name, file in files.items() if file['precache']}
+    shell_bytes = sum(file['size'] for file in shell.values())
+    site.report['service_worker'] = {
+        'version': version,
+        'files': len(files),
+        'precached': len(shell),
+        'precached_bytes': shell_bytes,
+    }
+    print(f"  ✓ {manifest_path}: {len(files)} files")
+    print(f"  ✓ {WORKER_PATH}: precaches {len(shell)} shell files ({shell_bytes:,} bytes), "
+          f"caches the other {len(files) - len(shell)} on first use")
@@ -0,0 +1,124 @@
+"""
+In-memory site for the dist build
+Holds every page and generated file while the build stages run, then
+writes only what changed to the output directory
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+from scripts.dom import Document, tree_key
+from scripts.manifest import write_if_changed
+
+# Source directories published alongside the pages
+ASSET_DIRS = ('assets',)
+
+# Build reports, relative to the site root: kept out of the output so they
+# are never deployed
+REPORTS_DIR = Path('reports')
+
+
+class Site:
+    """Pages, generated files and static assets that make up the built site"""
+
+    def __init__(self, root, out_dir):
+        self.root = Path(root)
+        self.out_dir = Path(out_dir)
+        self.pages = {}     # output name -> HTML text
+        self.files = {}     # output relative path -> str or bytes
+        self.assets = {}    # output relative path -> source Path, copied as-is
+        self.report = {}    # stage name -> {page or file: stats}
+        self.reports = {}   # report file name -> text, written to REPORTS_DIR
+        self.documents = {} # page name -> (HTML, tree key, Document)
+
+    @classmethod
+    def load(cls, root, out_dir, page_paths, asset_dirs=ASSET_DIRS):
+        """Read the source pages and collect the static assets"""
+        site = cls(root, out_dir)
+        for path in page_paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                site.pages[Path(path).name] = f.read()
+        for asset_dir in asset_dirs:
+            for path in sorted((site.root / asset_dir).rglob('*')):
+                if path.is_file():
+                    site.assets[path.relative_to(site.root).as_posix()] = path
+        return site
+
+    def document(self, name):
+        """Return the parsed tree of a page's current HTML
+
+        Trees are shared between stages: a page is parsed again only when
+        a stage changed the elements of its <body> (see dom.tree_key), not
+        when it rewrote text, other attributes or the <head>.
+        """
+        html = self.pages[name]
+        cached = self.documents.get(name)
+        if cached is not None and cached[0] is html:
+            return cached[2]
+        key = tree_key(html)
+        document = cached[2] if cached is not None and cached[1] == key else Document(html)
+        self.documents[name] = (html, key, document)
+        return document
+
+    def add_file(self, path, content):
+        """Add a generated file to the output"""
+        self.files[str(path)] = content
+
+    def add_report(self, name, content):
+        """Add a build report, written next to the site rather than into it"""
+        self.reports[name] = content
+
+    def outputs(self):
+        """Return every output path mapped to its content or source Path"""
+        outputs = dict(self.assets)
+        outputs.update(self.files)
+        outputs.update(self.pages)
+        return outputs
+
+    def write(self):
+        """Write the site to out_dir, touching only files that changed
+
+        Files left over from earlier builds are removed. Returns the number
+        of files written, left unchanged and removed. Reports go to
+        REPORTS_DIR under the site root and are not counted.
+        """
+        for name, content in self.reports.items():
+            target = self.root / REPORTS_DIR / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            write_if_changed(target, content)
+
+        written = unchanged = removed = 0
+        outputs = self.outputs()
+        for name, content in sorted(outputs.items()):
+            target = self.out_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, Path):
+                changed = copy_if_changed(content, target)
+            else:
+                changed = write_if_changed(target, content)
+            if changed:
+                written += 1
+            else:
+                unchanged += 1
+
+        for path in sorted(self.out_dir.rglob('*'), reverse=True):
+            name = path.relative_to(self.out_dir).as_posix()
+            if path.is_file() and name not in outputs:
+                path.unlink()
+                removed += 1
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+        return written, unchanged, removed
+
+
+def copy_if_changed(source, target):
+    """Copy source to target unless target already has the same size and mtime"""
+    try:
+        src, dst = os.stat(source), os.stat(target)
+        if src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns:
+            return False
+    except FileNotFoundError:
+        pass
+    shutil.copy2(source, target)
+    return True
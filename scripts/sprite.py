@@ -0,0 +1,155 @@
+"""
+SVG icon sprite
+Collects the inline <svg> icons of every page, deduplicates them by their
+normalized shapes and moves every icon used more than once into a single
+content-hashed assets/icons.<hash>.svg sprite of <symbol>s. Each use site
+keeps its own <svg> element (class, size, stroke...) and points into the
+sprite with <use href>, so the icon markup is downloaded and cached once.
+
+Icons whose shapes carry an id, class or style are left inline: page CSS and
+links cannot reach into a <use> copy, so moving them could change how they
+look. SVGs inside scripts are left alone as well.
+"""
+
+import re
+from collections import Counter
+
+from scripts.bundle import SCRIPT_PATTERN, fingerprint
+from scripts.manifest import hash_content
+
+SVG_PATTERN = re.compile(r'<svg\b(?P<attrs>[^>]*)>(?P<body>.*?)</svg>', re.DOTALL)
+SHAPE_PATTERN = re.compile(r'<(?P<tag>[a-zA-Z][\w-]*)(?P<attrs>(?:\s+[^\s=/>]+(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'))?)*)\s*/?>')
+ATTRIBUTE_PATTERN = re.compile(r'([^\s=/>]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+VIEWBOX_PATTERN = re.compile(r'\bviewBox\s*=\s*"([^"]*)"')
+NUMBER_PATTERN = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Self-closed basic shapes, which render the same inside a <symbol>
+SHAPE_TAGS = {'path', 'circle', 'ellipse', 'line', 'polyline', 'polygon', 'rect'}
+
+# Attributes that would make a copied shape behave differently
+UNSAFE_ATTRIBUTES = {'id', 'class', 'style'}
+
+# Icons used fewer times than this across the site stay inline
+MIN_USES = 2
+
+
+def format_number(token):
+    """Write a number in its shortest form (0.50 -> 0.5, 2.0 -> 2)"""
+    value = float(token)
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def normalize_numbers(value):
+    """Normalize path data or a points list to single-spaced, shortest numbers"""
+    pieces = []
+    for token in NUMBER_PATTERN.findall(value):
+        if token.isalpha():
+            pieces.append(token)
+        else:
+            if pieces and not pieces[-1].isalpha():
+                pieces.append(' ')
+            pieces.append(format_number(token))
+    return ''.join(pieces)
+
+
+def normalize_icon(attrs, body):
+    """Return the canonical (viewBox, shapes) of an inline SVG, or None
+
+    None means the SVG cannot be moved into the sprite.
+    """
+    viewbox = VIEWBOX_PATTERN.search(attrs)
+    if viewbox is None:
+        return None
+    shapes = []
+    position = 0
+    for match in SHAPE_PATTERN.finditer(body):
+        if body[position:match.start()].strip():
+            return None
+        position = match.end()
+        tag = match.group('tag')
+        if tag not in SHAPE_TAGS or not match.group(0).endswith('/>'):
+            return None
+        attributes = []
+        for name, double, single in ATTRIBUTE_PATTERN.findall(match.group('attrs')):
+            value = double or single
+            if name in UNSAFE_ATTRIBUTES:
+                return None
+            if name in ('d', 'points'):
+                value = normalize_numbers(value)
+            attributes.append(f'{name}="{value}"')
+        shapes.append(f"<{tag} {' '.join(sorted(attributes))}/>")
+    if body[position:].strip() or not shapes:
+        return None
+    return normalize_numbers(viewbox.group(1)), ''.join(shapes)
+
+
+def script_spans(html):
+    """Return the (start, end) spans of every <script> element"""
+    return [match.span() for match in SCRIPT_PATTERN.finditer(html)]
+
+
+def find_icons(html):
+    """Yield (match, key) for every inline SVG outside scripts that can be sprited"""
+    spans = script_spans(html)
+    for match in SVG_PATTERN.finditer(html):
+        if any(start <= match.start() < end for start, end in spans):
+            continue
+        key = normalize_icon(match.group('attrs'), match.group('body'))
+        if key is not None:
+            yield match, key
+
+
+def symbol_id(key):
+    """Return a stable id for an icon"""
+    viewbox, shapes = key
+    return f"icon-{hash_content(viewbox + shapes)[:8]}"
+
+
+def render_sprite(keys):
+    """Render the sprite file holding a <symbol> for every key"""
+    symbols = [f'<symbol id="{symbol_id(key)}" viewBox="{key[0]}">{key[1]}</symbol>' for key in keys]
+    return '<svg xmlns="http://www.w3.org/2000/svg">\n' + '\n'.join(symbols) + '\n</svg>\n'
+
+
+def sprite_stage(site):
+    """Move icons repeated across the site into one cached <symbol> sprite"""
+    print("Building SVG icon sprite...")
+
+    uses = Counter()
+    for html in site.pages.values():
+        uses.update(key for _, key in find_icons(html))
+    keys = sorted(key for key, count in uses.items() if count >= MIN_USES)
+    if not keys:
+        print("  Note: no repeated inline icons found")
+        return
+
+    sprite = render_sprite(keys)
+    sprite_path = fingerprint('icons', sprite, 'svg')
+    site.add_file(sprite_path, sprite)
+    shared = set(keys)
+
+    report = {}
+    for name in sorted(site.pages):
+        html = site.pages[name]
+        pieces = []
+        position = 0
+        replaced = 0
+        for match, key in find_icons(html):
+            if key not in shared:
+                continue
+            pieces.append(html[position:match.start()])
+            pieces.append(f'<svg{match.group("attrs")}><use href="{sprite_path}#{symbol_id(key)}"/></svg>')
+            position = match.end()
+            replaced += 1
+        if not replaced:
+            continue
+        pieces.append(html[position:])
+        before = len(html.encode('utf-8'))
+        site.pages[name] = ''.join(pieces)
+        after = len(site.pages[name].encode('utf-8'))
+        report[name] = {'icons': replaced, 'before': before, 'after': after}
+        print(f"  ✓ {name}: {replaced} icons → <use>, {before:,} → {after:,} bytes")
+    site.report['sprite'] = report
+    print(f"  ✓ {sprite_path}: {len(keys)} icons from {sum(uses[key] for key in keys)} inline copies")
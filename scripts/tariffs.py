@@ -0,0 +1,195 @@
+"""
+Tariff table for instant quotes
+Compiles data/tariffs.json (truck rates, weight bands, time slot factors)
+with the district positions in data/districts.csv and the route distances in
+data/routes.csv into a compact table inlined in quote.html, so the page
+prices a trip in the browser with a few array lookups and no request
+
+A price is (base + per_km * km) * weight band factor * time slot factor,
+rounded to round_to. The schedule page prices its routes with the same
+function, so a route's "Starting from" price is what the quote form shows
+for that route in the lightest band. Distances come from data/routes.csv
+where a route exists and are estimated from the map positions otherwise.
+"""
+
+import csv
+import json
+import math
+from html import escape
+from pathlib import Path
+
+from scripts.manifest import write_if_changed
+from scripts.markers import indent_html, splice_generated
+
+TARIFFS_PATH = Path('data/tariffs.json')
+DISTRICTS_PATH = Path('data/districts.csv')
+ROUTES_PATH = Path('data/routes.csv')
+QUOTE_PAGE = Path('quote.html')
+
+
+def load_tariffs(root='.'):
+    """Load the tariff rules"""
+    with open(Path(root) / TARIFFS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def place_code(name):
+    """Return the code of a place name (Kigali -> kigali)"""
+    return name.strip().lower().replace(' ', '-')
+
+
+def route_km(route):
+    """Return the distance of a route row ('87 km' -> 87)"""
+    return int(route['distance'].split()[0])
+
+
+def round_price(value, step):
+    """Round half up to a multiple of step, as Math.round does in the page"""
+    return int(math.floor(value / step + 0.5)) * step
+
+
+def price(tariffs, truck, km, band=0, slot=None):
+    """Return the price of a trip
+
+    truck is an entry of tariffs['trucks'], band an index into the weight
+    bands and slot a time slot name (None or unknown: factor 1).
+    """
+    value = (truck['base'] + truck['per_km'] * km) * tariffs['weight_bands'][band]['factor']
+    value *= tariffs['time_slots'].get(slot, 1.0)
+    return round_price(value, tariffs['round_to'])
+
+
+def truck_by_name(tariffs, name):
+    """Return the truck a schedule route names (Dyna, Fuso...)"""
+    for truck in tariffs['trucks']:
+        if truck['name'].lower() == name.lower():
+            return truck
+    raise ValueError(f"{TARIFFS_PATH} has no truck named '{name}'")
+
+
+def route_price(tariffs, route):
+    """Return the lightest-band price of a schedule route"""
+    return price(tariffs, truck_by_name(tariffs, route['truck_type']), route_km(route), 0, route['time_slot'])
+
+
+def load_csv(path):
+    """Return the rows of a CSV file as dicts"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def load_places(root='.'):
+    """Return {code: (name, x, y)} for every district and route end
+
+    A route end that is not a district (Kigali) is placed at the centre of
+    the province of the same name.
+    """
+    root = Path(root)
+    districts = load_csv(root / DISTRICTS_PATH)
+    places = {place_code(row['district']): (row['district'], float(row['x']), float(row['y']))
+              for row in districts}
+    routes = load_csv(root / ROUTES_PATH) if (root / ROUTES_PATH).exists() else []
+    for route in routes:
+        for end in ('origin', 'destination'):
+            code = route[end]
+            if code in places:
+                continue
+            members = [row for row in districts if place_code(row['province']) == code]
+            if not members:
+                raise ValueError(f"{ROUTES_PATH}: '{code}' is neither a district nor a province")
+            x = sum(float(row['x']) for row in members) / len(members)
+            y = sum(float(row['y']) for row in members) / len(members)
+            places[code] = (route[f"{end}_name"], x, y)
+    return places, routes
+
+
+def distance_matrix(tariffs, places, routes):
+    """Return the km between every two places as a lower-triangle list
+
+    The distance between places i > j is at i * (i - 1) / 2 + j; a trip
+    within one place costs min_km.
+    """
+    codes = list(places)
+    known = {}
+    for route in routes:
+        pair = frozenset((route['origin'], route['destination']))
+        known[pair] = min(known.get(pair, math.inf), route_km(route))
+    distances = []
+    for i in range(len(codes)):
+        for j in range(i):
+            pair = frozenset((codes[i], codes[j]))
+            if pair in known:
+                km = known[pair]
+            else:
+                (_, x1, y1), (_, x2, y2) = places[codes[i]], places[codes[j]]
+                km = round(math.hypot(x1 - x2, y1 - y2) * tariffs['km_per_map_unit'])
+            distances.append(max(km, tariffs['min_km']))
+    return distances
+
+
+def build_table(tariffs, places, routes):
+    """Return the compact tariff table the quote page reads"""
+    trucks = tariffs['trucks']
+    return {
+        'currency': tariffs['currency'],
+        'roundTo': tariffs['round_to'],
+        'minKm': tariffs['min_km'],
+        'places': list(places),
+        'distances': distance_matrix(tariffs, places, routes),
+        'trucks': {
+            'ids': [truck['id'] for truck in trucks],
+            'names': [truck['name'] for truck in trucks],
+            'capacity': [truck['capacity_kg'] for truck in trucks],
+            'base': [truck['base'] for truck in trucks],
+            'perKm': [truck['per_km'] for truck in trucks],
+        },
+        'bands': {
+            'upTo': [band['up_to'] for band in tariffs['weight_bands']],
+            'factor': [band['factor'] for band in tariffs['weight_bands']],
+        },
+        'slots': tariffs['time_slots'],
+    }
+
+
+def render_options(options):
+    """Render <option> elements for (value, label) pairs"""
+    return '\n'.join(f'<option value="{escape(value)}">{escape(label)}</option>' for value, label in options)
+
+
+def write_quote_page(root='.'):
+    """Regenerate the tariff table and option lists of quote.html
+
+    Returns (places, trucks, page written).
+    """
+    root = Path(root)
+    tariffs = load_tariffs(root)
+    places, routes = load_places(root)
+    table = json.dumps(build_table(tariffs, places, routes), separators=(',', ':')).replace('</', '<\\/')
+    place_options = sorted(((code, name) for code, (name, _, _) in places.items()), key=lambda option: option[1])
+    truck_options = [(truck['id'], truck['label']) for truck in tariffs['trucks']]
+    blocks = {
+        'pickup-options': indent_html(render_options(place_options), ' ' * 36),
+        'delivery-options': indent_html(render_options(place_options), ' ' * 36),
+        'truck-options': indent_html(render_options(truck_options), ' ' * 36),
+        'tariff-table': f'    <script type="application/json" id="tariff-table">{table}</script>',
+    }
+    page_path = root / QUOTE_PAGE
+    with open(page_path, 'r', encoding='utf-8') as f:
+        page = f.read()
+    page, filled = splice_generated(page, blocks)
+    missing = sorted(set(blocks) - set(filled))
+    if missing:
+        raise ValueError(f"{QUOTE_PAGE} has no Generated region for: {', '.join(missing)}")
+    return len(places), len(tariffs['trucks']), write_if_changed(page_path, page)
+
+
+def quote_step(root='.'):
+    """Regenerate the quote page's tariff table from data/tariffs.json"""
+    print("Compiling quote tariffs...")
+    missing = [path for path in (TARIFFS_PATH, DISTRICTS_PATH) if not (Path(root) / path).exists()]
+    if missing:
+        print(f"  Note: {missing[0]} not found, skipping quote tariffs")
+        return
+    places, trucks, written = write_quote_page(root)
+    state = 'updated' if written else 'unchanged'
+    print(f"  ✓ {QUOTE_PAGE}: tariff table for {places} places and {trucks} trucks ({state})")
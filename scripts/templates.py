@@ -0,0 +1,283 @@
+"""
+Component templates
+Compiles the files in components/ into Python render functions once per
+build; every page is then rendered by calling them with that page's context,
+so the template text is never parsed again however many pages there are
+
+Syntax:
+
+    {{ name }}                  variable, HTML-escaped ({{ site.phone }} for nested values)
+    {{ name|safe }}             variable inserted as it is
+    {% if page == "track.html" %}...{% elif name %}...{% else %}...{% endif %}
+    {% include "partials/social.html" %}    another template, same context
+    {% slot cta %}default{% endslot %}      content a page can replace
+
+Every page is rendered with `page` (its file name), `year` (the year of the
+build) and the values in components/context.json: the "*" entry for every
+page, then the entry named after the page. A page entry's "slots" object
+replaces slot contents.
+
+`year` is left out of the fingerprints incremental builds compare, so a new
+year alone does not rebuild every page; run a forced build to refresh it.
+"""
+
+import json
+import re
+from datetime import date
+from html import escape
+from pathlib import Path
+
+from scripts.manifest import hash_content
+
+COMPONENTS_DIR = Path('components')
+CONTEXT_FILE = 'context.json'
+# Context that changes without any source changing, kept out of fingerprints
+VOLATILE_CONTEXT = ('year',)
+
+# Templates in this directory are only used through {% include %}
+PARTIALS_DIR = 'partials'
+
+TOKEN_PATTERN = re.compile(r'\{\{\s*(?P<output>.*?)\s*\}\}|\{%\s*(?P<tag>.*?)\s*%\}', re.DOTALL)
+NAME_PATTERN = re.compile(r'[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*)*$')
+CONDITION_PATTERN = re.compile(
+    r'(?P<negate>not\s+)?(?P<name>[A-Za-z_][\w.-]*)'
+    r'(?:\s*(?P<op>==|!=)\s*(?P<value>"[^"]*"|\'[^\']*\'|-?\d+))?$'
+)
+INCLUDE_PATTERN = re.compile(r'include\s+(?P<quote>["\'])(?P<name>[^"\']+)(?P=quote)$')
+STYLE_PATTERN = re.compile(r'<style>.*?</style>\s*', re.DOTALL)
+
+# Marks a missing variable in conditions, where it simply counts as false
+UNDEFINED = object()
+
+
+class TemplateError(ValueError):
+    """A template that cannot be compiled or rendered"""
+
+
+def lookup(context, path, template):
+    """Return the value at a dotted path of the context"""
+    value = context
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            if template is None:
+                return UNDEFINED
+            raise TemplateError(f"{template}: '{'.'.join(path)}' is not defined")
+        value = value[key]
+    return value
+
+
+def test(context, path, op, expected):
+    """Evaluate an {% if %} condition"""
+    value = lookup(context, path, None)
+    if op is None:
+        return value is not UNDEFINED and bool(value)
+    equal = value is not UNDEFINED and value == expected
+    return equal if op == '==' else not equal
+
+
+def to_text(value):
+    """Turn a context value into template output"""
+    if value is None or value is False:
+        return ''
+    return str(value)
+
+
+class Compiler:
+    """Turns template text into the Python source of a render function"""
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        self.lines = []
+        self.depth = 1
+        self.includes = set()
+        self.slots = set()
+
+    def line_number(self, offset):
+        """Return the 1-based line of an offset in the template"""
+        return self.source.count('\n', 0, offset) + 1
+
+    def error(self, message, offset):
+        return TemplateError(f"{self.name}, line {self.line_number(offset)}: {message}")
+
+    def emit(self, code):
+        self.lines.append('    ' * self.depth + code)
+
+    def compile(self):
+        """Return (python source, included templates, slot names)"""
+        stack = []
+        position = 0
+        for match in TOKEN_PATTERN.finditer(self.source):
+            if match.start() > position:
+                self.emit(f"append({self.source[position:match.start()]!r})")
+            position = match.end()
+            if match.group('output') is not None:
+                self.output(match.group('output'), match.start())
+            else:
+                self.tag(match.group('tag'), match.start(), stack)
+        if position < len(self.source):
+            self.emit(f"append({self.source[position:]!r})")
+        if stack:
+            kind, offset, _ = stack[-1]
+            raise self.error(f"{{% {kind} %}} is never closed", offset)
+        body = '\n'.join(self.lines) or '    pass'
+        code = (f"def render(context, slots, include):\n"
+                f"    out = []\n    append = out.append\n{body}\n    return ''.join(out)\n")
+        return code, self.includes, self.slots
+
+    def output(self, expression, offset):
+        name, _, filter_name = (part.strip() for part in expression.partition('|'))
+        if not NAME_PATTERN.match(name):
+            raise self.error(f"invalid variable '{expression}'", offset)
+        if filter_name not in ('', 'safe'):
+            raise self.error(f"unknown filter '{filter_name}'", offset)
+        value = f"to_text(lookup(context, {tuple(name.split('.'))!r}, {self.name!r}))"
+        self.emit(f"append({value})" if filter_name == 'safe' else f"append(escape({value}))")
+
+    def condition(self, expression, offset):
+        match = CONDITION_PATTERN.match(expression)
+        if match is None:
+            raise self.error(f"invalid condition '{expression}'", offset)
+        value = match.group('value')
+        expected = None if value is None else (int(value) if value[0] not in '"\'' else value[1:-1])
+        check = f"test(context, {tuple(match.group('name').split('.'))!r}, {match.group('op')!r}, {expected!r})"
+        return f"not {check}" if match.group('negate') else check
+
+    def tag(self, tag, offset, stack):
+        keyword, _, argument = tag.partition(' ')
+        argument = argument.strip()
+        if keyword == 'if':
+            self.emit(f"if {self.condition(argument, offset)}:")
+            self.depth += 1
+            self.emit('pass')
+            stack.append(('if', offset, 'if'))
+        elif keyword in ('elif', 'else'):
+            if not stack or stack[-1][0] != 'if':
+                raise self.error(f"{{% {keyword} %}} outside {{% if %}}", offset)
+            if stack[-1][2] == 'else':
+                raise self.error(f"{{% {keyword} %}} after {{% else %}}", offset)
+            stack[-1] = ('if', stack[-1][1], keyword)
+            self.depth -= 1
+            self.emit(f"elif {self.condition(argument, offset)}:" if keyword == 'elif' else 'else:')
+            self.depth += 1
+            self.emit('pass')
+        elif keyword == 'slot':
+            if not NAME_PATTERN.match(argument):
+                raise self.error(f"invalid slot name '{argument}'", offset)
+            self.slots.add(argument)
+            self.emit(f"if {argument!r} in slots:")
+            self.emit(f"    append(slots[{argument!r}])")
+            self.emit('else:')
+            self.depth += 1
+            self.emit('pass')
+            stack.append(('slot', offset, 'slot'))
+        elif keyword in ('endif', 'endslot'):
+            if not stack or stack[-1][0] != keyword[3:]:
+                raise self.error(f"unexpected {{% {keyword} %}}", offset)
+            stack.pop()
+            self.depth -= 1
+        elif keyword == 'include':
+            match = INCLUDE_PATTERN.match(tag)
+            if match is None:
+                raise self.error(f"invalid include '{tag}'", offset)
+            self.includes.add(match.group('name'))
+            self.emit(f"append(include({match.group('name')!r}, context, slots))")
+        else:
+            raise self.error(f"unknown tag '{keyword}'", offset)
+
+
+class Components:
+    """The component templates of a site, compiled on first use
+
+    Only the sources are pickled, so the set can be sent to worker
+    processes; each process compiles a template once and reuses it for
+    every page it renders.
+    """
+
+    def __init__(self, directory=COMPONENTS_DIR):
+        self.directory = Path(directory)
+        self.sources = {}
+        self.context = {}
+        self.compiled = {}
+        self.reload()
+
+    def __getstate__(self):
+        return {'directory': self.directory, 'sources': self.sources, 'context': self.context, 'compiled': {}}
+
+    def reload(self):
+        """Read every template and the context file again"""
+        self.sources = {}
+        for path in sorted(self.directory.rglob('*.html')):
+            with open(path, 'r', encoding='utf-8') as f:
+                # Remove any <style> tags from component files
+                content = STYLE_PATTERN.sub('', f.read()).strip()
+            self.sources[path.relative_to(self.directory).as_posix()] = content
+        context_path = self.directory / CONTEXT_FILE
+        self.context = {}
+        if context_path.exists():
+            with open(context_path, 'r', encoding='utf-8') as f:
+                self.context = json.load(f)
+        self.compiled = {}
+
+    def slots(self):
+        """Return the component slot names (header.html -> header)"""
+        return sorted(name[:-len('.html')] for name in self.sources
+                      if '/' not in name and self.sources[name])
+
+    def __contains__(self, slot):
+        return f"{slot}.html" in self.sources and bool(self.sources[f"{slot}.html"])
+
+    def template(self, name):
+        """Return the compiled (render, includes) of a template"""
+        if name not in self.compiled:
+            if name not in self.sources:
+                raise TemplateError(f"no template named {name} in {self.directory}/")
+            code, includes, _ = Compiler(name, self.sources[name]).compile()
+            namespace = {'escape': escape, 'lookup': lookup, 'test': test, 'to_text': to_text}
+            exec(compile(code, f"{self.directory / name}", 'exec'), namespace)
+            self.compiled[name] = (namespace['render'], includes)
+        return self.compiled[name]
+
+    def page_context(self, page):
+        """Return the variables and slot contents a page is rendered with"""
+        context = {'page': page, 'year': date.today().year}
+        context.update(self.context.get('*', {}))
+        context.update(self.context.get(page, {}))
+        slots = context.pop('slots', {})
+        return context, slots
+
+    def include(self, name, context, slots, chain=()):
+        """Render a template with the given context"""
+        if name in chain:
+            raise TemplateError(f"{name} includes itself ({' -> '.join(chain + (name,))})")
+        render, _ = self.template(name)
+        return render(context, slots, lambda other, c, s: self.include(other, c, s, chain + (name,)))
+
+    def render(self, slot, page):
+        """Render the component of a slot for a page"""
+        context, slots = self.page_context(page)
+        return self.include(f"{slot}.html", context, slots)
+
+    def dependencies(self, slot):
+        """Return the template names a slot's rendering reads"""
+        found = set()
+        pending = [f"{slot}.html"]
+        while pending:
+            name = pending.pop()
+            if name in found or name not in self.sources:
+                continue
+            found.add(name)
+            pending.extend(self.template(name)[1])
+        return found
+
+    def fingerprint(self, slots, page):
+        """Return a hash of everything the given slots render from for a page"""
+        context, slots_content = self.page_context(page)
+        context = {key: value for key, value in context.items() if key not in VOLATILE_CONTEXT}
+        parts = [json.dumps([context, slots_content], sort_keys=True)]
+        for slot in sorted(slots):
+            if slot in self:
+                parts += [f"{name}\0{self.sources[name]}" for name in sorted(self.dependencies(slot))]
+            else:
+                parts.append(f"{slot}\0")
+        return hash_content('\0'.join(parts))
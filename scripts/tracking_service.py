@@ -0,0 +1,356 @@
+"""
+Tracking lookup service
+A small asyncio HTTP server that answers tracking number and batch ID
+lookups from data/shipments.json, the file the static search index is built
+from, so other channels can query shipments without the site's index shards
+
+Endpoints (JSON, open to any origin):
+    GET  /shipments/<tracking number>   one shipment, 404 if unknown
+    GET  /batches/<batch id>            one batch, 404 if unknown
+    POST /shipments/lookup              {"keys": [...]} -> {"results": {key: record or null}}
+    POST /batches/lookup                same, for batch IDs
+    GET  /health                        record counts and cache statistics
+
+Keys are matched like the track page does (trimmed, upper case). Encoded
+records are kept in an LRU cache, so a hot tracking number is answered
+without serializing its record again, and bulk responses are assembled from
+the same cached bytes. The data file is checked for changes at most every
+RELOAD_INTERVAL seconds; a change reloads the records and empties the cache.
+
+Usage:
+    python3 -m scripts.tracking_service                  # http://127.0.0.1:8300/
+    python3 -m scripts.tracking_service --port 9000 --cache-size 4096
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from scripts.manifest import stat_signature
+from scripts.search_index import SHIPMENTS_PATH, load_shipments
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8300
+
+# Encoded records kept in memory; unknown keys are not cached, so lookups of
+# made-up numbers cannot push real records out
+CACHE_SIZE = 1024
+
+# Keys accepted by one bulk lookup
+MAX_BULK_KEYS = 100
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+
+# Seconds between two checks of the data file
+RELOAD_INTERVAL = 1.0
+
+# Seconds a keep-alive connection may wait for its next request
+IDLE_TIMEOUT = 30
+
+# Index name -> key field of its records
+INDEXES = {'shipments': 'trackingNumber', 'batches': 'batchId'}
+
+REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large',
+}
+
+CORS_HEADERS = (
+    'Access-Control-Allow-Origin: *',
+    'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers: Content-Type',
+    'Access-Control-Max-Age: 86400',
+)
+
+Request = namedtuple('Request', ['method', 'path', 'body', 'keep_alive'])
+
+
+class HTTPError(Exception):
+    """A request the service answers with an error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def encode(data):
+    """Serialize a response body as compact JSON bytes"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def normalize_key(key):
+    """Return a lookup key as the track page sends it"""
+    return key.strip().upper()
+
+
+class LRUCache:
+    """Keeps the most recently used entries, up to capacity"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the entry for key, or None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store an entry, dropping the least recently used one when full"""
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'size': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses}
+
+
+class TrackingStore:
+    """Shipments and batches by key, reloaded when the data file changes"""
+
+    def __init__(self, root='.', cache_size=CACHE_SIZE):
+        self.root = Path(root)
+        self.cache = LRUCache(cache_size)
+        self.records = {}
+        self.signature = None
+        self.checked = 0.0
+        self.reload()
+
+    def reload(self):
+        """Read the data file and empty the cache"""
+        signature = stat_signature(self.root / SHIPMENTS_PATH)
+        data = load_shipments(self.root)
+        self.records = {name: {normalize_key(record[key]): record for record in data[name]}
+                        for name, key in INDEXES.items()}
+        self.signature = signature
+        self.cache.clear()
+
+    def refresh(self):
+        """Reload the data if the file changed since it was read
+
+        A file that cannot be read or parsed (half written, for example)
+        keeps the last good records in service until the next check.
+        """
+        now = time.monotonic()
+        if now - self.checked < RELOAD_INTERVAL:
+            return
+        self.checked = now
+        try:
+            if stat_signature(self.root / SHIPMENTS_PATH) != self.signature:
+                self.reload()
+                print(f"  ✓ Reloaded {SHIPMENTS_PATH}: {self.describe()}")
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"  Warning: could not reload {SHIPMENTS_PATH}: {exc}")
+
+    def counts(self):
+        return {name: len(records) for name, records in self.records.items()}
+
+    def describe(self):
+        counts = self.counts()
+        return f"{counts['shipments']} shipments, {counts['batches']} batches"
+
+    def encoded(self, name, key):
+        """Return the JSON bytes of a record, or None if there is none"""
+        key = normalize_key(key)
+        body = self.cache.get((name, key))
+        if body is None:
+            record = self.records[name].get(key)
+            if record is None:
+                return None
+            body = encode(record)
+            self.cache.put((name, key), body)
+        return body
+
+    def encoded_bulk(self, name, keys):
+        """Return the JSON bytes of {"results": {key: record or null}}"""
+        pairs = []
+        for key in dict.fromkeys(keys):
+            pairs.append(encode(key) + b':' + (self.encoded(name, key) or b'null'))
+        return b'{"results":{' + b','.join(pairs) + b'}}'
+
+
+async def read_request(reader):
+    """Read one request; return None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as exc:
+        if exc.partial.strip():
+            raise HTTPError(400, 'incomplete request') from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, 'request headers too large') from None
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(400, 'malformed request line') from None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, 'invalid Content-Length') from None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"request bodies are limited to {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length > 0 else b''
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+    return Request(method.upper(), unquote(urlsplit(target).path), body, keep_alive)
+
+
+def render(status, body=b'', keep_alive=True):
+    """Return the bytes of a complete response"""
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+    if body:
+        lines.append('Content-Type: application/json; charset=utf-8')
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append('Cache-Control: no-cache')
+    lines.extend(CORS_HEADERS)
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def error_body(message):
+    return encode({'error': message})
+
+
+def bulk_keys(body):
+    """Return the keys of a bulk lookup body"""
+    try:
+        keys = json.loads(body).get('keys')
+    except (ValueError, AttributeError):
+        keys = None
+    if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+        raise HTTPError(400, 'expected {"keys": [...]} with string keys')
+    if len(keys) > MAX_BULK_KEYS:
+        raise HTTPError(413, f"bulk lookups are limited to {MAX_BULK_KEYS} keys")
+    return keys
+
+
+class TrackingService:
+    """Routes requests to the store and keeps connections alive between them"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def respond(self, request):
+        """Return (status, body) for a request"""
+        if request.method == 'OPTIONS':
+            return 204, b''
+        parts = request.path.strip('/').split('/')
+        if parts == ['health']:
+            if request.method != 'GET':
+                raise HTTPError(405, 'use GET')
+            return 200, encode({'records': self.store.counts(), 'cache': self.store.cache.stats()})
+        if len(parts) != 2 or parts[0] not in INDEXES or not parts[1]:
+            raise HTTPError(404, 'unknown endpoint')
+
+        name, key = parts
+        if key == 'lookup':
+            if request.method != 'POST':
+                raise HTTPError(405, 'use POST with {"keys": [...]}')
+            return 200, self.store.encoded_bulk(name, bulk_keys(request.body))
+        if request.method != 'GET':
+            raise HTTPError(405, 'use GET')
+        body = self.store.encoded(name, key)
+        if body is None:
+            return 404, error_body(f"no {name[:-1]} {normalize_key(key)}")
+        return 200, body
+
+    async def handle_connection(self, reader, writer):
+        """Answer the requests of one connection until it closes or idles out"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as error:
+                    writer.write(render(error.status, error_body(str(error)), keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                self.store.refresh()
+                try:
+                    status, body = self.respond(request)
+                except HTTPError as error:
+                    status, body = error.status, error_body(str(error))
+                writer.write(render(status, body, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def start_service(store, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start listening and return the asyncio server"""
+    service = TrackingService(store)
+    return await asyncio.start_server(service.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+
+async def serve(store, host, port):
+    server = await start_service(store, host, port)
+    port = server.sockets[0].getsockname()[1]
+    print(f"Serving tracking lookups on http://{host}:{port}/ ({store.describe()})", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Serve tracking number and batch ID lookups')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'port to listen on, 0 for any free port (default: {DEFAULT_PORT})')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, metavar='N',
+                        help=f'encoded records kept in the LRU cache (default: {CACHE_SIZE})')
+    parser.add_argument('--root', default='.', help='site directory holding data/ (default: .)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not (Path(args.root) / SHIPMENTS_PATH).exists():
+        print(f"Error: {Path(args.root) / SHIPMENTS_PATH} not found")
+        return 1
+    store = TrackingStore(args.root, args.cache_size)
+    try:
+        asyncio.run(serve(store, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Tests for picking the inline script statements scripts.bundle may move"""
+
+import contextlib
+import io
+
+import pytest
+
+from scripts.bundle import bundle_stage, collect_js, free_names, is_inline_script
+from scripts.jslex import significant, tokenize
+from scripts.site import Site
+
+
+def names(source):
+    return free_names(significant(tokenize(source)))
+
+
+@pytest.mark.parametrize('attrs, inline', [
+    ('', True),
+    (' type="text/javascript"', True),
+    (' type="module"', False),
+    (' type="application/json" id="data"', False),
+    (' src="app.js" defer', False),
+])
+def test_is_inline_script(attrs, inline):
+    assert is_inline_script(attrs) is inline
+
+
+def test_free_names_skip_properties_and_keys():
+    assert names("window.addEventListener('scroll', update, { passive: true });") == {'window', 'update'}
+
+
+def test_free_names_skip_local_declarations_and_parameters():
+    assert names("document.querySelectorAll('a').forEach(function (link, index) {"
+                 " const label = link.textContent; link.title = label + index; });") == {'document'}
+    assert names("items.forEach((item, i) => show(item, i));") == {'items', 'show'}
+    assert names("buttons.forEach(button => button.remove());") == {'buttons'}
+    assert names("try { load(); } catch (error) { console.warn(error); }") == {'load', 'console'}
+
+
+def test_free_names_keep_spread_operands():
+    assert names("console.log([...items]);") == {'console', 'items'}
+
+
+def page(body, attrs=''):
+    return f"<html><body><script{attrs}>{body}</script></body></html>"
+
+
+def keys(html):
+    _, statements = collect_js(html)
+    return [key for key, *_ in statements]
+
+
+def test_collect_js_only_takes_self_contained_statements():
+    html = page("const input = document.getElementById('q');\n"
+                "input.addEventListener('input', search);\n"
+                "document.body.classList.add('js');")
+    assert keys(html) == ["document . body . classList . add ( 'js' ) ;"]
+
+
+def test_collect_js_skips_module_scripts():
+    assert keys(page("document.body.classList.add('js');", ' type="module"')) == []
+
+
+def bundled_site(tmp_path, pages):
+    site = Site(tmp_path, tmp_path / 'dist')
+    site.pages.update(pages)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bundle_stage(site)
+    return site
+
+
+def styled(*rules):
+    css = '\n'.join(rules)
+    return f"<html><head>\n    <style>\n{css}\n    </style>\n</head><body></body></html>"
+
+
+def test_pages_left_out_of_a_css_bundle_get_their_own(tmp_path):
+    common = ['.nav { color: red; }', '.footer { color: blue; }']
+    site = bundled_site(tmp_path, {
+        'a.html': styled(*common, '.card { margin: 0; }'),
+        'b.html': styled(*common, '.card { margin: 0; }'),
+        'c.html': styled(*common, '.card { margin: 0; }'),
+        'd.html': styled('.hero { padding: 0; }', '.tile { margin: 1px; }'),
+        'e.html': styled('.hero { padding: 0; }', '.tile { margin: 1px; }'),
+    })
+    bundles = {name: content for name, content in site.files.items() if name.endswith('.css')}
+    assert len(bundles) == 2
+    for name, html in site.pages.items():
+        [link] = [path for path in bundles if path in html]
+        assert '<style>' not in html
+        assert ('.hero' in bundles[link]) == (name in ('d.html', 'e.html'))
+
+
+def scripted(body):
+    return f"<html><head></head><body><p>x</p><script>{body}</script></body></html>"
+
+
+def test_js_bundle_runs_where_the_statements_were(tmp_path):
+    body = ("const total = 3;\n"
+            "document.body.classList.add('js');\n"
+            "window.scrollTo(0, 0);\n"
+            "console.log(total);\n")
+    site = bundled_site(tmp_path, {'a.html': scripted(body), 'b.html': scripted(body)})
+    [path] = [name for name in site.files if name.endswith('.js')]
+    assert "classList.add('js');\n\nwindow.scrollTo(0, 0);" in site.files[path]
+    html = site.pages['a.html']
+    assert 'defer' not in html
+    assert html.index('const total') < html.index(f'<script src="{path}">') < html.index('console.log(total)')
+
+
+def test_js_statements_separated_by_page_code_stay_inline(tmp_path):
+    body = ("document.body.classList.add('js');\n"
+            "setup();\n"
+            "window.scrollTo(0, 0);\n")
+    site = bundled_site(tmp_path, {'a.html': scripted(body), 'b.html': scripted(body)})
+    [path] = [name for name in site.files if name.endswith('.js')]
+    assert site.files[path] == "document.body.classList.add('js');\n"
+    html = site.pages['a.html']
+    assert html.index(f'<script src="{path}">') < html.index('setup();') < html.index('window.scrollTo')
@@ -0,0 +1,132 @@
+"""Tests for selector parsing and matching in scripts.dom"""
+
+import pytest
+
+from scripts.dom import Document, parse_selector, selector_names, tree_key
+
+PAGE = """
+<main id="content">
+    <section class="a">
+        <p class="x">one</p>
+        <p class="y">two</p>
+        <span class="z">three</span>
+        <p class="y">four</p>
+    </section>
+    <div class="b"><section><p class="y">deep</p></section></div>
+    <img class="md:flex" src="a.png">
+</main>
+"""
+
+
+@pytest.fixture
+def document():
+    return Document(PAGE)
+
+
+def texts(elements):
+    return [(element.tag, sorted(element.classes)) for element in elements]
+
+
+@pytest.mark.parametrize('selector, combinator', [
+    ('a > b', '>'), ('a>b', '>'), ('.x + .y', '+'), ('.x+.y', '+'), ('a ~ b', '~'), ('a  ~b', '~'),
+])
+def test_combinators_parse_with_or_without_spaces(selector, combinator):
+    parts = parse_selector(selector)
+    assert parts is not None
+    assert [part[0] for part in parts] == [None, combinator]
+
+
+def test_descendant_combinator():
+    parts = parse_selector('main  .a p')
+    assert [combinator for combinator, _ in parts] == [None, ' ', ' ']
+    assert parts[1][1]['classes'] == {'a'}
+
+
+def test_compound_selector():
+    [(_, compound)] = parse_selector('P#intro.lead.wide')
+    assert compound == {'tag': 'p', 'id': 'intro', 'classes': {'lead', 'wide'}}
+
+
+def test_escaped_class_is_unescaped():
+    [(_, compound)] = parse_selector(r'.md\:flex')
+    assert compound['classes'] == {'md:flex'}
+
+
+@pytest.mark.parametrize('selector', ['', '> p', 'p >', 'p, div', '@media'])
+def test_unsupported_selectors_return_none(selector):
+    assert parse_selector(selector) is None
+
+
+def test_selector_names():
+    assert selector_names('main#content > .a p:hover') == {'main', 'content', 'a', 'p'}
+    assert selector_names('p >') is None
+
+
+def test_select_child(document):
+    assert len(document.select('.a > p')) == 3
+    assert len(document.select('.a > .y')) == 2
+    assert document.select('.a > .nope') == []
+    assert document.select('main > p') == []
+
+
+def test_select_descendant(document):
+    assert len(document.select('main p')) == 4
+    assert len(document.select('.b .y')) == 1
+
+
+def test_select_adjacent_sibling(document):
+    assert texts(document.select('.x + .y')) == [('p', ['y'])]
+    assert texts(document.select('.z + p')) == [('p', ['y'])]
+    assert document.select('.x + .z') == []
+
+
+def test_select_general_sibling(document):
+    assert len(document.select('.x ~ .y')) == 2
+    assert texts(document.select('.z ~ p')) == [('p', ['y'])]
+    assert document.select('.z ~ .x') == []
+
+
+def test_select_escaped_class_and_id(document):
+    assert texts(document.select(r'.md\:flex')) == [('img', ['md:flex'])]
+    assert len(document.select('#content')) == 1
+
+
+def test_select_limited_to_elements(document):
+    section = document.select('.b section')
+    assert document.select('p', section) == []
+    assert len(document.select('section', section)) == 1
+
+
+def test_unparseable_selector_matches_everything(document):
+    assert len(document.select('p, div')) == len(document.elements)
+
+
+def test_head_is_left_out_of_the_tree():
+    document = Document('<html><head><meta charset="utf-8"><style>p {}</style></head>'
+                        '<body><p>text</p></body></html>')
+    assert [element.tag for element in document.elements] == ['html', 'head', 'body', 'p']
+
+
+def test_tree_key_ignores_text_head_and_other_attributes():
+    page = '<html><head>{head}</head><body><main id="m" class="a">{body}<img src="{src}"></main></body></html>'
+    key = tree_key(page.format(head='<style>p {}</style>', body='one', src='a.png'))
+    assert key == tree_key(page.format(head='<link rel="stylesheet" href="x.css">', body='two', src='b.png'))
+    assert key != tree_key(page.format(head='', body='<br>', src='a.png'))
+    assert key != tree_key(page.replace('class="a"', 'class="b"').format(head='', body='', src=''))
+
+
+def test_pseudo_classes_and_attributes_count_as_matching(document):
+    assert len(document.select('.a > p:first-child')) == 3
+    assert len(document.select('img[src$=".png"]')) == 1
+    assert len(document.select('.y::before')) == 3
+
+
+def test_universal_selector(document):
+    assert len(document.select('.a > *')) == 4
+    assert len(document.select('*')) == len(document.elements)
+
+
+def test_unclosed_elements_are_closed_by_their_parent():
+    document = Document('<ul class="list"><li>one<li>two</ul><p class="after">x</p>')
+    assert len(document.select('.list li')) == 2
+    assert document.select('.list .after') == []
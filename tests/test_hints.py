@@ -0,0 +1,28 @@
+"""Tests for the image and preload hints added by scripts.hints"""
+
+from scripts.hints import hint_page
+from scripts.purge import ABOVE_FOLD_ELEMENTS
+from scripts.site import Site
+
+
+def hinted(tmp_path, body):
+    site = Site(tmp_path, tmp_path / 'dist')
+    site.pages['index.html'] = f"<html><head></head><body>{body}</body></html>"
+    return hint_page(site, 'index.html', {})
+
+
+def test_only_images_the_stage_made_lazy_are_counted(tmp_path):
+    filler = '<p>text</p>' * ABOVE_FOLD_ELEMENTS
+    html, stats = hinted(tmp_path, filler + '<img src="https://example.com/a.png">'
+                                            '<img src="https://example.com/b.png" loading="lazy">'
+                                            '<img src="https://example.com/c.png" loading="eager">')
+    assert stats['lazy'] == 1
+    assert html.count('loading="lazy"') == 2
+    assert 'loading="eager"' in html
+
+
+def test_the_first_visible_image_is_not_lazy(tmp_path):
+    html, stats = hinted(tmp_path, '<img src="https://example.com/hero.png">')
+    assert stats['lazy'] == 0
+    assert stats['hero'] == 'https://example.com/hero.png'
+    assert 'fetchpriority="high"' in html and 'loading' not in html
@@ -0,0 +1,38 @@
+"""Tests for attribute parsing and serialization in scripts.images"""
+
+import pytest
+
+from scripts import images
+from scripts.images import format_attrs, parse_attrs
+
+
+def test_parse_attrs_quote_styles():
+    attrs = parse_attrs('<img src="a.png" alt=\'Say "hi"\' width=40 loading>')
+    assert attrs == {'src': 'a.png', 'alt': 'Say "hi"', 'width': '40', 'loading': None}
+
+
+def test_format_attrs_escapes_double_quotes():
+    attrs = parse_attrs('<img alt=\'Say "hi"\' title="it\'s">')
+    assert format_attrs(attrs) == 'alt="Say &quot;hi&quot;" title="it\'s"'
+
+
+def test_format_attrs_keeps_entities():
+    attrs = parse_attrs('<img src="a.png?x=1&amp;y=2" alt="Fish &amp; chips" decoding=async>')
+    assert format_attrs(attrs) == 'src="a.png?x=1&amp;y=2" alt="Fish &amp; chips" decoding="async"'
+
+
+def test_cached_derivatives_are_not_decoded_again(tmp_path, monkeypatch):
+    image_module = pytest.importorskip('PIL.Image')
+    source = tmp_path / 'photo.png'
+    image_module.new('RGB', (400, 200), 'orange').save(source)
+    cache_dir = tmp_path / '.cache' / 'images'
+
+    fallback, derivatives = images.encode_derivatives(source, cache_dir)
+    assert fallback == 'jpeg'
+    assert [width for width, _ in derivatives['jpeg']] == [320, 400]
+
+    def decode(*args, **kwargs):
+        raise AssertionError('source decoded although every derivative is cached')
+
+    monkeypatch.setattr(images.Image, 'open', decode)
+    assert images.encode_derivatives(source, cache_dir) == (fallback, derivatives)
@@ -0,0 +1,77 @@
+"""Tests for the JavaScript tokenizer and statement splitter in scripts.jslex"""
+
+import pytest
+
+from scripts.jslex import significant, split_statements, tokenize
+
+
+def kinds(source):
+    return [(kind, text) for kind, text in significant(tokenize(source))]
+
+
+def test_tokens_cover_the_source():
+    source = "const a = 'x'; // note\n/* block */ let b = `t${a}`;"
+    assert ''.join(text for _, text in tokenize(source)) == source
+
+
+def test_token_kinds():
+    assert kinds("let x = 1.5e3 + y;") == [
+        ('name', 'let'), ('name', 'x'), ('punct', '='), ('name', '1.5e3'),
+        ('punct', '+'), ('name', 'y'), ('punct', ';'),
+    ]
+
+
+def test_whitespace_and_comments():
+    tokens = tokenize("a // line\n/* b */ c")
+    assert [kind for kind, _ in tokens] == ['name', 'space', 'comment', 'newline', 'comment', 'space', 'name']
+
+
+@pytest.mark.parametrize('source, string', [
+    ("'it\\'s'", "'it\\'s'"),
+    ('"a // b"', '"a // b"'),
+    ("'a /* b */'", "'a /* b */'"),
+])
+def test_strings_hide_comments_and_quotes(source, string):
+    assert kinds(source) == [('string', string)]
+
+
+def test_template_literal_with_nested_expression():
+    source = "`a ${ {b: `c ${d}`}.b } e`"
+    assert kinds(source) == [('template', source)]
+
+
+@pytest.mark.parametrize('source', [
+    "x = /ab+c/gi;",
+    "if (/[/]x/.test(s)) {}",
+    "return /\\d+/.exec(s);",
+])
+def test_regex_literals(source):
+    regexes = [text for kind, text in kinds(source) if kind == 'regex']
+    assert len(regexes) == 1
+
+
+@pytest.mark.parametrize('source', ["a / b / c", "(a) / 2", "x[0] / y"])
+def test_division_is_not_a_regex(source):
+    assert all(kind != 'regex' for kind, _ in kinds(source))
+
+
+def statements(source):
+    return [source[start:end] for start, end in split_statements(source)]
+
+
+def test_split_on_semicolons():
+    assert statements("a(); b = 1;\nc()") == ['a();', 'b = 1;', 'c()']
+
+
+def test_split_after_blocks():
+    source = "function f() { return 1; }\nif (x) { y(); } else { z(); }\nw();"
+    assert statements(source) == ['function f() { return 1; }', 'if (x) { y(); } else { z(); }', 'w();']
+
+
+def test_no_split_inside_brackets_strings_or_after_expression_blocks():
+    source = "const o = { a: 1, b: ';' };\nlist.forEach(function (i) { go(i); });\ntry { a(); } catch (e) {} finally { b(); }"
+    assert statements(source) == [
+        "const o = { a: 1, b: ';' };",
+        'list.forEach(function (i) { go(i); });',
+        'try { a(); } catch (e) {} finally { b(); }',
+    ]
@@ -0,0 +1,83 @@
+"""Tests for the article Markdown renderer in scripts.markdown"""
+
+import pytest
+
+from scripts.markdown import render_inline, render_markdown
+
+
+@pytest.mark.parametrize('level', range(1, 7))
+def test_heading_levels(level):
+    assert render_markdown('#' * level + ' Title') == f"<h{level}>Title</h{level}>"
+
+
+def test_heading_closing_hashes_are_dropped():
+    assert render_markdown('## Title ##') == "<h2>Title</h2>"
+
+
+def test_heading_followed_by_text_in_the_same_block():
+    assert render_markdown('# Title\nSome text\nmore') == "<h1>Title</h1>\n\n<p>Some text more</p>"
+
+
+def test_heading_followed_by_list_in_the_same_block():
+    assert render_markdown('### Steps\n- one\n- two') == (
+        "<h3>Steps</h3>\n\n<ul>\n    <li>one</li>\n    <li>two</li>\n</ul>")
+
+
+def test_hash_without_space_is_text():
+    assert render_markdown('#hashtag') == "<p>#hashtag</p>"
+
+
+def test_link_url_is_not_formatted():
+    assert render_inline('[docs](https://x.com/_private_/page)') == (
+        '<a href="https://x.com/_private_/page">docs</a>')
+    assert render_inline('[a](/x*y*z) and [b](/p__q__r)') == '<a href="/x*y*z">a</a> and <a href="/p__q__r">b</a>'
+
+
+def test_link_text_is_formatted():
+    assert render_inline('[**bold** and `c_d_`](u)') == '<a href="u"><strong>bold</strong> and <code>c_d_</code></a>'
+
+
+def test_emphasis_around_a_link():
+    assert render_inline('_see [docs](/a_b_c)_') == '<em>see <a href="/a_b_c">docs</a></em>'
+
+
+def test_paragraphs_join_their_lines():
+    assert render_markdown('First line\nsecond line\n\n\nNext') == "<p>First line second line</p>\n\n<p>Next</p>"
+
+
+def test_text_is_escaped():
+    assert render_markdown('Fish & chips <script>') == "<p>Fish &amp; chips &lt;script&gt;</p>"
+
+
+def test_unordered_list_with_continuation_line():
+    assert render_markdown('- one\n  more\n* two\n+ three') == (
+        "<ul>\n    <li>one more</li>\n    <li>two</li>\n    <li>three</li>\n</ul>")
+
+
+def test_ordered_list():
+    assert render_markdown('1. one\n2) **two**') == "<ol>\n    <li>one</li>\n    <li><strong>two</strong></li>\n</ol>"
+
+
+def test_blockquote():
+    assert render_markdown('> Quoted\n> *text*') == "<blockquote>Quoted <em>text</em></blockquote>"
+
+
+def test_html_block_is_copied():
+    block = '<div class="highlight-box">\n    <p>**as is**</p>\n</div>'
+    assert render_markdown(block + '\n\nAfter') == block + "\n\n<p>After</p>"
+
+
+def test_bold_and_italic():
+    assert render_inline('**a** __b__ *c* _d_') == '<strong>a</strong> <strong>b</strong> <em>c</em> <em>d</em>'
+
+
+def test_no_emphasis_inside_words_or_around_spaces():
+    assert render_inline('snake_case_name and 2 * 3 * 4') == 'snake_case_name and 2 * 3 * 4'
+
+
+def test_code_spans_are_not_formatted():
+    assert render_inline('`**x** <b>`') == '<code>**x** &lt;b&gt;</code>'
+
+
+def test_link_url_quotes_are_escaped():
+    assert render_inline('[x](/a"b)') == '<a href="/a&quot;b">x</a>'
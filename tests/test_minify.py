@@ -0,0 +1,73 @@
+"""Tests for the whitespace and comment minifiers in scripts.minify"""
+
+import pytest
+
+from scripts.minify import minify_css, minify_html, minify_js
+
+
+def test_css_whitespace_and_comments():
+    css = "/* header */\n.a  >  .b ,\n.c {\n    color: red ;\n    margin: 0 auto;\n}\n"
+    assert minify_css(css) == ".a>.b,.c{color:red;margin:0 auto}"
+
+
+def test_css_space_before_pseudo_class_is_kept():
+    assert minify_css(".nav :hover { color: red; }") == ".nav :hover{color:red}"
+
+
+def test_css_strings_are_kept():
+    assert minify_css('.a::before { content: "  /* x */  "; }') == '.a::before{content:"  /* x */  "}'
+
+
+def test_css_media_query():
+    assert minify_css("@media (max-width: 768px) {\n  .a { display: none; }\n}") == (
+        "@media (max-width:768px){.a{display:none}}")
+
+
+def test_js_whitespace_and_comments():
+    assert minify_js("// start\nconst a = 1; /* note */\nlet b = a + 2;\n") == "const a=1;let b=a+2;"
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("a\nb", "a\nb"),                   # automatic semicolon insertion
+    ("return\nx", "return\nx"),
+    ("a = b\n+ c", "a=b\n+c"),
+    ("f(a,\n  b)", "f(a,b)"),
+    ("x\n.y()", "x.y()"),
+])
+def test_js_line_breaks_kept_where_they_matter(source, expected):
+    assert minify_js(source) == expected
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("a + +b", "a+ +b"),
+    ("a - -b", "a- -b"),
+    ("typeof x", "typeof x"),
+    ("x = /re/ in y", "x=/re/ in y"),
+])
+def test_js_tokens_do_not_merge(source, expected):
+    assert minify_js(source) == expected
+
+
+def test_js_strings_templates_and_regexes_are_kept():
+    source = "const s = 'a  //  b', t = `x  ${ y }  z`, r = /a  b/g;"
+    assert minify_js(source) == "const s='a  //  b',t=`x  ${ y }  z`,r=/a  b/g;"
+
+
+def test_html_whitespace_and_comments():
+    html = "<!DOCTYPE html>\n<html>\n  <body>\n    <!-- nav -->\n    <p>Hello   <b>there</b></p>\n  </body>\n</html>\n"
+    assert minify_html(html) == "<!DOCTYPE html><html><body><p>Hello <b>there</b></p></body></html>\n"
+
+
+def test_html_keeps_conditional_comments_and_preformatted_text():
+    html = "<div>\n<!--[if IE]>old<![endif]-->\n<pre>  a\n  b</pre></div>"
+    assert minify_html(html) == "<div><!--[if IE]>old<![endif]--> <pre>  a\n  b</pre></div>\n"
+
+
+def test_html_minifies_inline_style_and_script():
+    html = '<head>\n<style>\n  a { color: red; }\n</style>\n<script>\n  let a = 1;\n</script>\n</head>'
+    assert minify_html(html) == "<head><style>a{color:red}</style><script>let a=1;</script></head>\n"
+
+
+def test_html_leaves_json_scripts_unminified():
+    html = '<script type="application/json">\n  {"a": "b  c"}\n</script>'
+    assert minify_html(html) == '<script type="application/json">{"a": "b  c"}</script>\n'
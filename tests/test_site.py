@@ -0,0 +1,29 @@
+"""Tests for the in-memory site the dist build stages share"""
+
+from scripts.site import REPORTS_DIR, Site
+
+PAGE = '<html><head><style>{css}</style></head><body><div class="{name}">{text}</div></body></html>'
+
+
+def test_document_is_shared_until_the_tags_change(tmp_path):
+    site = Site(tmp_path, tmp_path / 'dist')
+    site.pages['index.html'] = PAGE.format(css='div {}', name='a', text='one')
+    document = site.document('index.html')
+    assert site.document('index.html') is document
+
+    site.pages['index.html'] = PAGE.format(css='', name='a', text='two')
+    assert site.document('index.html') is document
+
+    site.pages['index.html'] = PAGE.format(css='', name='b', text='two')
+    changed = site.document('index.html')
+    assert changed is not document
+    assert set(changed.by_class) == {'b'}
+
+
+def test_reports_are_written_outside_the_output(tmp_path):
+    site = Site(tmp_path, tmp_path / 'dist')
+    site.pages['index.html'] = PAGE.format(css='', name='a', text='one')
+    site.add_report('page-weight.json', '{}\n')
+    assert site.write() == (1, 0, 0)
+    assert (tmp_path / REPORTS_DIR / 'page-weight.json').read_text() == '{}\n'
+    assert sorted(path.name for path in (tmp_path / 'dist').iterdir()) == ['index.html']
@@ -0,0 +1,140 @@
+"""Tests for the component template compiler in scripts.templates"""
+
+import datetime
+import json
+
+import pytest
+
+from scripts import templates
+from scripts.templates import Compiler, Components, TemplateError
+
+
+def components(tmp_path, templates, context=None):
+    for name, source in templates.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding='utf-8')
+    if context is not None:
+        (tmp_path / 'context.json').write_text(json.dumps(context), encoding='utf-8')
+    return Components(tmp_path)
+
+
+def render(tmp_path, source, context=None, page='index.html'):
+    return components(tmp_path, {'header.html': source}, {'*': context or {}}).render('header', page)
+
+
+def test_text_is_copied(tmp_path):
+    assert render(tmp_path, '<p>{ not a tag } %}</p>') == '<p>{ not a tag } %}</p>'
+
+
+def test_variables_are_escaped(tmp_path):
+    context = {'title': '<b>"A" & B</b>', 'site': {'phone': '+250 788'}}
+    assert render(tmp_path, '{{ title }}|{{site.phone}}', context) == (
+        '&lt;b&gt;&quot;A&quot; &amp; B&lt;/b&gt;|+250 788')
+
+
+def test_safe_filter(tmp_path):
+    assert render(tmp_path, '{{ title|safe }}', {'title': '<b>A</b>'}) == '<b>A</b>'
+
+
+def test_none_and_false_render_empty(tmp_path):
+    assert render(tmp_path, '[{{ a }}][{{ b }}][{{ c }}]', {'a': None, 'b': False, 'c': 0}) == '[][][0]'
+
+
+def test_page_and_year_are_defined(tmp_path):
+    assert render(tmp_path, '{{ page }}', page='track.html') == 'track.html'
+    assert render(tmp_path, '{{ year }}').isdigit()
+
+
+def test_fingerprint_ignores_the_year(tmp_path, monkeypatch):
+    site = components(tmp_path, {'footer.html': '{{ year }}'}, {'*': {'phone': '1'}})
+    before = site.fingerprint({'footer'}, 'index.html')
+    monkeypatch.setattr(templates, 'date', type('date', (), {'today': lambda: datetime.date(2999, 1, 1)}))
+    assert site.render('footer', 'index.html') == '2999'
+    assert site.fingerprint({'footer'}, 'index.html') == before
+    site.context['*']['phone'] = '2'
+    assert site.fingerprint({'footer'}, 'index.html') != before
+
+
+def test_page_context_overrides_shared_context(tmp_path):
+    site = components(tmp_path, {'header.html': '{{ title }}'},
+                      {'*': {'title': 'All'}, 'about.html': {'title': 'About'}})
+    assert site.render('header', 'index.html') == 'All'
+    assert site.render('header', 'about.html') == 'About'
+
+
+IF_TEMPLATE = ('{% if page == "track.html" %}track{% elif count != 0 %}count'
+               '{% elif not flag %}no flag{% else %}other{% endif %}')
+
+
+@pytest.mark.parametrize('page, context, expected', [
+    ('track.html', {'count': 3}, 'track'),
+    ('index.html', {'count': 3}, 'count'),
+    ('index.html', {'count': 0}, 'no flag'),
+    ('index.html', {'count': 0, 'flag': True}, 'other'),
+])
+def test_if_elif_else(tmp_path, page, context, expected):
+    assert render(tmp_path, IF_TEMPLATE, context, page) == expected
+
+
+def test_missing_variable_is_false_in_conditions(tmp_path):
+    assert render(tmp_path, '{% if missing %}yes{% else %}no{% endif %}') == 'no'
+    assert render(tmp_path, "{% if missing != 'x' %}differs{% endif %}") == 'differs'
+
+
+def test_nested_if(tmp_path):
+    source = '{% if a %}A{% if b %}B{% endif %}{% endif %}.'
+    assert render(tmp_path, source, {'a': True, 'b': False}) == 'A.'
+
+
+def test_include_uses_the_same_context(tmp_path):
+    site = components(tmp_path, {
+        'footer.html': '<footer>{% include "partials/social.html" %}</footer>',
+        'partials/social.html': '<a>{{ name }}</a>',
+    }, {'*': {'name': 'Ironji'}})
+    assert site.render('footer', 'index.html') == '<footer><a>Ironji</a></footer>'
+    assert site.slots() == ['footer']
+    assert site.dependencies('footer') == {'footer.html', 'partials/social.html'}
+
+
+def test_include_cycle(tmp_path):
+    site = components(tmp_path, {'header.html': "{% include 'header.html' %}"})
+    with pytest.raises(TemplateError, match='includes itself'):
+        site.render('header', 'index.html')
+
+
+def test_slots(tmp_path):
+    site = components(tmp_path, {'header.html': '<nav>{% slot cta %}<a>Quote</a>{% endslot %}</nav>'},
+                      {'track.html': {'slots': {'cta': '<a>Track</a>'}}})
+    assert site.render('header', 'index.html') == '<nav><a>Quote</a></nav>'
+    assert site.render('header', 'track.html') == '<nav><a>Track</a></nav>'
+
+
+def test_compile_reports_includes_and_slots():
+    _, includes, slots = Compiler('t.html', '{% include "a.html" %}{% slot cta %}{% endslot %}').compile()
+    assert includes == {'a.html'}
+    assert slots == {'cta'}
+
+
+@pytest.mark.parametrize('source, message', [
+    ('{% if a %}', r'line 1: \{% if %\} is never closed'),
+    ('\n{% endif %}', r'line 2: unexpected \{% endif %\}'),
+    ('{% if a %}{% endslot %}', r'unexpected \{% endslot %\}'),
+    ('{% else %}', r'\{% else %\} outside \{% if %\}'),
+    ('{% if a %}{% else %}\n{% elif b %}{% endif %}', r'line 2: \{% elif %\} after \{% else %\}'),
+    ('{% if a %}{% else %}{% else %}{% endif %}', r'\{% else %\} after \{% else %\}'),
+    ('{{ a|upper }}', "unknown filter 'upper'"),
+    ('{{ a b }}', "invalid variable 'a b'"),
+    ('{% if a > 1 %}{% endif %}', "invalid condition 'a > 1'"),
+    ('{% include header.html %}', 'invalid include'),
+    ('{% slot 1x %}{% endslot %}', "invalid slot name '1x'"),
+    ('{% for x in y %}', "unknown tag 'for'"),
+])
+def test_compile_errors(source, message):
+    with pytest.raises(TemplateError, match=message):
+        Compiler('t.html', source).compile()
+
+
+def test_undefined_variable_is_an_error(tmp_path):
+    with pytest.raises(TemplateError, match="'site.email' is not defined"):
+        render(tmp_path, '{{ site.email }}', {'site': {}})
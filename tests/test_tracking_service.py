@@ -0,0 +1,39 @@
+"""Tests for the tracking lookup store and the load test's request mix"""
+
+import json
+from pathlib import Path
+
+from scripts.loadtest import UNKNOWN_KEYS, request_mix
+from scripts.search_index import load_shipments
+from scripts.tracking_service import TrackingStore
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_encoded_caches_records():
+    store = TrackingStore(ROOT, cache_size=8)
+    number = load_shipments(ROOT)['shipments'][0]['trackingNumber']
+    body = store.encoded('shipments', f"  {number.lower()} ")
+    assert json.loads(body)['trackingNumber'] == number
+    assert store.encoded('shipments', number) is body
+    assert store.cache.stats()['hits'] == 1
+
+
+def test_encoded_does_not_cache_unknown_keys():
+    store = TrackingStore(ROOT, cache_size=8)
+    for number in range(20):
+        assert store.encoded('shipments', f"TRK-0000-{number:06d}") is None
+    assert store.cache.stats()['size'] == 0
+
+
+def test_request_mix_keys():
+    data = load_shipments(ROOT)
+    store = TrackingStore(ROOT)
+    paths = [request.split(b' ')[1].decode() for request in request_mix(data, 2000)
+             if request.startswith(b'GET /shipments/')]
+    keys = [path.rsplit('/', 1)[1] for path in paths]
+    known = [key for key in keys if store.encoded('shipments', key) is not None]
+    unknown = set(keys) - set(known)
+    assert known and unknown
+    assert len(unknown) <= UNKNOWN_KEYS
+    assert all(key.startswith('TRK-0000-') for key in unknown)
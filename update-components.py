@@ -1,112 +1,247 @@
 #!/usr/bin/env python3
 """
 Update script for Ironji website components
-Updates the header and footer in all HTML pages with the latest versions
+Updates the header, footer and any other component slots in all HTML pages
+with the latest versions
+
+Runs incrementally: a build manifest records the hash of every component
+and page, so pages whose inputs have not changed are skipped and files are
+only rewritten when their content actually differs.
 """
 
+import argparse
 import os
-import re
+import sys
 from pathlib import Path
 
-def read_component(component_path):
-    """Read a component file and return its content"""
-    if not os.path.exists(component_path):
-        return None
-    with open(component_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    # Remove any <style> tags from component files
-    content = re.sub(r'<style>.*?</style>\s*', '', content, flags=re.DOTALL)
-    return content.strip()
+from scripts.devserver import serve
+from scripts.manifest import (
+    hash_content, load_manifest, save_manifest, stat_signature, write_if_changed,
+)
+from scripts.markers import indent_html, scan_regions, splice
+from scripts.pool import map_pages
+from scripts.profiling import Profiler
+from scripts.templates import COMPONENTS_DIR, CONTEXT_FILE, Components
 
-def update_html_file(file_path):
-    """Update header and footer in a single HTML file"""
+MANIFEST_PATH = '.build-manifest.json'
+
+def components_hash(components, slots, page):
+    """Return a single hash covering the components used by a page"""
+    return components.fingerprint(slots, page)
+
+def is_page_unchanged(file_path, entry, components):
+    """Check the manifest entry to see if a page can be skipped without reading it"""
+    if not entry or entry.get('components') != components_hash(components, entry.get('slots', []), file_path.name):
+        return False
+    return entry.get('stat') == stat_signature(file_path)
+
+def record_page(manifest, file_path, content, components, slots):
+    """Remember the current state of a page in the build manifest"""
+    if manifest is None:
+        return
+    manifest['pages'][file_path.name] = {
+        'hash': hash_content(content),
+        'slots': sorted(slots),
+        'components': components_hash(components, slots, file_path.name),
+        'stat': stat_signature(file_path),
+    }
+
+def update_html_file(file_path, components, manifest=None):
+    """Update every component region in a single HTML file"""
+
+    entry = manifest['pages'].get(file_path.name) if manifest is not None else None
+    if manifest is not None and is_page_unchanged(file_path, entry, components):
+        print(f"  Skipping {file_path.name} (unchanged)")
+        return False
 
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
+    # Find every component region in one pass
+    regions = [region for region in scan_regions(content) if region.kind == 'static']
+    slots = {region.name for region in regions}
+
     # Check if file has static components
-    if '<!-- Static Header Start -->' not in content:
+    if not regions:
         print(f"  Skipping {file_path.name} (no static components found)")
+        record_page(manifest, file_path, content, components, slots)
         return False
 
-    # Read the latest components
-    header_content = read_component('components/header.html')
-    footer_content = read_component('components/footer.html')
-
-    if not header_content or not footer_content:
-        print("  Error: Could not read component files")
+    # Content was touched but not modified since the last run
+    if (entry and entry.get('hash') == hash_content(content)
+            and entry.get('components') == components_hash(components, slots, file_path.name)):
+        print(f"  Skipping {file_path.name} (unchanged)")
+        entry['stat'] = stat_signature(file_path)
         return False
 
-    # Update header
-    header_pattern = r'<!-- Static Header Start -->.*?<!-- Static Header End -->'
-    if re.search(header_pattern, content, re.DOTALL):
-        # Ensure proper indentation
-        header_html = '\n'.join(['    ' + line if line else '' for line in header_content.split('\n')])
-        content = re.sub(
-            header_pattern,
-            f'<!-- Static Header Start -->\n{header_html}\n    <!-- Static Header End -->',
-            content,
-            flags=re.DOTALL
-        )
-        print(f"  ✓ Updated header in {file_path.name}")
-
-    # Update footer
-    footer_pattern = r'<!-- Static Footer Start -->.*?<!-- Static Footer End -->'
-    if re.search(footer_pattern, content, re.DOTALL):
-        # Ensure proper indentation
-        footer_html = '\n'.join(['    ' + line if line else '' for line in footer_content.split('\n')])
-        content = re.sub(
-            footer_pattern,
-            f'<!-- Static Footer Start -->\n{footer_html}\n    <!-- Static Footer End -->',
-            content,
-            flags=re.DOTALL
-        )
-        print(f"  ✓ Updated footer in {file_path.name}")
-
-    # Write the updated content
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-    return True
+    for slot in sorted(slots - set(components.slots())):
+        print(f"  Warning: no component found for {slot} region in {file_path.name}")
+
+    # Each component is rendered with this page's context
+    rendered = {slot: indent_html(components.render(slot, file_path.name))
+                for slot in slots if slot in components}
+    content, spliced = splice(content, rendered, regions)
+
+    # Only write the file if the injected components changed it
+    changed = write_if_changed(file_path, content)
+    names = ', '.join(region.name for region in spliced)
+    if changed:
+        print(f"  ✓ Updated {names} in {file_path.name}")
+    else:
+        print(f"  Components already up to date in {file_path.name} ({names})")
+
+    record_page(manifest, file_path, content, components, slots)
+    return changed
+
+def process_page(file_path, components, entry):
+    """Worker entry point: update one page and return (changed, manifest entry)"""
+    manifest = {'pages': {file_path.name: entry} if entry else {}}
+    changed = update_html_file(file_path, components, manifest)
+    return changed, manifest['pages'].get(file_path.name)
+
+def watch_rebuilder(components, manifest):
+    """Return the dev server's rebuild callback
+
+    components and manifest stay in memory between rebuilds: templates are
+    re-read when a component file changes and only the pages using a slot
+    that renders from it are updated, serially, since a worker pool would
+    cost more than the work.
+    """
+    def affected_slots(names):
+        if CONTEXT_FILE in names:
+            return set(components.slots())
+        return {slot for slot in components.slots() if components.dependencies(slot) & names}
+
+    def rebuild(component_paths, page_paths):
+        pages = {path.name for path in page_paths}
+        if component_paths:
+            names = {path.relative_to(components.directory).as_posix() for path in component_paths}
+            slots = affected_slots(names)
+            components.reload()
+            slots |= affected_slots(names) | {name[:-len('.html')] for name in names}
+            pages.update(name for name, entry in manifest['pages'].items()
+                         if slots & set(entry.get('slots', [])))
+            manifest['components'] = component_hashes(components)
+
+        written = []
+        for name in sorted(pages):
+            file_path = Path(name)
+            if not file_path.exists():
+                manifest['pages'].pop(name, None)
+                continue
+            print(f"Processing {name}...")
+            if update_html_file(file_path, components, manifest):
+                written.append(file_path)
+        save_manifest(MANIFEST_PATH, manifest)
+        return written
+
+    return rebuild
+
+def component_hashes(components):
+    """Return the hash of every template source, recorded in the manifest"""
+    return {name: hash_content(source) for name, source in components.sources.items()}
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Update component regions in all pages')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the build manifest and reprocess every page')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='process pages in N worker processes (0 = one per CPU core)')
+    parser.add_argument('--profile', nargs='?', const='profile-components.json', metavar='FILE',
+                        help='write per-stage and per-page timings, I/O and peak memory '
+                             'to FILE (default: profile-components.json)')
+    parser.add_argument('--watch', action='store_true',
+                        help='after updating, serve the site with live reload and rebuild '
+                             'the pages affected by every change')
+    parser.add_argument('--host', default='127.0.0.1', help='address to serve on with --watch')
+    parser.add_argument('--port', type=int, default=8000, help='port to serve on with --watch')
+    return parser.parse_args()
 
 def main():
     """Main function to update all HTML files"""
+    args = parse_args()
+    profiler = Profiler('update-components.py', enabled=args.profile is not None)
+
     print("Updating Ironji website components...")
     print("=" * 50)
 
     # Check if component files exist
     if not os.path.exists('components/header.html'):
         print("Error: components/header.html not found!")
-        return
+        return 1
     if not os.path.exists('components/footer.html'):
         print("Error: components/footer.html not found!")
-        return
+        return 1
+
+    # Read the latest components once for all pages; each worker compiles
+    # them on first use and reuses the compiled form for every page
+    with profiler.stage('components'):
+        components = Components(COMPONENTS_DIR)
 
     print("Reading components from:")
-    print("  - components/header.html")
-    print("  - components/footer.html")
+    for name in components.sources:
+        print(f"  - {COMPONENTS_DIR}/{name}")
     print()
 
+    manifest = load_manifest(MANIFEST_PATH)
+    if args.force:
+        manifest['pages'] = {}
+    manifest['components'] = component_hashes(components)
+
     # Find all HTML files in the root directory
     root_dir = Path('.')
-    html_files = list(root_dir.glob('*.html'))
+    html_files = sorted(root_dir.glob('*.html'))
 
     print(f"Found {len(html_files)} HTML files to check\n")
 
+    # Results come back in file order whatever the number of jobs
     updated_count = 0
-    for html_file in html_files:
-        print(f"Processing {html_file.name}...")
-        if update_html_file(html_file):
-            updated_count += 1
-        print()
+    failed = []
+    pages = {}
+    with profiler.stage('pages') as stage:
+        results = map_pages(
+            process_page, html_files, jobs=args.jobs, profile=profiler.enabled,
+            args_for=lambda html_file: (components, manifest['pages'].get(html_file.name)),
+        )
+        for result in results:
+            print(f"Processing {result.path.name}...")
+            print(result.output, end='')
+            if result.error:
+                print(f"  Error: {result.error}")
+                failed.append(result.path.name)
+            else:
+                changed, entry = result.value
+                updated_count += changed
+                if entry:
+                    pages[result.path.name] = entry
+            profiler.add_page(stage, result.path.name, result.stats)
+            print()
+
+    # Pages that no longer exist are dropped from the manifest
+    manifest['pages'] = pages
+    with profiler.stage('manifest'):
+        save_manifest(MANIFEST_PATH, manifest)
 
     print("=" * 50)
     print(f"Update complete! Updated {updated_count} files.")
+    if failed:
+        print(f"Failed to update {len(failed)} files: {', '.join(failed)}")
     print("\nHow to use this script:")
     print("1. Edit components/header.html or components/footer.html")
     print("2. Run: python3 update-components.py")
     print("3. All pages will be updated with the new components")
     print("4. Commit and push to GitHub")
 
+    if profiler.enabled:
+        print()
+        profiler.write(args.profile)
+
+    if args.watch:
+        print()
+        return serve(watch_rebuilder(components, manifest), args.host, args.port)
+
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())